@@ -1,1237 +1,1469 @@
-# app.py
-# ============================================================
-# ✅ GEREKEN DB MIGRATION (Supabase SQL Editor'da 1 kere çalıştır)
-#
-# alter table sent_log add column if not exists day_row_id bigint;
-# create unique index if not exists sent_log_unique_day_row on sent_log (sent_date, day_row_id);
-#
-# (Opsiyonel) Eğer eskiden template bazlı unique index eklediysen:
-# drop index if exists sent_log_unique_day_template;
-# ============================================================
-
-import streamlit as st
-import requests
-import re
-from io import BytesIO
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
-from datetime import date
-import pandas as pd
-import time
-import psycopg
-
-st.set_page_config(page_title="SinanKee", layout="wide", initial_sidebar_state="collapsed")
-
-# ================== MODERN THEME (CSS) ==================
-MODERN_CSS = """
-<style>
-:root{
-  --bg0:#070a12; --bg1:#0b1220; --card:#0b1220;
-  --stroke:rgba(255,255,255,.08); --stroke2:rgba(255,255,255,.12);
-  --text:rgba(255,255,255,.92); --muted:rgba(255,255,255,.62);
-  --brand:#22c55e; --brand2:#06b6d4; --warn:#f59e0b; --bad:#ef4444;
-  --radius:14px;
-}
-
-/* Arkaplan */
-html, body, [data-testid="stAppViewContainer"]{
-  background:
-    radial-gradient(1100px 800px at 18% 0%, rgba(34,197,94,.09), transparent 55%),
-    radial-gradient(1000px 700px at 85% 20%, rgba(6,182,212,.10), transparent 58%),
-    linear-gradient(180deg, var(--bg0), var(--bg1));
-  color: var(--text) !important;
-}
-
-/* Üst boşluk / header inceltme (üstteki dev “container” hissini bitirir) */
-.main .block-container{
-  padding-top: 1.0rem !important;
-  padding-bottom: 2.0rem !important;
-}
-[data-testid="stHeader"]{
-  background: transparent !important;
-  height: 46px !important;
-}
-[data-testid="stToolbar"]{
-  opacity:.75;
-  top: 0.25rem !important;
-}
-
-/* Kart stili */
-.block-card{
-  background: linear-gradient(180deg, rgba(255,255,255,.05), rgba(255,255,255,.02));
-  border: 1px solid var(--stroke);
-  border-radius: var(--radius);
-  padding: 16px 16px;
-  box-shadow: 0 14px 40px rgba(0,0,0,.32);
-}
-.block-card:first-of-type{ margin-top: .25rem !important; }
-
-.kicker{ color: var(--muted); font-size: 13px; }
-.h-title{ font-size: 28px; font-weight: 780; letter-spacing: .2px; margin: 0 0 6px 0; }
-.sub{ color: var(--muted); margin: 0; }
-
-.badge{
-  display:inline-flex; gap:8px; align-items:center;
-  border:1px solid var(--stroke);
-  border-radius: 999px;
-  padding: 6px 10px;
-  background: rgba(255,255,255,.03);
-  color: var(--muted);
-  font-size: 12px;
-}
-.badge-dot{ width:8px; height:8px; border-radius:999px; background: var(--brand); }
-.small-muted{ color: var(--muted); font-size: 12px; }
-
-/* DataFrame/Data editor */
-[data-testid="stDataFrame"], [data-testid="stTable"]{
-  border: 1px solid var(--stroke) !important;
-  border-radius: var(--radius) !important;
-  overflow: hidden !important;
-}
-
-/* Expander */
-[data-testid="stExpander"]{
-  border: 1px solid var(--stroke) !important;
-  border-radius: var(--radius) !important;
-  background: rgba(255,255,255,.02) !important;
-}
-
-/* Butonlar */
-button[kind="primary"]{
-  border-radius: 12px !important;
-  border: 1px solid rgba(34,197,94,.35) !important;
-  background: linear-gradient(90deg, rgba(34,197,94,.20), rgba(6,182,212,.18)) !important;
-}
-button[kind="secondary"], button{
-  border-radius: 12px !important;
-}
-
-/* Input/textarea */
-input, textarea{
-  border-radius: 12px !important;
-}
-
-/* Divider */
-hr{ border-color: var(--stroke) !important; }
-
-/* “Ghost bar” gibi görünen input container’larını sakinleştir */
-div[data-testid="stTextInput"]{ margin-top: 0.25rem !important; }
-div[data-testid="stTextInput"] input:placeholder-shown{
-  background: rgba(255,255,255,.02) !important;
-}
-</style>
-"""
-st.markdown(MODERN_CSS, unsafe_allow_html=True)
-
-def page_header(title: str, subtitle: str = "", right_html: str = ""):
-    st.markdown(
-        f"""
-        <div class="block-card" style="padding:18px 18px;">
-          <div style="display:flex;justify-content:space-between;align-items:flex-start;gap:12px;flex-wrap:wrap;">
-            <div>
-              <div class="h-title" style="margin:0;">{title}</div>
-              <div class="sub" style="margin:6px 0 0 0;">{subtitle}</div>
-            </div>
-            {right_html}
-          </div>
-        </div>
-        <div style="height:12px;"></div>
-        """,
-        unsafe_allow_html=True
-    )
-
-# ================== CONSTANTS ==================
-TODAY = date.today()
-TODAY_KEY = TODAY.isoformat()
-
-DAY_KEYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-DAY_KEY = DAY_KEYS[TODAY.weekday()]
-
-DAYS_TR = {
-    0: "Pazartesi", 1: "Salı", 2: "Çarşamba",
-    3: "Perşembe", 4: "Cuma", 5: "Cumartesi", 6: "Pazar"
-}
-
-SELECT_PLACEHOLDER = "Seçiniz…"
-MANUAL_OPTION = "Manuel"
-DEFAULT_CATEGORY = "Genel"
-
-VAR_PATTERN = re.compile(r"\{\{([^{}]+)\}\}")
-
-# Anchor temizleme
-ANCHOR_HTML = re.compile(r'<a\s+[^>]*href=[\'"][^\'"]+[\'"][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
-ANCHOR_MD = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')  # [text](url)
-
-# ================== TR DATE (locale bağımsız) ==================
-TR_MONTHS = {
-    "ocak": 1, "şubat": 2, "subat": 2, "mart": 3, "nisan": 4,
-    "mayıs": 5, "mayis": 5, "haziran": 6, "temmuz": 7,
-    "ağustos": 8, "agustos": 8, "eylül": 9, "eylul": 9,
-    "ekim": 10, "kasım": 11, "kasim": 11, "aralık": 12, "aralik": 12
-}
-TR_MONTH_NAMES = {
-    1: "Ocak", 2: "Şubat", 3: "Mart", 4: "Nisan", 5: "Mayıs", 6: "Haziran",
-    7: "Temmuz", 8: "Ağustos", 9: "Eylül", 10: "Ekim", 11: "Kasım", 12: "Aralık"
-}
-
-DATE_PREFIX_RE = re.compile(
-    r"^\s*(\d{1,2})\.?\s+([A-Za-zÇĞİÖŞÜçğıöşü]+)\s*(\d{4})?\b",
-    re.UNICODE
-)
-
-def extract_tr_date_from_name(name: str):
-    if not name:
-        return None
-    m = DATE_PREFIX_RE.match(name.strip())
-    if not m:
-        return None
-    day = int(m.group(1))
-    mon = (m.group(2) or "").strip().lower()
-    year = int(m.group(3)) if m.group(3) else date.today().year
-    month = TR_MONTHS.get(mon)
-    if not month:
-        return None
-    try:
-        return date(year, month, day)
-    except ValueError:
-        return None
-
-def format_tr_date(d: date) -> str:
-    return f"{d.day:02d} {TR_MONTH_NAMES[d.month]} {d.year}"
-
-# ================== DB ==================
-@st.cache_resource
-def get_conn():
-    db_url = st.secrets.get("DATABASE_URL", "")
-    if not db_url:
-        st.error("DATABASE_URL secrets içinde yok.")
-        st.stop()
-    return psycopg.connect(db_url, autocommit=True)
-
-def db_get_categories():
-    with get_conn().cursor() as cur:
-        cur.execute("select name from categories order by name")
-        rows = cur.fetchall()
-    cats = [r[0] for r in rows] if rows else []
-    if DEFAULT_CATEGORY not in cats:
-        cats.insert(0, DEFAULT_CATEGORY)
-    return cats
-
-def db_add_category(name: str):
-    name = (name or "").strip()
-    if not name:
-        return
-    with get_conn().cursor() as cur:
-        cur.execute("insert into categories(name) values (%s) on conflict do nothing", (name,))
-
-def db_delete_category(name: str):
-    name = (name or "").strip()
-    if not name or name == DEFAULT_CATEGORY:
-        return
-    with get_conn().cursor() as cur:
-        cur.execute("update day_rows set category=%s where category=%s", (DEFAULT_CATEGORY, name))
-        cur.execute("update variables set category=%s where category=%s", (DEFAULT_CATEGORY, name))
-        cur.execute("update attachments set category=%s where category=%s", (DEFAULT_CATEGORY, name))
-        cur.execute("delete from categories where name=%s and name<>%s", (name, DEFAULT_CATEGORY))
-
-def db_get_day_rows(day_key: str):
-    with get_conn().cursor() as cur:
-        cur.execute(
-            """
-            select id, text, category, requires_attachment
-            from day_rows
-            where day_key=%s and active=true
-            order by id asc
-            """,
-            (day_key,),
-        )
-        rows = cur.fetchall()
-    return [
-        {"id": int(r[0]), "text": r[1], "category": r[2], "requires_attachment": bool(r[3])}
-        for r in rows
-    ]
-
-def db_replace_day_rows(day_key: str, new_rows: list[dict]):
-    with get_conn().cursor() as cur:
-        cur.execute("delete from day_rows where day_key=%s", (day_key,))
-        for r in new_rows:
-            cur.execute(
-                """
-                insert into day_rows(day_key, text, category, requires_attachment, active)
-                values (%s, %s, %s, %s, true)
-                """,
-                (day_key, r["text"], r["category"], bool(r.get("requires_attachment", False))),
-            )
-
-def db_add_day_row(day_key: str, text: str, category: str, requires_attachment: bool):
-    with get_conn().cursor() as cur:
-        cur.execute(
-            """
-            insert into day_rows(day_key, text, category, requires_attachment, active)
-            values (%s, %s, %s, %s, true)
-            """,
-            (day_key, text, category, bool(requires_attachment)),
-        )
-
-def db_get_variables():
-    out = {}
-    with get_conn().cursor() as cur:
-        cur.execute("select name, category from variables order by name")
-        vars_ = cur.fetchall()
-        for name, cat in vars_:
-            cur.execute("select value from variable_options where variable_name=%s order by id", (name,))
-            opts = [x[0] for x in cur.fetchall()]
-            out[name] = {"category": cat, "options": opts}
-    return out
-
-def db_upsert_variable(name: str, category: str, options: list[str]):
-    name = (name or "").strip()
-    if not name:
-        return
-    category = (category or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-    options = [o.strip() for o in (options or []) if o and o.strip()]
-    with get_conn().cursor() as cur:
-        cur.execute(
-            """
-            insert into variables(name, category)
-            values (%s,%s)
-            on conflict (name) do update set category=excluded.category
-            """,
-            (name, category),
-        )
-        cur.execute("delete from variable_options where variable_name=%s", (name,))
-        for o in options:
-            cur.execute("insert into variable_options(variable_name, value) values (%s,%s)", (name, o))
-
-def db_delete_variable(name: str):
-    name = (name or "").strip()
-    if not name:
-        return
-    with get_conn().cursor() as cur:
-        cur.execute("delete from variables where name=%s", (name,))
-
-def db_get_attachments(include_expired: bool):
-    with get_conn().cursor() as cur:
-        if include_expired:
-            cur.execute("select name, category, url, valid_date from attachments order by name")
-        else:
-            cur.execute(
-                """
-                select name, category, url, valid_date
-                from attachments
-                where valid_date is null or valid_date >= current_date
-                order by name
-                """
-            )
-        rows = cur.fetchall()
-    out = {}
-    for name, cat, url, vdate in rows:
-        out[name] = {"category": cat, "url": url, "valid_date": vdate}
-    return out
-
-def db_upsert_attachment(name: str, category: str, url: str, valid_date):
-    name = (name or "").strip()
-    url = (url or "").strip()
-    if not name or not url:
-        return
-    category = (category or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-    with get_conn().cursor() as cur:
-        cur.execute(
-            """
-            insert into attachments(name, category, url, valid_date)
-            values (%s,%s,%s,%s)
-            on conflict (name) do update
-            set category=excluded.category, url=excluded.url, valid_date=excluded.valid_date
-            """,
-            (name, category, url, valid_date),
-        )
-
-def db_delete_attachment(name: str):
-    name = (name or "").strip()
-    if not name:
-        return
-    with get_conn().cursor() as cur:
-        cur.execute("delete from attachments where name=%s", (name,))
-
-# ---------------- SENT LOG (day_row_id bazlı) ----------------
-def db_get_sent_day_row_ids_for_date(d: date) -> set[int]:
-    with get_conn().cursor() as cur:
-        cur.execute(
-            "select day_row_id from sent_log where sent_date=%s and day_row_id is not null",
-            (d,),
-        )
-        rows = cur.fetchall()
-    return set(int(r[0]) for r in rows if r and r[0] is not None)
-
-def db_get_sent_rows_for_date(d: date):
-    with get_conn().cursor() as cur:
-        cur.execute(
-            """
-            select id, sent_date, coalesce(user_key,'') as user_key, day_row_id, template_text
-            from sent_log
-            where sent_date=%s
-            order by id
-            """,
-            (d,),
-        )
-        rows = cur.fetchall()
-    out = []
-    for rid, sdate, ukey, day_row_id, text in rows:
-        out.append({
-            "ID": int(rid),
-            "Tarih": str(sdate),
-            "Kullanıcı": (ukey or "Bilinmiyor"),
-            "DayRowID": int(day_row_id) if day_row_id is not None else None,
-            "Mesaj": text,
-        })
-    return out
-
-def db_get_log_dates_summary():
-    with get_conn().cursor() as cur:
-        cur.execute("select sent_date, count(*) from sent_log group by sent_date order by sent_date desc")
-        return cur.fetchall()
-
-def db_try_reserve_send(d: date, day_row_id: int, template_text: str, user_key: str) -> bool:
-    if not day_row_id:
-        return False
-    template_text = (template_text or "").strip()
-    with get_conn().cursor() as cur:
-        cur.execute(
-            """
-            insert into sent_log(sent_date, user_key, day_row_id, template_text)
-            values (%s, %s, %s, %s)
-            on conflict (sent_date, day_row_id) do nothing
-            returning id
-            """,
-            (d, user_key, int(day_row_id), template_text),
-        )
-        return bool(cur.fetchone())
-
-def db_unreserve_send(d: date, day_row_id: int):
-    if not day_row_id:
-        return
-    with get_conn().cursor() as cur:
-        cur.execute(
-            "delete from sent_log where sent_date=%s and day_row_id=%s",
-            (d, int(day_row_id)),
-        )
-
-# ================== HELPERS ==================
-def extract_vars(text: str) -> list[str]:
-    if not text:
-        return []
-    return [m.group(1).strip() for m in VAR_PATTERN.finditer(text) if m.group(1).strip()]
-
-def looks_like_lightshot(url: str) -> bool:
-    if not url:
-        return False
-    u = url.strip().lower()
-    return ("prnt.sc/" in u) or ("prntscr.com" in u) or ("image.prntscr.com" in u)
-
-def fetch_lightshot_image(prnt_url: str):
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        page = requests.get(prnt_url, headers=headers, timeout=10)
-        if page.status_code != 200:
-            return None
-        match = re.search(r'property="og:image"\s+content="([^"]+)"', page.text)
-        if not match:
-            return None
-        image_url = match.group(1)
-        img = requests.get(image_url, headers=headers, timeout=10)
-        if img.status_code == 200 and img.headers.get("Content-Type", "").startswith("image/"):
-            return BytesIO(img.content)
-    except Exception:
-        return None
-    return None
-
-def strip_anchors(text: str) -> str:
-    if not text:
-        return text
-    text = ANCHOR_HTML.sub(r"\1", text)
-    text = ANCHOR_MD.sub(r"\1", text)
-    return text
-
-def safe_filename_from_category(cat: str) -> str:
-    cat = (cat or "image").strip()
-    cat = re.sub(r'[\\/:*?"<>|]', "_", cat)
-    cat = re.sub(r"\s+", " ", cat).strip()
-    base = cat[:60] if cat else "image"
-    return f"{base}.png"
-
-# ================== SLACK ==================
-def safe_chat_post(client: WebClient, channel_id: str, text: str):
-    try:
-        client.chat_postMessage(channel=channel_id, text=text)
-        return None
-    except SlackApiError as e:
-        return f"chat_postMessage: {e.response.get('error', str(e))}"
-    except Exception as e:
-        return f"chat_postMessage: {e}"
-
-def safe_upload_image_with_comment(client: WebClient, channel_id: str, bio: BytesIO, message: str, filename: str):
-    try:
-        bio.seek(0)
-        resp = client.files_upload_v2(
-            channel=channel_id,
-            file=bio,
-            filename=filename,
-            initial_comment=message
-        )
-        return resp, None
-    except SlackApiError as e:
-        return None, f"files_upload_v2: {e.response.get('error', str(e))}"
-    except Exception as e:
-        return None, f"files_upload_v2: {e}"
-
-# ================== LOGIN (2 USER) ==================
-if "logged" not in st.session_state:
-    st.session_state.logged = False
-if "user_key" not in st.session_state:
-    st.session_state.user_key = "Sinan"
-
-if not st.session_state.logged:
-    page_header("🔐 Giriş", "Parolanı gir.")
-
-
-    pw = st.text_input("Parola", type="password")
-
-    if st.button("Giriş", type="primary"):
-        pw1 = st.secrets.get("APP_PASSWORD", "")
-        pw2 = st.secrets.get("APP_PASSWORD_2", "")
-
-        if pw == pw1:
-            st.session_state.user_key = "Sinan"
-            st.session_state.logged = True
-            st.rerun()
-        elif pw2 and pw == pw2:
-            st.session_state.user_key = "Yağmur"
-            st.session_state.logged = True
-            st.rerun()
-        else:
-            st.error("Parola yanlış")
-
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.stop()
-
-# ================== STATE ==================
-if "link_cache" not in st.session_state:
-    st.session_state.link_cache = {}
-
-if "sending" not in st.session_state:
-    st.session_state.sending = False
-if "checking_links" not in st.session_state:
-    st.session_state.checking_links = False
-
-USER_KEY = st.session_state.get("user_key", "Sinan")
-IS_SINAN = (USER_KEY == "Sinan")
-
-# Slack token + channel seçimi (user token)
-if USER_KEY == "Yağmur":
-    token = st.secrets.get("SLACK_USER_TOKEN_2", "")
-    channel_id = st.secrets.get("SLACK_CHANNEL_ID_2", "")
-else:
-    token = st.secrets.get("SLACK_USER_TOKEN", "")
-    channel_id = st.secrets.get("SLACK_CHANNEL_ID", "")
-
-if not token:
-    st.error("Slack token secrets içinde yok.")
-    st.stop()
-if not channel_id:
-    st.error("SLACK_CHANNEL_ID secrets içinde yok.")
-    st.stop()
-
-client = WebClient(token=token)
-
-# Menü (rol bazlı)
-if IS_SINAN:
-    page = st.sidebar.radio("Menü", ["📤 Mesaj Gönder", "📜 Gönderim Logu", "⚙️ Ayarlar"])
-    st.sidebar.caption(f"👤 Aktif kullanıcı: {USER_KEY}")
-else:
-    page = "📤 Mesaj Gönder"
-    st.markdown(
-        """
-        <style>
-        [data-testid="stSidebar"] { display: none; }
-        [data-testid="stSidebarNav"] { display: none; }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
-# =================================================
-# 📜 GÖNDERİM LOGU — sadece Sinan
-# =================================================
-if page == "📜 Gönderim Logu":
-    if not IS_SINAN:
-        st.error("Bu sayfaya erişimin yok.")
-        st.stop()
-
-    page_header("📜 Gönderim Logu", "Seçtiğin tarihte kim ne göndermiş, tablo halinde.")
-
-
-    st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
-    selected_date = st.date_input("Tarih seç", value=TODAY)
-
-    rows_log = db_get_sent_rows_for_date(selected_date)
-    all_dates = db_get_log_dates_summary()
-
-    c1, c2, c3 = st.columns([2, 2, 6])
-    c1.metric("Toplam gün", len(all_dates))
-    c2.metric("Seçilen gün gönderilen", len(rows_log))
-    c3.markdown(
-        f'<span class="badge"><span class="badge-dot"></span> Global kilit: aynı satır aynı gün 1 kere</span>',
-        unsafe_allow_html=True
-    )
-
-    st.divider()
-
-    if not rows_log:
-        st.info("Bu tarih için kayıt yok.")
-    else:
-        df_log = pd.DataFrame(rows_log)
-        st.dataframe(df_log, width="stretch", hide_index=True)
-
-    st.divider()
-    with st.expander("Tüm günleri özetle"):
-        if all_dates:
-            df = pd.DataFrame([{"Tarih": str(d), "Adet": int(c)} for d, c in all_dates])
-            st.dataframe(df, width="stretch", hide_index=True)
-        else:
-            st.write("Log boş.")
-
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# =================================================
-# 📤 MESAJ GÖNDER
-# =================================================
-if page == "📤 Mesaj Gönder":
-    # Hero header (üstteki “container” hissini de modernleştirir)
-    st.markdown(f"""
-    <div class="block-card" style="padding:18px 18px;">
-      <div style="display:flex;justify-content:space-between;align-items:flex-start;gap:12px;flex-wrap:wrap;">
-        <div>
-          <div class="h-title" style="margin:0;">AksiyonKee</div>
-          <div class="sub" style="margin:6px 0 0 0;">📅 {DAYS_TR[TODAY.weekday()]} — {format_tr_date(TODAY)}</div>
-        </div>
-        <div style="display:flex;flex-direction:column;gap:8px;align-items:flex-end;">
-          <span class="badge"><span class="badge-dot"></span> Aktif kullanıcı: <b>{USER_KEY}</b></span>
-          <span class="badge" style="opacity:.95;"><span class="badge-dot" style="background:var(--brand2);"></span> Güvenlik Durumu: Aktif</span>
-        </div>
-      </div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    categories = db_get_categories()
-    variables = db_get_variables()
-    attachments = db_get_attachments(include_expired=False)
-
-    # ✅ Global gizleme: day_row_id bazlı
-    sent_ids_today = db_get_sent_day_row_ids_for_date(TODAY)
-
-    rows_today = db_get_day_rows(DAY_KEY)
-    visible_rows = [r for r in rows_today if int(r.get("id")) not in sent_ids_today]
-
-    if not visible_rows:
-        st.divider()
-        st.success("Bugün için gönderilecek yeni bir satır yok ✅")
-        st.stop()
-
-    row_ids_live = [int(r["id"]) for r in visible_rows]
-    templates_live = [str(r.get("text", "") or "") for r in visible_rows]
-    vars_today = sorted({v for t in templates_live for v in extract_vars(t)})
-
-    row_categories_live = []
-    for r in visible_rows:
-        c = str(r.get("category", DEFAULT_CATEGORY) or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-        if c not in categories:
-            c = DEFAULT_CATEGORY
-        row_categories_live.append(c)
-
-    table_key = f"table_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
-    templates_key = f"templates_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
-    vars_key = f"vars_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
-    rowids_key = f"rowids_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
-
-    # İlk kurulum
-    if table_key not in st.session_state:
-        df_dict = {
-            "Gönder": [True] * len(templates_live),
-            "Kategori": row_categories_live,
-            "Mesaj": templates_live,
-            "Ek Zorunlu": [bool(r.get("requires_attachment", False)) for r in visible_rows],
-            "Ek Seç": [SELECT_PLACEHOLDER if bool(r.get("requires_attachment", False)) else "" for r in visible_rows],
-            "Lightshot Link": [""] * len(templates_live),
-        }
-        for var in vars_today:
-            col = f"Var: {var}"
-            df_dict[col] = [SELECT_PLACEHOLDER if var in extract_vars(t) else "" for t in templates_live]
-
-        st.session_state[table_key] = pd.DataFrame(df_dict)
-        st.session_state[templates_key] = templates_live
-        st.session_state[vars_key] = vars_today
-        st.session_state[rowids_key] = row_ids_live
-
-    # Başka kullanıcı gönderim yaptıysa tabloyu prune et
-    current_rowids = st.session_state.get(rowids_key, [])
-    live_set = set(row_ids_live)
-    if set(current_rowids) != live_set:
-        df_old = st.session_state[table_key].copy()
-        old_ids = list(current_rowids)
-
-        keep_idx = [i for i, rid in enumerate(old_ids) if rid in live_set]
-        df_new = df_old.iloc[keep_idx].reset_index(drop=True)
-        new_ids = [old_ids[i] for i in keep_idx]
-
-        # live template eşlemesi
-        new_templates = []
-        for rid in new_ids:
-            j = row_ids_live.index(rid)
-            new_templates.append(templates_live[j])
-
-        st.session_state[table_key] = df_new
-        st.session_state[templates_key] = new_templates
-        st.session_state[rowids_key] = new_ids
-        st.caption("ℹ️ Liste güncellendi (başka kullanıcı gönderim yaptı).")
-        st.rerun()
-
-    # Kontrol butonları
-    b1, b2, b3, _ = st.columns([1.2, 1.8, 2.2, 5.0])
-    if b1.button("✅ Tümünü Seç", disabled=st.session_state.sending or st.session_state.checking_links):
-        st.session_state[table_key]["Gönder"] = True
-        st.rerun()
-
-    if b2.button("⛔ Tüm Seçimi Kaldır", disabled=st.session_state.sending or st.session_state.checking_links):
-        st.session_state[table_key]["Gönder"] = False
-        st.rerun()
-
-    do_check = b3.button("🔎 Linkleri Kontrol Et", disabled=st.session_state.sending or st.session_state.checking_links)
-
-    st.markdown('<div class="small-muted">Not: Aynı satır aynı gün yalnızca 1 kere gönderilir (DB atomik kilit).</div>', unsafe_allow_html=True)
-
-    df_in = st.session_state[table_key].copy()
-    templates = st.session_state[templates_key]
-    vars_today = st.session_state[vars_key]
-    row_ids = st.session_state[rowids_key]
-
-    column_config = {
-        "Gönder": st.column_config.CheckboxColumn("Gönder"),
-        "Kategori": st.column_config.SelectboxColumn("Kategori", options=categories),
-        "Mesaj": st.column_config.TextColumn("Mesaj"),
-        "Ek Zorunlu": st.column_config.CheckboxColumn("Ek Zorunlu", disabled=True),
-        "Ek Seç": st.column_config.SelectboxColumn(
-            "Ek Seç",
-            options=[SELECT_PLACEHOLDER, MANUAL_OPTION] + sorted(list(attachments.keys()))
-        ),
-        "Lightshot Link": st.column_config.TextColumn("Lightshot Link"),
-    }
-
-    for var in vars_today:
-        vdef = variables.get(var, {})
-        opts = vdef.get("options", []) if isinstance(vdef, dict) else []
-        column_config[f"Var: {var}"] = st.column_config.SelectboxColumn(
-            var,
-            options=[SELECT_PLACEHOLDER] + (opts or [])
-        )
-
-    df_out = st.data_editor(
-        df_in,
-        width="stretch",
-        hide_index=True,
-        key=f"editor_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}",
-        column_config=column_config,
-        disabled=["Ek Zorunlu"],
-    )
-
-    # Minimal normalize (kullanıcının girişini gereksiz silmiyoruz)
-    cleaned = False
-    for idx in range(len(df_out)):
-        req = bool(df_out.at[idx, "Ek Zorunlu"])
-        row_cat = str(df_out.at[idx, "Kategori"] or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-        if row_cat not in categories:
-            df_out.at[idx, "Kategori"] = DEFAULT_CATEGORY
-            cleaned = True
-
-        if not req:
-            if str(df_out.at[idx, "Ek Seç"]).strip() not in ("", "None"):
-                df_out.at[idx, "Ek Seç"] = ""
-                cleaned = True
-            if str(df_out.at[idx, "Lightshot Link"]).strip():
-                df_out.at[idx, "Lightshot Link"] = ""
-                cleaned = True
-
-    if cleaned:
-        st.session_state[table_key] = df_out
-        st.rerun()
-
-    st.session_state[table_key] = df_out
-
-    # ============== LINK CHECK ==============
-    if do_check and not st.session_state.checking_links:
-        st.session_state.checking_links = True
-        st.rerun()
-
-    if st.session_state.checking_links:
-        try:
-            results = []
-            df_check = df_out.reset_index(drop=True)
-            for i in range(len(df_check)):
-                row = df_check.loc[i]
-                if not bool(row["Gönder"]) or not bool(row["Ek Zorunlu"]):
-                    continue
-
-                row_cat = str(row.get("Kategori") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-                ek_sec = str(row.get("Ek Seç", "")).strip()
-                link = str(row.get("Lightshot Link", "")).strip()
-
-                if ek_sec in ("", SELECT_PLACEHOLDER, "None"):
-                    results.append({"Satır": i + 1, "Sonuç": "❗ Ek seçilmedi"})
-                    continue
-
-                if ek_sec != MANUAL_OPTION:
-                    preset = attachments.get(ek_sec)
-                    if not isinstance(preset, dict):
-                        results.append({"Satır": i + 1, "Sonuç": "❗ Preset yok"})
-                        continue
-                    if str(preset.get("category", DEFAULT_CATEGORY)).strip() != row_cat:
-                        results.append({"Satır": i + 1, "Sonuç": "❗ Preset kategori uyumsuz"})
-                        continue
-                    link = str(preset.get("url", "") or "").strip()
-
-                if not link:
-                    results.append({"Satır": i + 1, "Sonuç": "❗ Link yok"})
-                    continue
-
-                if not looks_like_lightshot(link):
-                    results.append({"Satır": i + 1, "Sonuç": "❗ Link prnt.sc değil"})
-                    continue
-
-                ok = st.session_state.link_cache.get(link)
-                if ok is None:
-                    ok = fetch_lightshot_image(link) is not None
-                    st.session_state.link_cache[link] = ok
-                results.append({"Satır": i + 1, "Sonuç": "✅ OK" if ok else "❌ Görsel alınamadı"})
-
-            if results:
-                df_res = pd.DataFrame(results)
-                bad = df_res["Sonuç"].str.startswith("❌") | df_res["Sonuç"].str.startswith("❗")
-                st.error("Link kontrolünde sorun var:") if bad.any() else st.success("Link kontrolü OK ✅")
-                st.dataframe(df_res, width="stretch", hide_index=True)
-            else:
-                st.info("Kontrol edilecek ek yok.")
-        finally:
-            st.session_state.checking_links = False
-
-    st.divider()
-
-    # ============== SEND (BUTTON LOCK + ATOMİK KİLİT) ==============
-    send_click = st.button(
-        "Slack’e Gönder",
-        type="primary",
-        disabled=st.session_state.sending or st.session_state.checking_links,
-    )
-
-    if send_click and not st.session_state.sending:
-        st.session_state.sending = True
-        st.rerun()
-
-    if st.session_state.sending:
-        try:
-            errors = []
-            send_items = []
-
-            df_send = df_out.reset_index(drop=True)
-
-            for i in range(len(df_send)):
-                row = df_send.loc[i]
-                if not bool(row["Gönder"]):
-                    continue
-
-                day_row_id = int(row_ids[i])
-                template = templates[i]
-                message = str(row["Mesaj"]).strip()
-                req = bool(row["Ek Zorunlu"])
-
-                row_cat = str(row.get("Kategori") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-                if row_cat not in categories:
-                    row_cat = DEFAULT_CATEGORY
-
-                message = strip_anchors(message)
-
-                # değişken replace + validate
-                row_vars = extract_vars(template)
-                bad_row = False
-                for v in row_vars:
-                    vdef = variables.get(v, {})
-                    vcat = str((vdef.get("category") if isinstance(vdef, dict) else DEFAULT_CATEGORY) or DEFAULT_CATEGORY).strip()
-                    if vcat != row_cat:
-                        errors.append(f"- Değişken kategori uyumsuz ({v}/{vcat}) satır:{row_cat} → {template}")
-                        bad_row = True
-                        break
-
-                    col = f"Var: {v}"
-                    sel = str(row.get(col, "")).strip()
-                    if sel in ("", SELECT_PLACEHOLDER, "None"):
-                        errors.append(f"- {v} seçilmedi: {template}")
-                        bad_row = True
-                        break
-
-                    message = message.replace(f"{{{{{v}}}}}", sel)
-
-                if bad_row:
-                    continue
-
-                fetched_img = None
-                if req:
-                    ek_sec = str(row.get("Ek Seç", "")).strip()
-                    link = str(row.get("Lightshot Link", "")).strip()
-
-                    if ek_sec in ("", SELECT_PLACEHOLDER, "None"):
-                        errors.append(f"- Ek seçilmedi: {template}")
-                        continue
-
-                    if ek_sec != MANUAL_OPTION:
-                        preset = attachments.get(ek_sec)
-                        if not isinstance(preset, dict):
-                            errors.append(f"- Preset bulunamadı: {template}")
-                            continue
-                        preset_cat = str(preset.get("category", DEFAULT_CATEGORY)).strip()
-                        if preset_cat != row_cat:
-                            errors.append(f"- Preset kategori uyumsuz ({ek_sec}/{preset_cat}) satır:{row_cat} → {template}")
-                            continue
-                        link = str(preset.get("url", "") or "").strip()
-
-                    if not link:
-                        errors.append(f"- Ek zorunlu ama link yok: {template}")
-                        continue
-                    if not looks_like_lightshot(link):
-                        errors.append(f"- Link prnt.sc değil: {template}")
-                        continue
-
-                    fetched_img = fetch_lightshot_image(link)
-                    st.session_state.link_cache[link] = (fetched_img is not None)
-                    if fetched_img is None:
-                        errors.append(f"- Görsel alınamadı: {template}")
-                        continue
-
-                if not message:
-                    errors.append(f"- Mesaj boş: {template}")
-                    continue
-
-                send_items.append((day_row_id, template, message, fetched_img, row_cat))
-
-            if errors:
-                st.session_state.sending = False
-                st.error("Gönderim durduruldu. Hatalar:")
-                for e in errors[:160]:
-                    st.write(e)
-                st.stop()
-
-            if not send_items:
-                st.session_state.sending = False
-                st.warning("Gönderilecek içerik yok.")
-                st.stop()
-
-            slack_errors = []
-            sent_count = 0
-            skipped_locked = 0
-
-            prog = st.progress(0.0)
-            status = st.empty()
-
-            for idx, (day_row_id, template, message, fetched_img, row_cat) in enumerate(send_items, start=1):
-                # 🔒 Atomik kilit: tam çakışma engeli
-                reserved = db_try_reserve_send(TODAY, day_row_id, template, USER_KEY)
-                if not reserved:
-                    skipped_locked += 1
-                    prog.progress(idx / max(1, len(send_items)))
-                    continue
-
-                status.info(f"Gönderiliyor… ({idx}/{len(send_items)})")
-
-                if fetched_img is not None:
-                    filename = safe_filename_from_category(row_cat)
-                    resp, err = safe_upload_image_with_comment(client, channel_id, fetched_img, message=message, filename=filename)
-                    if err:
-                        db_unreserve_send(TODAY, day_row_id)
-                        slack_errors.append(f"- {template}: {err}")
-                        prog.progress(idx / max(1, len(send_items)))
-                        continue
-                    time.sleep(0.35)
-                else:
-                    err = safe_chat_post(client, channel_id, message)
-                    if err:
-                        db_unreserve_send(TODAY, day_row_id)
-                        slack_errors.append(f"- {template}: {err}")
-                        prog.progress(idx / max(1, len(send_items)))
-                        continue
-                    time.sleep(0.20)
-
-                sent_count += 1
-                prog.progress(idx / max(1, len(send_items)))
-
-            status.empty()
-
-            if slack_errors:
-                st.session_state.sending = False
-                st.error("Bazı içerikler gönderilemedi:")
-                for e in slack_errors[:100]:
-                    st.write(e)
-                st.stop()
-
-            # UI temizle + tekrar göndermesin
-            for k in [table_key, templates_key, vars_key, rowids_key]:
-                st.session_state.pop(k, None)
-
-            st.success(f"Slack’e gönderildi ✅ | Gönderilen: {sent_count} | Kilitli olduğu için atlanan: {skipped_locked}")
-            st.session_state.sending = False
-            st.rerun()
-
-        finally:
-            st.session_state.sending = False
-
-# =================================================
-# ⚙️ AYARLAR — sadece Sinan (canlı sıralama, kaydette DB)
-# =================================================
-if page == "⚙️ Ayarlar":
-    if not IS_SINAN:
-        st.error("Bu sayfaya erişimin yok.")
-        st.stop()
-
-    page_header("⚙️ Ayarlar", "Kategoriler, günlük satırlar, değişkenler ve ek presetleri.")
-
-    st.divider()
-
-    categories = db_get_categories()
-    variables = db_get_variables()
-    attachments_all = db_get_attachments(include_expired=True)
-
-    # -------- Kategoriler --------
-    st.subheader("Kategoriler")
-    c1, c2 = st.columns([2, 5])
-    new_cat = c1.text_input("Yeni kategori adı", placeholder="Kampanya", key="cat_new_name")
-    if c2.button("➕ Kategori Ekle"):
-        name = (new_cat or "").strip()
-        if not name:
-            st.warning("Kategori adı boş olamaz.")
-        else:
-            db_add_category(name)
-            st.success("Kategori eklendi ✅")
-            st.rerun()
-
-    st.write("Mevcut kategoriler:")
-    for cat in categories:
-        colA, colB = st.columns([6, 1])
-        colA.write(f"- **{cat}**")
-        disabled = (cat == DEFAULT_CATEGORY) or (len(categories) == 1)
-        if colB.button("🗑️", key=f"del_cat_{cat}", disabled=disabled):
-            db_delete_category(cat)
-            st.success("Kategori silindi, bağlı içerikler Genel’e taşındı ✅")
-            st.rerun()
-
-    st.divider()
-
-    # -------- Günlük Satırlar (CANLI SIRALA + KAYDETTE DB) --------
-    st.subheader("Günlük Satırlar (Sıra + Düzenle)")
-    selected_day_index = st.selectbox(
-        "Hangi günün satırlarını düzenliyorsun?",
-        options=list(range(7)),
-        format_func=lambda i: DAYS_TR[i],
-        index=TODAY.weekday(),
-        key="settings_day_select",
-    )
-    selected_day_key = DAY_KEYS[selected_day_index]
-
-    buffer_key = f"day_rows_buffer_{selected_day_key}"
-    prev_day_key = st.session_state.get("prev_settings_day_key")
-    if prev_day_key != selected_day_key:
-        if prev_day_key:
-            st.session_state.pop(f"day_rows_buffer_{prev_day_key}", None)
-        st.session_state["prev_settings_day_key"] = selected_day_key
-
-    if buffer_key not in st.session_state:
-        rows_db = db_get_day_rows(selected_day_key)
-        st.session_state[buffer_key] = [
-            {
-                "rid": int(r["id"]),
-                "text": str(r.get("text", "") or ""),
-                "category": str(r.get("category", DEFAULT_CATEGORY) or DEFAULT_CATEGORY),
-                "requires_attachment": bool(r.get("requires_attachment", False)),
-            }
-            for r in rows_db
-        ]
-
-    rows = st.session_state[buffer_key]
-    st.markdown('<div class="small-muted">⬆️⬇️ ile sırala, alanları düzenle. DB’ye sadece “Kaydet” ile yazılır.</div>', unsafe_allow_html=True)
-
-    for i, row in enumerate(rows):
-        rid = row["rid"]
-        c_up, c_down, c_text, c_cat, c_req = st.columns([0.6, 0.6, 6, 2, 1])
-
-        up_clicked = c_up.button("⬆️", key=f"up_{selected_day_key}_{rid}", disabled=(i == 0))
-        down_clicked = c_down.button("⬇️", key=f"down_{selected_day_key}_{rid}", disabled=(i == len(rows) - 1))
-
-        if up_clicked and i > 0:
-            rows[i - 1], rows[i] = rows[i], rows[i - 1]
-        if down_clicked and i < len(rows) - 1:
-            rows[i + 1], rows[i] = rows[i], rows[i + 1]
-
-        row["text"] = c_text.text_input(
-            "Metin",
-            value=row["text"],
-            key=f"text_{selected_day_key}_{rid}",
-            label_visibility="collapsed",
-        )
-
-        current_cat = str(row.get("category") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-        if current_cat not in categories:
-            current_cat = DEFAULT_CATEGORY
-
-        row["category"] = c_cat.selectbox(
-            "Kategori",
-            options=categories,
-            index=categories.index(current_cat) if current_cat in categories else 0,
-            key=f"cat_{selected_day_key}_{rid}",
-            label_visibility="collapsed",
-        )
-
-        row["requires_attachment"] = c_req.checkbox(
-            "Ek",
-            value=bool(row.get("requires_attachment", False)),
-            key=f"req_{selected_day_key}_{rid}",
-            label_visibility="collapsed",
-        )
-
-    st.session_state[buffer_key] = rows
-
-    csave, _ = st.columns([2, 6])
-    if csave.button("💾 Günlük satırları kaydet", type="primary"):
-        cleaned_rows = []
-        for r in st.session_state[buffer_key]:
-            t = str(r.get("text", "")).strip()
-            if not t:
-                continue
-            cat = str(r.get("category") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
-            if cat not in categories:
-                cat = DEFAULT_CATEGORY
-            cleaned_rows.append({
-                "text": t,
-                "category": cat,
-                "requires_attachment": bool(r.get("requires_attachment", False)),
-            })
-
-        db_replace_day_rows(selected_day_key, cleaned_rows)
-        st.session_state.pop(buffer_key, None)
-        st.success("Kaydedildi ✅")
-        st.rerun()
-
-    st.divider()
-
-    # -------- Yeni Satır Ekle --------
-    st.subheader("Yeni Satır Ekle")
-    new_text = st.text_input(
-        "Mesaj",
-        placeholder="Örn: Bugünün Ana Kampanyası {{Kampanya}} Kampanyası Aktif Edildi.",
-        key="new_row_text",
-    )
-    new_cat2 = st.selectbox("Kategori", options=categories, index=0, key="new_row_cat")
-    new_req = st.checkbox("Bu satırda ek zorunlu olsun", value=False, key="new_row_req")
-
-    if st.button("➕ Satırı Ekle"):
-        t = (new_text or "").strip()
-        if not t:
-            st.warning("Mesaj boş olamaz.")
-        else:
-            db_add_day_row(selected_day_key, t, new_cat2, bool(new_req))
-            st.session_state.pop(buffer_key, None)
-            st.success("Satır eklendi ✅")
-            st.rerun()
-
-    st.caption("İpucu: Değişken placeholder `{{Kampanya}}` gibi. Değişken kategorisi satır kategorisiyle aynı olmalı.")
-    st.divider()
-
-    # -------- Değişkenler --------
-    st.subheader("Değişkenler")
-    existing_vars = sorted(list(variables.keys()))
-    pick = st.selectbox("Düzenlemek için mevcut değişken (opsiyonel)", options=["(Yeni)"] + existing_vars, key="var_pick")
-
-    if pick != "(Yeni)":
-        vdef = variables.get(pick, {})
-        default_name = pick
-        default_cat = vdef.get("category", DEFAULT_CATEGORY) if isinstance(vdef, dict) else DEFAULT_CATEGORY
-        default_opts = "\n".join(vdef.get("options", [])) if isinstance(vdef, dict) else ""
-    else:
-        default_name, default_cat, default_opts = "", DEFAULT_CATEGORY, ""
-
-    v1, v2, v3 = st.columns([2, 2, 5])
-    var_name = v1.text_input("Değişken Adı", value=default_name, placeholder="Kampanya", key="var_name")
-    var_cat = v2.selectbox("Kategori", options=categories, index=categories.index(default_cat) if default_cat in categories else 0, key="var_cat")
-    var_opts = v3.text_area("Seçenekler (satır satır)", value=default_opts, height=120, key="var_opts")
-
-    bA, bB, _ = st.columns([2, 2, 6])
-    if bA.button("💾 Kaydet / Güncelle", key="var_save", type="primary"):
-        name = (var_name or "").strip()
-        if not name:
-            st.error("Değişken adı boş olamaz.")
-        else:
-            options = [x.strip() for x in (var_opts or "").splitlines() if x.strip()]
-            db_upsert_variable(name, var_cat, options)
-            st.success(f"Kaydedildi: {name} ✅")
-            st.rerun()
-
-    if bB.button("🗑️ Sil", disabled=(pick == "(Yeni)"), key="var_del"):
-        db_delete_variable(pick)
-        st.success("Silindi ✅")
-        st.rerun()
-
-    st.divider()
-
-    # -------- Ek Presetleri --------
-    st.subheader("Ek Presetleri (Lightshot URL)")
-    existing_atts = sorted(list(attachments_all.keys()))
-    apick = st.selectbox("Düzenlemek için preset (opsiyonel)", options=["(Yeni)"] + existing_atts, key="att_pick")
-
-    if apick != "(Yeni)":
-        adef = attachments_all.get(apick, {})
-        default_att_name = apick
-        default_att_cat = adef.get("category", DEFAULT_CATEGORY) if isinstance(adef, dict) else DEFAULT_CATEGORY
-        default_att_url = adef.get("url", "") if isinstance(adef, dict) else ""
-    else:
-        default_att_name, default_att_cat, default_att_url = "", DEFAULT_CATEGORY, ""
-
-    a1, a2, a3 = st.columns([2, 2, 5])
-    att_name = a1.text_input("Ek Adı", value=default_att_name, placeholder="16 Aralık Limitli", key="att_name")
-    att_cat = a2.selectbox("Kategori", options=categories, index=categories.index(default_att_cat) if default_att_cat in categories else 0, key="att_cat")
-    att_url = a3.text_input("Lightshot / prnt.sc URL", value=default_att_url, placeholder="https://prnt.sc/xxxxxxx", key="att_url")
-
-    inferred_date = extract_tr_date_from_name((att_name or "").strip())
-    if inferred_date:
-        st.caption(f"🗓️ Tarih algılandı: {format_tr_date(inferred_date)} (bu tarihten önce otomatik gizlenir)")
-
-    xA, xB, _ = st.columns([2, 2, 6])
-    if xA.button("💾 Kaydet / Güncelle", key="att_save", type="primary"):
-        n = (att_name or "").strip()
-        u = (att_url or "").strip()
-        if not n or not u:
-            st.error("Ek adı ve URL zorunlu.")
-        else:
-            vdate = extract_tr_date_from_name(n)
-            db_upsert_attachment(n, att_cat, u, vdate)
-            st.success("Eklendi/Güncellendi ✅")
-            st.rerun()
-
-    if xB.button("🗑️ Sil", disabled=(apick == "(Yeni)"), key="att_del"):
-        db_delete_attachment(apick)
-        st.success("Silindi ✅")
-        st.rerun()
-
-    st.markdown('</div>', unsafe_allow_html=True)
-
-
-
-
-
-
-
-
-
+# app.py
+# ============================================================
+# DB şeması: slack_panel/migrations.py (açılışta otomatik uygulanır, elle:
+#   python -m slack_panel.migrations)
+# ============================================================
+
+import streamlit as st
+from datetime import date, timedelta
+import pandas as pd
+import copy
+
+from slack_panel.bundle import (
+    FORMATS as BUNDLE_FORMATS, FORMAT_EXT as BUNDLE_FORMAT_EXT, FORMAT_MIME as BUNDLE_FORMAT_MIME, BundleError,
+    bundle_summary, detect_format, export_file, import_bundle, parse_bundle, validate_bundle,
+)
+from slack_panel.config import OPERATOR_SECRET_PREFIXES, get_secret, is_operator_secret
+from slack_panel.db import (
+    db_get_categories, db_get_category_ids, db_add_category, db_rename_category, db_delete_category,
+    db_get_day_rows, db_update_day_rows, db_add_day_row,
+    db_get_variables, db_upsert_variable, db_delete_variable,
+    db_get_attachments, db_upsert_attachment, db_delete_attachment,
+    db_get_category_channels, db_set_category_channels,
+    db_get_sent_channels_for_date, db_get_sent_rows_for_date, db_get_log_dates_summary, db_get_archived_summary_for_date,
+    db_count_retrying, db_get_last_selections, db_get_send_metrics, db_upsert_operator, db_delete_operator,
+    ROW_CLAIM_SECONDS, db_sync_row_claims,
+)
+from slack_panel.day_rows import (
+    COL_AUTO, COL_CATEGORY, COL_CHANNELS, COL_DEFAULT_ATT, COL_DELETE, COL_ORDER, COL_REQ, COL_TEXT, GRID_COLUMNS,
+    arrange, day_rows_frame, diff_day_rows, filter_rows,
+)
+from slack_panel.helpers import (
+    DAY_KEYS, DAYS_TR, SELECT_PLACEHOLDER, MANUAL_OPTION, DEFAULT_CATEGORY, DEFAULT_CATEGORY_ID,
+    extract_tr_date_from_name, format_tr_date, extract_vars, looks_like_lightshot,
+    parse_channels, is_unselected,
+)
+from slack_panel.aio import ProgressFeed, cached_urls, submit as aio_submit, submit_prefetch
+from slack_panel.archive import DEFAULT_MAINTENANCE_AT, MaintenanceWorker
+from slack_panel.migrations import ensure_schema
+from slack_panel import offline
+from slack_panel.options import LARGE_OPTION_THRESHOLD, is_large, search_options
+from slack_panel.retry import RetryWorker
+from slack_panel.operators import ROLES, get_registry
+from slack_panel.render import render_cached
+from slack_panel.preset_health import DEFAULT_PRESET_CHECK_MINUTES, PRESET_OK, PresetHealthWorker, broken_label, check_presets, is_broken
+from slack_panel.warmup import DEFAULT_WARMUP_AT, WarmupWorker
+from slack_panel.validation import changed_row_indices, config_fingerprint, is_ok_status, refresh_link_status, validate_row
+from slack_panel.sender import (
+    SENT, LOCKED, RETRYING, attachment_link, build_send_item, plan_sends, resolve_channels,
+    row_fully_sent, send_units_async,
+)
+
+
+st.set_page_config(page_title="SinanKee", layout="wide", initial_sidebar_state="collapsed")
+
+# ================== MODERN THEME (CSS) ==================
+MODERN_CSS = """
+<style>
+:root{
+  --bg0:#070a12; --bg1:#0b1220; --card:#0b1220;
+  --stroke:rgba(255,255,255,.08); --stroke2:rgba(255,255,255,.12);
+  --text:rgba(255,255,255,.92); --muted:rgba(255,255,255,.62);
+  --brand:#22c55e; --brand2:#06b6d4; --warn:#f59e0b; --bad:#ef4444;
+  --radius:14px;
+}
+
+/* Arkaplan */
+html, body, [data-testid="stAppViewContainer"]{
+  background:
+    radial-gradient(1100px 800px at 18% 0%, rgba(34,197,94,.09), transparent 55%),
+    radial-gradient(1000px 700px at 85% 20%, rgba(6,182,212,.10), transparent 58%),
+    linear-gradient(180deg, var(--bg0), var(--bg1));
+  color: var(--text) !important;
+}
+
+/* Üst boşluk / header inceltme (üstteki dev “container” hissini bitirir) */
+.main .block-container{
+  padding-top: 1.0rem !important;
+  padding-bottom: 2.0rem !important;
+}
+[data-testid="stHeader"]{
+  background: transparent !important;
+  height: 46px !important;
+}
+[data-testid="stToolbar"]{
+  opacity:.75;
+  top: 0.25rem !important;
+}
+
+/* Kart stili */
+.block-card{
+  background: linear-gradient(180deg, rgba(255,255,255,.05), rgba(255,255,255,.02));
+  border: 1px solid var(--stroke);
+  border-radius: var(--radius);
+  padding: 16px 16px;
+  box-shadow: 0 14px 40px rgba(0,0,0,.32);
+}
+.block-card:first-of-type{ margin-top: .25rem !important; }
+
+.kicker{ color: var(--muted); font-size: 13px; }
+.h-title{ font-size: 28px; font-weight: 780; letter-spacing: .2px; margin: 0 0 6px 0; }
+.sub{ color: var(--muted); margin: 0; }
+
+.badge{
+  display:inline-flex; gap:8px; align-items:center;
+  border:1px solid var(--stroke);
+  border-radius: 999px;
+  padding: 6px 10px;
+  background: rgba(255,255,255,.03);
+  color: var(--muted);
+  font-size: 12px;
+}
+.badge-dot{ width:8px; height:8px; border-radius:999px; background: var(--brand); }
+.small-muted{ color: var(--muted); font-size: 12px; }
+
+/* DataFrame/Data editor */
+[data-testid="stDataFrame"], [data-testid="stTable"]{
+  border: 1px solid var(--stroke) !important;
+  border-radius: var(--radius) !important;
+  overflow: hidden !important;
+}
+
+/* Expander */
+[data-testid="stExpander"]{
+  border: 1px solid var(--stroke) !important;
+  border-radius: var(--radius) !important;
+  background: rgba(255,255,255,.02) !important;
+}
+
+/* Butonlar */
+button[kind="primary"]{
+  border-radius: 12px !important;
+  border: 1px solid rgba(34,197,94,.35) !important;
+  background: linear-gradient(90deg, rgba(34,197,94,.20), rgba(6,182,212,.18)) !important;
+}
+button[kind="secondary"], button{
+  border-radius: 12px !important;
+}
+
+/* Input/textarea */
+input, textarea{
+  border-radius: 12px !important;
+}
+
+/* Divider */
+hr{ border-color: var(--stroke) !important; }
+
+/* “Ghost bar” gibi görünen input container’larını sakinleştir */
+div[data-testid="stTextInput"]{ margin-top: 0.25rem !important; }
+div[data-testid="stTextInput"] input:placeholder-shown{
+  background: rgba(255,255,255,.02) !important;
+}
+</style>
+"""
+st.markdown(MODERN_CSS, unsafe_allow_html=True)
+
+def page_header(title: str, subtitle: str = "", right_html: str = ""):
+    st.markdown(
+        f"""
+        <div class="block-card" style="padding:18px 18px;">
+          <div style="display:flex;justify-content:space-between;align-items:flex-start;gap:12px;flex-wrap:wrap;">
+            <div>
+              <div class="h-title" style="margin:0;">{title}</div>
+              <div class="sub" style="margin:6px 0 0 0;">{subtitle}</div>
+            </div>
+            {right_html}
+          </div>
+        </div>
+        <div style="height:12px;"></div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+# ================== CONSTANTS ==================
+DAY_ROWS_PAGE_SIZES = [25, 50, 100, 200]
+PROGRESS_POLL_SECONDS = 0.5  # gönderim / link kontrolü ilerleme fragment'lerinin run_every aralığı
+LOG_REFRESH_SECONDS = 30  # Gönderim Logu tablosu kendi kendine tazelenir (sayfanın geri kalanı çalışmaz)
+
+TODAY = date.today()
+TODAY_KEY = TODAY.isoformat()
+
+DAY_KEY = DAY_KEYS[TODAY.weekday()]
+
+# ================== DB ==================
+if not get_secret("DATABASE_URL"):
+    st.error("DATABASE_URL secrets içinde yok.")
+    st.stop()
+
+@st.cache_resource
+def get_schema_problems():
+    # Süreç başına bir kere: bekleyen migration'lar + sık sorguların index kontrolü (EXPLAIN)
+    return ensure_schema()
+
+try:
+    schema_problems = [] if offline.is_offline() else get_schema_problems()
+except Exception as e:
+    # DB ulaşılamıyor ama daha önce alınmış konfigürasyon kopyası varsa panel çevrimdışı açılır
+    if not (offline.is_connection_error(e) and offline.load_snapshot("categories")[0]):
+        st.error(f"DB migration başarısız: {e}")
+        st.stop()
+    offline.mark_offline(e)
+    schema_problems = []
+
+@st.cache_resource
+def get_sync_worker():
+    # Çevrimdışıyken kuyruğa alınan yazmalar ve yerel gönderim kilitleri DB gelince işlenir
+    worker = offline.SyncWorker()
+    worker.start()
+    return worker
+
+get_sync_worker()
+
+@st.cache_resource
+def get_warmup_worker():
+    # Süreç açılışında (giriş ekranında) + her gün WARMUP_AT'te günün planı ve preset görselleri ısınır
+    worker = WarmupWorker(at=get_secret("WARMUP_AT", DEFAULT_WARMUP_AT))
+    worker.start()
+    return worker
+
+get_warmup_worker()
+
+@st.cache_resource
+def get_maintenance_worker():
+    # sent_log partition'ları + saklama süresi dolan ayların arşivlenmesi (günde bir)
+    worker = MaintenanceWorker(at=get_secret("MAINTENANCE_AT", DEFAULT_MAINTENANCE_AT))
+    worker.start()
+    return worker
+
+get_maintenance_worker()
+
+@st.cache_resource
+def get_preset_health_worker():
+    # Aktif preset linkleri arka planda düzenli doğrulanır; bozuklar Gönder sayfasında baştan görünür
+    worker = PresetHealthWorker(minutes=float(get_secret("PRESET_CHECK_MINUTES", DEFAULT_PRESET_CHECK_MINUTES)))
+    worker.start()
+    return worker
+
+get_preset_health_worker()
+
+
+# ================== LOGIN (operatör kaydı) ==================
+registry = get_registry()
+if not len(registry):
+    st.error("Aktif operatör yok (operators tablosu boş).")
+    st.stop()
+
+if "logged" not in st.session_state:
+    st.session_state.logged = False
+if "user_key" not in st.session_state:
+    st.session_state.user_key = ""
+
+if st.session_state.logged and registry.get(st.session_state.user_key) is None:
+    # Operatör silindi / pasife alındı
+    st.session_state.logged = False
+
+if not st.session_state.logged:
+    page_header("🔐 Giriş", "Parolanı gir.")
+
+
+    pw = st.text_input("Parola", type="password")
+
+    if st.button("Giriş", type="primary"):
+        user_key = registry.authenticate(pw)
+        if user_key:
+            st.session_state.user_key = user_key
+            st.session_state.logged = True
+            st.rerun()
+        else:
+            st.error("Parola yanlış")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.stop()
+
+# ================== STATE ==================
+if "link_cache" not in st.session_state:
+    st.session_state.link_cache = {}
+# Warm-up'ın indirdiği görseller kontrol edilmiş sayılır
+for _url in cached_urls():
+    st.session_state.link_cache.setdefault(_url, True)
+
+# Gönderim işi (send_job) aio loop'unda sürerken sayfa yeniden çalışsa da editör ve butonlar kilitli kalır
+st.session_state.sending = "send_job" in st.session_state
+
+USER_KEY = st.session_state.user_key
+IS_ADMIN = registry.is_admin(USER_KEY)
+OPERATOR = registry.get(USER_KEY)
+
+# Slack client (token başına havuzdan) + varsayılan kanallar
+client = registry.client(USER_KEY)
+channel_id = registry.default_channels(USER_KEY)
+
+if client is None:
+    st.error(f"Slack token secrets içinde yok ({OPERATOR['token_secret']}).")
+    st.stop()
+if not channel_id:
+    st.error(f"{USER_KEY} için varsayılan kanal yok ({OPERATOR['channel_secret'] or 'operatör kanalları'}).")
+    st.stop()
+
+@st.cache_resource
+def get_retry_worker():
+    # Süreç başına tek arka plan retry thread'i (yarım kalan rezervasyonların reconcile'ı da burada)
+    worker = RetryWorker()
+    worker.start()
+    return worker
+
+for _key, _client in registry.clients().items():
+    get_retry_worker().register_client(_key, _client)
+
+# Menü (rol bazlı)
+if IS_ADMIN:
+    page = st.sidebar.radio("Menü", ["📤 Mesaj Gönder", "📜 Gönderim Logu", "⚙️ Ayarlar"])
+    st.sidebar.caption(f"👤 Aktif kullanıcı: {USER_KEY}")
+    if schema_problems:
+        st.sidebar.warning("⚠️ Index kontrolü:\n\n" + "\n\n".join(schema_problems))
+else:
+    page = "📤 Mesaj Gönder"
+    st.markdown(
+        """
+        <style>
+        [data-testid="stSidebar"] { display: none; }
+        [data-testid="stSidebarNav"] { display: none; }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+_pending = offline.pending_counts()
+if offline.is_offline():
+    st.warning(
+        "📴 Veritabanına ulaşılamıyor — son kayıtlı ayarlarla çalışılıyor. Ayar değişiklikleri ve gönderimler "
+        f"yerelde tutuluyor (bekleyen: {_pending['writes']} değişiklik, {_pending['reservations']} gönderim)."
+    )
+elif _pending["writes"] or _pending["reservations"]:
+    st.info(f"🔄 Çevrimdışı kuyruk işleniyor: {_pending['writes']} değişiklik, {_pending['reservations']} gönderim.")
+if _pending["conflicts"] and IS_ADMIN:
+    with st.sidebar.expander(f"⚠️ Çevrimdışı çakışma ({_pending['conflicts']})"):
+        st.caption("Çevrimdışıyken gönderilen ama DB'de başkasının da gönderdiği / kilitlediği satırlar.")
+        st.dataframe(pd.DataFrame(offline.get_conflicts()), hide_index=True)
+        if st.button("Temizle", key="clear_offline_conflicts"):
+            offline.clear_conflicts()
+            st.rerun()
+
+# =================================================
+# 📜 GÖNDERİM LOGU — sadece admin
+# =================================================
+if page == "📜 Gönderim Logu":
+    if not IS_ADMIN:
+        st.error("Bu sayfaya erişimin yok.")
+        st.stop()
+
+    page_header("📜 Gönderim Logu", "Seçtiğin tarihte kim ne göndermiş, tablo halinde.")
+
+
+    # Tarih / aralık değişince sadece ilgili bölüm yeniden çalışır; log tablosu ayrıca periyodik tazelenir
+    @st.fragment(run_every=LOG_REFRESH_SECONDS)
+    def log_table():
+        st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
+        selected_date = st.date_input("Tarih seç", value=TODAY)
+
+        rows_log = db_get_sent_rows_for_date(selected_date)
+        all_dates = db_get_log_dates_summary()
+
+        c1, c2, c3 = st.columns([2, 2, 6])
+        c1.metric("Toplam gün", len(all_dates))
+        c2.metric("Seçilen gün gönderilen", sum(1 for r in rows_log if r["Durum"] == "sent"))  # rows_log tüm durumları içerir
+        c3.markdown(
+            '<span class="badge"><span class="badge-dot"></span> Global kilit: aynı satır aynı gün aynı kanala 1 kere</span>',
+            unsafe_allow_html=True
+        )
+
+        st.divider()
+
+        archived = [] if rows_log else db_get_archived_summary_for_date(selected_date)
+        if archived:
+            st.info("Bu tarih arşivlendi; satır detayı Parquet arşivinde. Özet:")
+            st.dataframe(pd.DataFrame(archived), width="stretch", hide_index=True)
+        elif not rows_log:
+            st.info("Bu tarih için kayıt yok.")
+        else:
+            df_log = pd.DataFrame(rows_log)
+            st.dataframe(df_log, width="stretch", hide_index=True)
+
+        st.divider()
+        with st.expander("Tüm günleri özetle"):
+            if all_dates:
+                df = pd.DataFrame([{"Tarih": str(d), "Adet": int(c)} for d, c in all_dates])
+                st.dataframe(df, width="stretch", hide_index=True)
+            else:
+                st.write("Log boş.")
+
+    @st.fragment
+    def send_metrics():
+        st.subheader("📈 Gönderim Metrikleri")
+        st.caption("Canlı log'dan (arşivlenmiş aylar dahil değil). Süreler ms; Lightshot satırı görsel indirme süresi.")
+        metric_days = st.selectbox("Aralık", [7, 28, 90], format_func=lambda n: f"Son {n} gün", key="metrics_range")
+        metrics = db_get_send_metrics(TODAY - timedelta(days=metric_days - 1), TODAY)
+        if not metrics.get("daily"):
+            st.info("Bu aralıkta metrik yok.")
+        else:
+            df_daily = pd.DataFrame(metrics["daily"]).set_index("Tarih")
+            st.bar_chart(df_daily[["Gönderilen", "Hatalı", "Tekrar denenen"]])
+
+            m1, m2 = st.columns(2)
+            with m1:
+                st.markdown("**Metot bazlı süre (p50 / p95)**")
+                st.dataframe(pd.DataFrame(metrics["latency"]), width="stretch", hide_index=True)
+            with m2:
+                st.markdown("**En sık hata kodları**")
+                if metrics["errors"]:
+                    st.dataframe(pd.DataFrame(metrics["errors"]), width="stretch", hide_index=True)
+                else:
+                    st.write("Hata yok.")
+
+            if metrics["latency_weekly"]:
+                st.markdown("**Haftalık p95 (ms)**")
+                df_week = pd.DataFrame(metrics["latency_weekly"]).pivot(index="Hafta", columns="Metot", values="p95 ms")
+                st.line_chart(df_week)
+
+            m3, m4 = st.columns(2)
+            with m3:
+                st.markdown("**Kategori bazlı hata oranı**")
+                st.dataframe(pd.DataFrame(metrics["by_category"]), width="stretch", hide_index=True)
+            with m4:
+                st.markdown("**Ek seçimine göre hata oranı**")
+                st.dataframe(pd.DataFrame(metrics["by_attachment"]), width="stretch", hide_index=True)
+
+            with st.expander("Günlük tablo"):
+                st.dataframe(df_daily.reset_index(), width="stretch", hide_index=True)
+
+    log_table()
+    st.divider()
+    send_metrics()
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# =================================================
+# 📤 MESAJ GÖNDER
+# =================================================
+if page == "📤 Mesaj Gönder":
+    # Hero header (üstteki “container” hissini de modernleştirir)
+    st.markdown(f"""
+    <div class="block-card" style="padding:18px 18px;">
+      <div style="display:flex;justify-content:space-between;align-items:flex-start;gap:12px;flex-wrap:wrap;">
+        <div>
+          <div class="h-title" style="margin:0;">AksiyonKee</div>
+          <div class="sub" style="margin:6px 0 0 0;">📅 {DAYS_TR[TODAY.weekday()]} — {format_tr_date(TODAY)}</div>
+        </div>
+        <div style="display:flex;flex-direction:column;gap:8px;align-items:flex-end;">
+          <span class="badge"><span class="badge-dot"></span> Aktif kullanıcı: <b>{USER_KEY}</b></span>
+          <span class="badge" style="opacity:.95;"><span class="badge-dot" style="background:var(--brand2);"></span> Güvenlik Durumu: Aktif</span>
+        </div>
+      </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    categories = db_get_categories()
+    category_ids = db_get_category_ids()
+    variables = db_get_variables(max_options=LARGE_OPTION_THRESHOLD)
+    attachments = db_get_attachments(include_expired=False)
+    category_channels = db_get_category_channels()
+
+    # Arka plan kontrolünde sağlam çıkan preset linkleri kontrol edilmiş sayılır
+    for _att in attachments.values():
+        if isinstance(_att, dict) and _att.get("status") == PRESET_OK:
+            st.session_state.link_cache.setdefault(str(_att.get("url", "") or "").strip(), True)
+
+    pending_retry = db_count_retrying(USER_KEY)
+    if pending_retry:
+        st.caption(f"🔁 Geçici hata nedeniyle arka planda tekrar denenecek gönderim: {pending_retry}")
+
+    # ✅ Global gizleme: day_row_id + kanal bazlı (tüm hedef kanallara gitmişse gizle)
+    sent_channels_today = db_get_sent_channels_for_date(TODAY)
+
+    # Operatörün izinli kategorileri dışındaki satırlar hiç yüklenmez
+    rows_today = [r for r in db_get_day_rows(DAY_KEY) if registry.can_see(USER_KEY, r["category_id"])]
+    rows_by_id = {int(r["id"]): r for r in rows_today}
+    visible_rows = [
+        r for r in rows_today
+        if not row_fully_sent(
+            resolve_channels(r, str(r.get("category") or DEFAULT_CATEGORY), category_channels, channel_id),
+            sent_channels_today.get(int(r["id"]), set()),
+        )
+    ]
+
+    if not visible_rows:
+        st.divider()
+        st.success("Bugün için gönderilecek yeni bir satır yok ✅")
+        st.stop()
+
+    # Bozuk preset'ler (arka plan kontrolü): bugün ek zorunlu satırı olan kategorilerdekiler
+    attach_cat_ids = {int(r["category_id"]) for r in visible_rows if r.get("requires_attachment")}
+    broken_presets = [
+        (n, a) for n, a in sorted(attachments.items())
+        if is_broken(a) and int(a.get("category_id", DEFAULT_CATEGORY_ID)) in attach_cat_ids
+    ]
+    if broken_presets:
+        st.warning(
+            "⚠️ Bozuk preset'ler (seçilirse satır gönderilmez, Ayarlar'dan linki güncelle):\n"
+            + "\n".join(f"- **{n}** ({a.get('category')}): {a.get('check_error') or 'bozuk'}" for n, a in broken_presets)
+        )
+
+    row_ids_live = [int(r["id"]) for r in visible_rows]
+    templates_live = [str(r.get("text", "") or "") for r in visible_rows]
+    vars_today = sorted({v for t in templates_live for v in extract_vars(t)})
+
+    row_categories_live = []
+    for r in visible_rows:
+        c = str(r.get("category", DEFAULT_CATEGORY) or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+        if c not in categories:
+            c = DEFAULT_CATEGORY
+        row_categories_live.append(c)
+
+    table_key = f"table_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    claims_key = f"claims_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    templates_key = f"templates_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    vars_key = f"vars_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    rowids_key = f"rowids_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    editor_key = f"editor_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    delta_key = f"delta_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+    fp_key = f"validfp_{DAY_KEY}_{TODAY_KEY}_{USER_KEY}"
+
+    # Satır sahipliği: hazırlamaya başladığım satırlar (değer/ek seçilen) tutulur, başkasınınkiler atlanır
+    if claims_key not in st.session_state:
+        st.session_state[claims_key] = set()
+    my_claims = st.session_state[claims_key]
+    claim_owners = db_sync_row_claims(TODAY, USER_KEY, my_claims)
+    my_claims &= {rid for rid, u in claim_owners.items() if u == USER_KEY}  # süresi dolup başkası aldıysa bırak
+    claimed_by_others = {rid: u for rid, u in claim_owners.items() if u != USER_KEY}
+
+    def render_preview(rid: int, row, template: str) -> str:
+        # Slack'e gidecek metin (render hattı + cache); seçilmemiş değişken {{...}} olarak kalır
+        sel = {}
+        for v in extract_vars(template):
+            val = row.get(f"Var: {v}", "")
+            if not is_unselected(val):
+                sel[v] = str(val).strip()
+        return render_cached(rid, str(row.get("Mesaj") or ""), sel)[1]
+
+    def claim_label(rid: int) -> str:
+        if rid in claimed_by_others:
+            return f"🔒 {claimed_by_others[rid]}"
+        return "✋ Sen" if rid in my_claims else ""
+
+    # İlk kurulum
+    if table_key not in st.session_state:
+        df_dict = {
+            "Gönder": [rid not in claimed_by_others for rid in row_ids_live],
+            "Durum": [""] * len(templates_live),
+            "Sahip": [claim_label(rid) for rid in row_ids_live],
+            "Kategori": row_categories_live,
+            "Mesaj": templates_live,
+            "Önizleme": [""] * len(templates_live),
+            "Ek Zorunlu": [bool(r.get("requires_attachment", False)) for r in visible_rows],
+            "Ek Seç": [SELECT_PLACEHOLDER if bool(r.get("requires_attachment", False)) else "" for r in visible_rows],
+            "Lightshot Link": [""] * len(templates_live),
+        }
+        for var in vars_today:
+            col = f"Var: {var}"
+            df_dict[col] = [SELECT_PLACEHOLDER if var in extract_vars(t) else "" for t in templates_live]
+
+        # Geçmişten ön doldurma: satırın son gönderimindeki değerler hâlâ geçerliyse (seçenek/preset duruyor)
+        history = db_get_last_selections(row_ids_live)
+        for i, rid in enumerate(row_ids_live):
+            h = history.get(rid)
+            if not h:
+                continue
+            for var in extract_vars(templates_live[i]):
+                val = str(h["selections"].get(var, "") or "")
+                vdef = variables.get(var)
+                if val and isinstance(vdef, dict) and (is_large(vdef) or val in vdef.get("options", [])):
+                    df_dict[f"Var: {var}"][i] = val
+            if df_dict["Ek Zorunlu"][i]:
+                att = h["attachment"]
+                preset = attachments.get(att)
+                if att == MANUAL_OPTION or (
+                    isinstance(preset, dict)
+                    and preset.get("category_id", DEFAULT_CATEGORY_ID) == category_ids.get(row_categories_live[i], DEFAULT_CATEGORY_ID)
+                ):
+                    df_dict["Ek Seç"][i] = att  # Manuel'de link her gönderimde yeni, boş bırakılır
+
+        st.session_state[table_key] = pd.DataFrame(df_dict)
+        st.session_state[templates_key] = templates_live
+        st.session_state[vars_key] = vars_today
+        st.session_state[rowids_key] = row_ids_live
+        st.session_state.pop(fp_key, None)
+        st.session_state.pop(delta_key, None)
+
+    # Başka kullanıcı gönderim yaptıysa tabloyu prune et
+    current_rowids = st.session_state.get(rowids_key, [])
+    live_set = set(row_ids_live)
+    if set(current_rowids) != live_set:
+        df_old = st.session_state[table_key].copy()
+        old_ids = list(current_rowids)
+
+        keep_idx = [i for i, rid in enumerate(old_ids) if rid in live_set]
+        df_new = df_old.iloc[keep_idx].reset_index(drop=True)
+        new_ids = [old_ids[i] for i in keep_idx]
+
+        # live template eşlemesi
+        new_templates = []
+        for rid in new_ids:
+            j = row_ids_live.index(rid)
+            new_templates.append(templates_live[j])
+
+        st.session_state[table_key] = df_new
+        st.session_state[templates_key] = new_templates
+        st.session_state[rowids_key] = new_ids
+        st.session_state.pop(fp_key, None)
+        st.caption("ℹ️ Liste güncellendi (başka kullanıcı gönderim yaptı).")
+        st.rerun()
+
+    # Kontrol butonları
+    b1, b2, _ = st.columns([1.2, 1.8, 7.2])
+    if b1.button("✅ Tümünü Seç", disabled=st.session_state.sending):
+        st.session_state[table_key]["Gönder"] = [int(rid) not in claimed_by_others for rid in st.session_state[rowids_key]]
+        st.rerun()
+
+    if b2.button("⛔ Tüm Seçimi Kaldır", disabled=st.session_state.sending):
+        st.session_state[table_key]["Gönder"] = False
+        db_sync_row_claims(TODAY, USER_KEY, [], my_claims)
+        my_claims.clear()
+        st.rerun()
+
+    st.markdown('<div class="small-muted">Not: Aynı satır aynı gün yalnızca 1 kere gönderilir (DB atomik kilit).</div>', unsafe_allow_html=True)
+
+    templates = st.session_state[templates_key]
+    vars_today = st.session_state[vars_key]
+    row_ids = st.session_state[rowids_key]
+
+    # Büyük seçenek listeleri tabloya gönderilmez: type-ahead ile ilk eşleşmeler çekilip seçilen satırlara yazılır
+    large_vars = [v for v in vars_today if is_large(variables.get(v))]
+    if large_vars:
+        with st.expander("🔎 Seçenek Ara (büyük listeler)", expanded=False):
+            p1, p2 = st.columns([1.2, 3])
+            pick_var = p1.selectbox("Değişken", options=large_vars, key="opt_pick_var")
+            pdef = variables[pick_var]
+            query = p2.text_input(
+                "Ara", key=f"opt_pick_q_{pick_var}",
+                placeholder=f"{pdef['option_count']} seçenek içinde ara (ilk harfler, kelime parçası)…",
+            )
+            matches = search_options(pick_var, pdef["options_version"], query)
+            col = f"Var: {pick_var}"
+            df_p = st.session_state[table_key]
+            uses = [i for i, t in enumerate(templates) if pick_var in extract_vars(t)]
+            pending = [i for i in uses if bool(df_p.at[i, "Gönder"]) and str(df_p.at[i, col]) in ("", SELECT_PLACEHOLDER)]
+            p3, p4 = st.columns([2, 3])
+            value = p3.selectbox("Seçenek", options=matches, key=f"opt_pick_val_{pick_var}", disabled=not matches)
+            target = p4.multiselect(
+                "Satırlar", options=uses, default=pending, key=f"opt_pick_rows_{pick_var}_{len(uses)}",
+                format_func=lambda i: f"{i + 1}. {templates[i][:60]}",
+            )
+            if not matches:
+                st.caption("Eşleşme yok.")
+            if st.button("✔️ Seçilen satırlara yaz", key="opt_pick_apply", disabled=not (matches and target) or st.session_state.sending):
+                df_p.loc[target, col] = value
+                st.session_state.pop(fp_key, None)
+                my_claims.update(int(row_ids[i]) for i in target if int(row_ids[i]) not in claimed_by_others)
+                db_sync_row_claims(TODAY, USER_KEY, my_claims)
+
+    # Durum kolonu: konfigürasyon (kategori/değişken/preset) değiştiyse tüm satırlar, yoksa sadece düzenlenenler
+    valid_fp = config_fingerprint(category_ids, variables, attachments)
+    if st.session_state.get(fp_key) != valid_fp:
+        df_v = st.session_state[table_key]
+        df_v["Durum"] = [
+            validate_row(df_v.loc[i], templates[i], category_ids, variables, attachments, st.session_state.link_cache)
+            for i in range(len(df_v))
+        ]
+        st.session_state[fp_key] = valid_fp
+
+    df_in = st.session_state[table_key]
+    df_in["Sahip"] = [claim_label(int(rid)) for rid in row_ids]
+    previews = [render_preview(int(rid), df_in.loc[i], templates[i]) for i, rid in enumerate(row_ids)]
+    if "Önizleme" not in df_in.columns:
+        df_in.insert(df_in.columns.get_loc("Mesaj") + 1, "Önizleme", previews)
+    else:
+        df_in["Önizleme"] = previews
+    df_in = df_in.copy()
+
+    column_config = {
+        "Gönder": st.column_config.CheckboxColumn("Gönder"),
+        "Durum": st.column_config.TextColumn("Durum", disabled=True),
+        "Sahip": st.column_config.TextColumn(
+            "Sahip", disabled=True, help=f"Satırı hazırlayan operatör (son işlemden {ROW_CLAIM_SECONDS // 60} dk sonra düşer)",
+        ),
+        "Kategori": st.column_config.SelectboxColumn("Kategori", options=categories),
+        "Mesaj": st.column_config.TextColumn("Mesaj"),
+        "Önizleme": st.column_config.TextColumn(
+            "Önizleme", disabled=True, help="Slack'e aynen bu metin gider (değişkenler yerleşmiş, linkler temizlenmiş, & < > kaçışlı)",
+        ),
+        "Ek Zorunlu": st.column_config.CheckboxColumn("Ek Zorunlu", disabled=True),
+        "Ek Seç": st.column_config.SelectboxColumn(
+            "Ek Seç",
+            options=[SELECT_PLACEHOLDER, MANUAL_OPTION] + sorted(list(attachments.keys()))
+        ),
+        "Lightshot Link": st.column_config.TextColumn("Lightshot Link"),
+    }
+
+    for var in vars_today:
+        vdef = variables.get(var, {})
+        if is_large(vdef):
+            column_config[f"Var: {var}"] = st.column_config.TextColumn(var, disabled=True, help="🔎 Seçenek Ara ile doldurulur")
+            continue
+        opts = vdef.get("options", []) if isinstance(vdef, dict) else []
+        column_config[f"Var: {var}"] = st.column_config.SelectboxColumn(
+            var,
+            options=[SELECT_PLACEHOLDER] + (opts or [])
+        )
+
+    df_out = st.data_editor(
+        df_in,
+        width="stretch",
+        hide_index=True,
+        key=editor_key,
+        column_config=column_config,
+        disabled=True if st.session_state.sending else ["Ek Zorunlu", "Durum", "Sahip", "Önizleme"],
+    )
+
+    # Sadece son çalıştırmadan beri düzenlenen satırlar (edited_rows farkı) normalize + doğrulanır
+    edited_rows = (st.session_state.get(editor_key) or {}).get("edited_rows", {}) or {}
+    changed_idx = changed_row_indices(edited_rows, st.session_state.get(delta_key, {}))
+    st.session_state[delta_key] = copy.deepcopy(edited_rows)
+
+    # Minimal normalize (kullanıcının girişini gereksiz silmiyoruz)
+    cleaned = False
+    for idx in sorted(i for i in changed_idx if i < len(df_out)):
+        req = bool(df_out.at[idx, "Ek Zorunlu"])
+        row_cat = str(df_out.at[idx, "Kategori"] or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+        if row_cat not in categories:
+            df_out.at[idx, "Kategori"] = DEFAULT_CATEGORY
+            cleaned = True
+
+        if not req:
+            if str(df_out.at[idx, "Ek Seç"]).strip() not in ("", "None"):
+                df_out.at[idx, "Ek Seç"] = ""
+                cleaned = True
+            if str(df_out.at[idx, "Lightshot Link"]).strip():
+                df_out.at[idx, "Lightshot Link"] = ""
+                cleaned = True
+
+        status = validate_row(df_out.loc[idx], templates[idx], category_ids, variables, attachments, st.session_state.link_cache)
+        if status != df_out.at[idx, "Durum"]:
+            df_out.at[idx, "Durum"] = status
+            cleaned = True
+
+        preview = render_preview(int(row_ids[idx]), df_out.loc[idx], templates[idx])
+        if preview != df_out.at[idx, "Önizleme"]:
+            df_out.at[idx, "Önizleme"] = preview
+            cleaned = True
+
+    # Düzenlenen satırlar tutulur, "Gönder"i kaldırılanlar bırakılır
+    claim_before = set(my_claims)
+    release = set()
+    for idx in (i for i in changed_idx if i < len(df_out)):
+        rid = int(row_ids[idx])
+        if rid in claimed_by_others:
+            continue
+        if bool(df_out.at[idx, "Gönder"]):
+            my_claims.add(rid)
+        else:
+            my_claims.discard(rid)
+            release.add(rid)
+    if my_claims != claim_before or release:
+        claim_owners = db_sync_row_claims(TODAY, USER_KEY, my_claims, release)
+        my_claims &= {rid for rid, u in claim_owners.items() if u == USER_KEY}
+        claimed_by_others = {rid: u for rid, u in claim_owners.items() if u != USER_KEY}
+        labels = [claim_label(int(rid)) for rid in row_ids]
+        if labels != df_out["Sahip"].tolist():
+            df_out["Sahip"] = labels
+            cleaned = True
+
+    if cleaned:
+        st.session_state[table_key] = df_out
+        st.rerun()
+
+    # Editör açık kaldıkça sahiplik yenilenir (sadece bu parça yeniden çalışır)
+    @st.fragment(run_every=ROW_CLAIM_SECONDS / 3)
+    def renew_row_claims(claim_ids: list[int]):
+        db_sync_row_claims(TODAY, USER_KEY, claim_ids)
+
+    if my_claims:
+        renew_row_claims(sorted(my_claims))
+
+    st.session_state[table_key] = df_out
+
+    # ============== LINK CHECK (fragment) ==============
+    # Buton sadece bu bölümü yeniden çalıştırır: tablo ve DB okumaları tekrar yapılmaz.
+    # Linkler aio loop'unda indirilir; ilerlemeyi run_every'li iç fragment feed'den okuyup çizer (script
+    # thread'i beklemez). Bitince sonuç link_cache'e yazılır ve sayfa bir kere tam çalışır (Durum kolonu tazelenir).
+    @st.fragment(run_every=PROGRESS_POLL_SECONDS)
+    def link_check_progress():
+        job = st.session_state.get("link_check_job")
+        if job is None:
+            return
+        if not job["future"].done():
+            snap = job["feed"].snapshot()
+            st.progress(job["feed"].fraction(), text=f"Linkler kontrol ediliyor… ({snap['done']}/{snap['total']})")
+            return
+
+        st.session_state.pop("link_check_job", None)
+        results = job["results"]
+        for url, (bio, _, _) in job["future"].result().items():
+            st.session_state.link_cache[url] = bio is not None
+        for i, link in job["pending_links"]:
+            ok = st.session_state.link_cache.get(link)
+            results.append({"Satır": i + 1, "Sonuç": "✅ OK" if ok else "❌ Görsel alınamadı"})
+        results.sort(key=lambda r: r["Satır"])
+        st.session_state.link_check_results = results
+        st.session_state.pop(fp_key, None)  # link sonuçları Durum kolonuna yansısın
+        st.rerun()
+
+    @st.fragment
+    def link_check_panel(df_check, row_ids: list[int], claimed_by_others: dict):
+        checking = "link_check_job" in st.session_state
+        if st.button("🔎 Linkleri Kontrol Et", key="link_check", disabled=st.session_state.sending or checking):
+            results = []
+            pending_links = []
+            for i in range(len(df_check)):
+                row = df_check.loc[i]
+                if not bool(row["Gönder"]) or not bool(row["Ek Zorunlu"]):
+                    continue
+                if int(row_ids[i]) in claimed_by_others:
+                    results.append({"Satır": i + 1, "Sonuç": f"🔒 {claimed_by_others[int(row_ids[i])]} hazırlıyor, atlandı"})
+                    continue
+
+                row_cat_id = category_ids.get(str(row.get("Kategori") or "").strip(), DEFAULT_CATEGORY_ID)
+                ek_sec = str(row.get("Ek Seç", "")).strip()
+                link = str(row.get("Lightshot Link", "")).strip()
+
+                if ek_sec in ("", SELECT_PLACEHOLDER, "None"):
+                    results.append({"Satır": i + 1, "Sonuç": "❗ Ek seçilmedi"})
+                    continue
+
+                if ek_sec != MANUAL_OPTION:
+                    preset = attachments.get(ek_sec)
+                    if not isinstance(preset, dict):
+                        results.append({"Satır": i + 1, "Sonuç": "❗ Preset yok"})
+                        continue
+                    if preset.get("category_id", DEFAULT_CATEGORY_ID) != row_cat_id:
+                        results.append({"Satır": i + 1, "Sonuç": "❗ Preset kategori uyumsuz"})
+                        continue
+                    if is_broken(preset):
+                        results.append({"Satır": i + 1, "Sonuç": broken_label(preset)})
+                        continue
+                    link = str(preset.get("url", "") or "").strip()
+
+                if not link:
+                    results.append({"Satır": i + 1, "Sonuç": "❗ Link yok"})
+                    continue
+
+                if not looks_like_lightshot(link):
+                    results.append({"Satır": i + 1, "Sonuç": "❗ Link prnt.sc değil"})
+                    continue
+
+                pending_links.append((i, link))
+
+            # Sadece kontrol edilmemiş linkler indirilir
+            unchecked = [l for _, l in pending_links if st.session_state.link_cache.get(l) is None]
+            feed = ProgressFeed()
+            st.session_state.link_check_job = {
+                "future": submit_prefetch(unchecked, feed), "feed": feed, "results": results, "pending_links": pending_links,
+            }
+            checking = True
+
+        if checking:
+            link_check_progress()
+            return
+
+        # Sonuç, iş bittikten sonraki tam çalıştırmada bir kere gösterilir
+        results = st.session_state.pop("link_check_results", None)
+        if results is None:
+            return
+        if results:
+            df_res = pd.DataFrame(results)
+            bad = df_res["Sonuç"].str.startswith("❌") | df_res["Sonuç"].str.startswith("❗")
+            st.error("Link kontrolünde sorun var:") if bad.any() else st.success("Link kontrolü OK ✅")
+            st.dataframe(df_res, width="stretch", hide_index=True)
+        else:
+            st.info("Kontrol edilecek ek yok.")
+
+    link_check_panel(df_out.reset_index(drop=True), list(row_ids), dict(claimed_by_others))
+
+    st.divider()
+
+    # ============== SEND (fragment + ilerleme feed'i, ATOMİK KİLİT) ==============
+    # İş iki aşamada aio loop'unda sürer: görseller indirilir, sonra mesajlar gönderilir. İlerlemeyi
+    # run_every'li iç fragment feed'den bir kere okuyup çizer; script thread'i beklemez.
+    # İş başlayınca ve bitince sayfa bir kere tam çalışır: editör ve butonlar "sending" ile kurulur
+    # (sending sayfanın başında send_job'dan hesaplanır). Aradaki tablo / DB okumaları tekrar çalışmaz.
+    def start_send(df_send, row_ids: list[int], claimed_by_others: dict) -> bool:
+        # Seçilen satırları Durum kolonundan kontrol eder, görsel indirmeyi loop'a verir. Dönen: iş başladı mı
+        # Durum kolonu editörde güncel tutulur (düzenlenen satırlar + konfigürasyon değişimi); satırlar burada
+        # baştan doğrulanmaz. Link kontrolü fragment'i link_cache'i sonradan değiştirmiş olabilir: sadece
+        # linke bağlı durumlar tazelenir. Başka operatörün hazırladığı satırlar indirilmez / gönderilmez.
+        errors, rows = [], []
+        skipped_claimed = 0
+        for i in range(len(df_send)):
+            row = df_send.loc[i]
+            if not bool(row["Gönder"]):
+                continue
+            if int(row_ids[i]) in claimed_by_others:
+                skipped_claimed += 1
+                continue
+            link = attachment_link(bool(row["Ek Zorunlu"]), row["Ek Seç"], row["Lightshot Link"], attachments)
+            status = str(row.get("Durum") or "") or validate_row(
+                row, templates[i], category_ids, variables, attachments, st.session_state.link_cache,
+            )
+            status = refresh_link_status(status, link, st.session_state.link_cache)
+            # Hatalı satırlar için görsel indirme yapılmaz
+            if not is_ok_status(status):
+                errors.append(f"- {status.lstrip('❗❌ ').strip()}: {templates[i]}")
+                continue
+            rows.append((i, row, link))
+
+        if errors:
+            st.error("Gönderim durduruldu. Hatalar:")
+            for e in errors[:160]:
+                st.write(e)
+            return False
+
+        if not rows:
+            st.warning("Gönderilecek içerik yok.")
+            return False
+
+        # Görseller satır satır değil, tek seferde paralel indirilir
+        feed = ProgressFeed()
+        st.session_state.send_job = {
+            "stage": "prefetch",
+            "future": submit_prefetch((link for _, _, link in rows), feed),
+            "feed": feed,
+            "rows": rows,
+            "skipped_claimed": skipped_claimed,
+        }
+        return True
+
+    def queue_send(job) -> bool:
+        # Görseller indikten sonra: mesajlar kurulur, gönderim loop'a verilir. Dönen: gönderim başladı mı
+        try:
+            prefetched = job["future"].result()
+        except Exception as e:
+            st.session_state.send_report = {"error": f"Görseller indirilemedi: {e}", "lines": []}
+            return False
+
+        errors, send_items = [], []
+        for i, row, _ in job["rows"]:
+            day_row_id = int(row_ids[i])
+            template = templates[i]
+            row_cat = str(row.get("Kategori") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+            if row_cat not in categories:
+                row_cat = DEFAULT_CATEGORY
+
+            item, err = build_send_item(
+                day_row_id=day_row_id,
+                template=template,
+                message=str(row["Mesaj"]),
+                row_cat=row_cat,
+                req=bool(row["Ek Zorunlu"]),
+                selections={v: row.get(f"Var: {v}", "") for v in extract_vars(template)},
+                ek_sec=row.get("Ek Seç", ""),
+                link=row.get("Lightshot Link", ""),
+                variables=variables,
+                attachments=attachments,
+                link_cache=st.session_state.link_cache,
+                prefetched=prefetched,
+            )
+            if err:
+                errors.append(err)
+                continue
+
+            # Hedef kanallar: satır > kategori > kullanıcının kanalı; zaten gidilmiş kanallar atlanır
+            targets = resolve_channels(rows_by_id.get(day_row_id, {}), row_cat, category_channels, channel_id)
+            done = sent_channels_today.get(day_row_id, set())
+            item["channels"] = [ch for ch in targets if ch not in done]
+            send_items.append(item)
+
+        if errors:
+            st.session_state.send_report = {"error": "Gönderim durduruldu. Hatalar:", "lines": errors[:160]}
+            return False
+
+        units = plan_sends(send_items, batch=st.session_state.get("batch_mode", False))
+        # Kanallar aio loop'unda eşzamanlı gider; script thread'i sadece feed'i okur
+        feed = ProgressFeed(len(units))
+        job.update(stage="send", future=aio_submit(send_units_async(client, TODAY, units, USER_KEY, feed=feed)), feed=feed)
+        return True
+
+    def finish_send(job):
+        try:
+            job["future"].result()
+        except Exception as e:
+            st.session_state.send_report = {"error": f"Gönderim yarıda kaldı: {e}", "lines": []}
+            return
+        snap = job["feed"].snapshot()
+        if snap["errors"]:
+            st.session_state.pop(fp_key, None)
+            st.session_state.send_report = {"error": "Bazı içerikler gönderilemedi:", "lines": snap["errors"][:100]}
+            return
+
+        # UI temizle + tekrar göndermesin (tablo iş bitince yapılan tam çalıştırmada DB'den kurulur)
+        db_sync_row_claims(TODAY, USER_KEY, [], st.session_state.get(claims_key, set()))
+        for k in [table_key, templates_key, vars_key, rowids_key, claims_key, editor_key, delta_key, fp_key]:
+            st.session_state.pop(k, None)
+
+        counts = snap["counts"]
+        st.session_state.send_report = {
+            "success": f"Slack’e gönderildi ✅ | Gönderilen: {counts.get(SENT, 0)} | Kilitli olduğu için atlanan: {counts.get(LOCKED, 0)}"
+            f" | Başka operatör hazırladığı için atlanan: {job['skipped_claimed']}"
+            f" | Arka planda tekrar denenecek: {counts.get(RETRYING, 0)}",
+        }
+
+    @st.fragment(run_every=PROGRESS_POLL_SECONDS)
+    def send_progress():
+        # Her çalıştırmada feed bir kere okunur. Sayfa kapanıp açılsa da iş sürer; sonraki çalıştırma buradan izler.
+        job = st.session_state.get("send_job")
+        if job is None:
+            return
+        feed = job["feed"]
+        if not job["future"].done():
+            snap = feed.snapshot()
+            if job["stage"] == "prefetch":
+                text = f"Görseller indiriliyor… ({snap['done']}/{snap['total']})"
+            else:
+                text = (
+                    f"Gönderiliyor… ({snap['done']}/{snap['total']}) · gönderilen {snap['counts'].get(SENT, 0)}"
+                    f" · kilitli {snap['counts'].get(LOCKED, 0)} · tekrar denenecek {snap['counts'].get(RETRYING, 0)}"
+                )
+            st.progress(feed.fraction(), text=text)
+            return
+
+        if job["stage"] == "prefetch" and queue_send(job):
+            return
+        st.session_state.pop("send_job", None)
+        if job["stage"] == "send":
+            finish_send(job)
+        st.rerun()  # editör ve butonlar tekrar açılsın, sonuç tam çalıştırmada gösterilir
+
+    @st.fragment
+    def send_panel(df_send, row_ids: list[int], claimed_by_others: dict):
+        st.checkbox(
+            "📦 Aynı kategorideki eksiz satırları tek mesajda topla",
+            key="batch_mode",
+            disabled=st.session_state.sending,
+            help="Her kategori tek Block Kit mesajı olur; kilit yine satır bazlı tutulur. Ekli satırlar ayrı gider.",
+        )
+        send_click = st.button(
+            "Slack’e Gönder", type="primary", key="send_click",
+            disabled=st.session_state.sending,
+        )
+
+        if send_click and "send_job" not in st.session_state:
+            if start_send(df_send, row_ids, claimed_by_others):
+                st.rerun()  # editör ve butonlar kilitli kurulsun
+        if "send_job" in st.session_state:
+            send_progress()
+
+        # Sonuç, iş bittikten sonraki tam çalıştırmada bir kere gösterilir
+        report = st.session_state.pop("send_report", None)
+        if report and "error" in report:
+            st.error(report["error"])
+            for e in report["lines"]:
+                st.write(e)
+        elif report:
+            st.success(report["success"])
+
+    send_panel(df_out.reset_index(drop=True), list(row_ids), dict(claimed_by_others))
+
+# =================================================
+# ⚙️ AYARLAR — sadece admin (canlı sıralama, kaydette DB)
+# =================================================
+if page == "⚙️ Ayarlar":
+    if not IS_ADMIN:
+        st.error("Bu sayfaya erişimin yok.")
+        st.stop()
+
+    page_header("⚙️ Ayarlar", "Kategoriler, günlük satırlar, değişkenler ve ek presetleri.")
+
+    st.divider()
+
+    categories = db_get_categories()
+    variables = db_get_variables()
+    attachments_all = db_get_attachments(include_expired=True)
+
+    # -------- Kategoriler --------
+    st.subheader("Kategoriler")
+    c1, c2 = st.columns([2, 5])
+    new_cat = c1.text_input("Yeni kategori adı", placeholder="Kampanya", key="cat_new_name")
+    if c2.button("➕ Kategori Ekle"):
+        name = (new_cat or "").strip()
+        if not name:
+            st.warning("Kategori adı boş olamaz.")
+        else:
+            db_add_category(name)
+            st.success("Kategori eklendi ✅")
+            st.rerun()
+
+    category_channels = db_get_category_channels()
+
+    st.write("Mevcut kategoriler:")
+    for cat in categories:
+        colA, colCh, colS, colB = st.columns([3, 3, 0.6, 0.6])
+        new_name = colA.text_input(
+            "Ad", value=cat, key=f"cat_name_{cat}", label_visibility="collapsed",
+            disabled=(cat == DEFAULT_CATEGORY),
+        )
+        ch_text = colCh.text_input(
+            "Kanallar",
+            value=", ".join(category_channels.get(cat, [])),
+            placeholder="Kanal ID'leri (boş = kullanıcının kanalı)",
+            key=f"cat_channels_{cat}",
+            label_visibility="collapsed",
+        )
+        if colS.button("💾", key=f"save_cat_channels_{cat}"):
+            new_name = (new_name or "").strip()
+            if new_name and new_name != cat:
+                if not db_rename_category(cat, new_name):
+                    st.error(f"{new_name} adında bir kategori zaten var.")
+                    st.stop()
+                cat = new_name
+            db_set_category_channels(cat, parse_channels(ch_text))
+            st.success(f"{cat} kaydedildi ✅")
+            st.rerun()
+        disabled = (cat == DEFAULT_CATEGORY) or (len(categories) == 1)
+        if colB.button("🗑️", key=f"del_cat_{cat}", disabled=disabled):
+            db_delete_category(cat)
+            st.success("Kategori silindi, bağlı içerikler Genel’e taşındı ✅")
+            st.rerun()
+
+    st.divider()
+
+    # -------- Günlük Satırlar (CANLI SIRALA + KAYDETTE DB) --------
+    st.subheader("Günlük Satırlar (Sıra + Düzenle)")
+    selected_day_index = st.selectbox(
+        "Hangi günün satırlarını düzenliyorsun?",
+        options=list(range(7)),
+        format_func=lambda i: DAYS_TR[i],
+        index=TODAY.weekday(),
+        key="settings_day_select",
+    )
+    selected_day_key = DAY_KEYS[selected_day_index]
+
+    buffer_key = f"day_rows_buffer_{selected_day_key}"
+    orig_key = f"day_rows_orig_{selected_day_key}"
+    prev_day_key = st.session_state.get("prev_settings_day_key")
+    if prev_day_key != selected_day_key:
+        if prev_day_key:
+            st.session_state.pop(f"day_rows_buffer_{prev_day_key}", None)
+            st.session_state.pop(f"day_rows_orig_{prev_day_key}", None)
+        st.session_state["prev_settings_day_key"] = selected_day_key
+
+    if buffer_key not in st.session_state:
+        df_rows = day_rows_frame(db_get_day_rows(selected_day_key))
+        st.session_state[buffer_key] = df_rows
+        st.session_state[orig_key] = df_rows.copy()
+        # Editör anahtarı değişsin: eski edited_rows farkı yeni tabloya uygulanmasın
+        st.session_state["day_rows_ver"] = st.session_state.get("day_rows_ver", 0) + 1
+
+    st.markdown('<div class="small-muted">Tek tabloda düzenle: “Sıra”yı değiştirerek taşı (ör. 2.5 → 2 ile 3 arasına, “🔢 Sırayı uygula” ile dizilir), “Sil” ile kaldır. DB’ye sadece “Kaydet” ile ve sadece değişen satırlar yazılır. “Oto” işaretli satırlar zamanlanmış gönderimde varsayılan değer/preset ile gider.</div>', unsafe_allow_html=True)
+
+    df_all = st.session_state[buffer_key]
+    f1, f2, f3 = st.columns([4, 1.2, 1.2])
+    search = f1.text_input("Ara", placeholder="Metin, kategori veya kanal", key=f"day_rows_search_{selected_day_key}")
+    page_size = f2.selectbox("Sayfa boyu", options=DAY_ROWS_PAGE_SIZES, index=1, key="day_rows_page_size")
+    df_view = filter_rows(df_all, search)
+    page_count = max(1, -(-len(df_view) // page_size))
+    page_no = int(f3.number_input("Sayfa", min_value=1, max_value=page_count, value=1, step=1, key=f"day_rows_page_{selected_day_key}_{page_size}_{search}"))
+    page_no = min(page_no, page_count)
+    df_page = df_view.iloc[(page_no - 1) * page_size: page_no * page_size]
+    st.caption(f"{len(df_all)} satır · {len(df_view)} eşleşen · sayfa {page_no}/{page_count}")
+
+    att_names = [""] + sorted(attachments_all.keys())
+    edited_page = st.data_editor(
+        df_page,
+        width="stretch",
+        hide_index=True,
+        num_rows="fixed",
+        key=f"day_rows_editor_{selected_day_key}_{st.session_state['day_rows_ver']}_{page_no}_{page_size}_{search}",
+        column_config={
+            COL_ORDER: st.column_config.NumberColumn(COL_ORDER, step=0.5, format="%g", width="small"),
+            COL_TEXT: st.column_config.TextColumn(COL_TEXT, width="large"),
+            COL_CATEGORY: st.column_config.SelectboxColumn(COL_CATEGORY, options=categories),
+            COL_REQ: st.column_config.CheckboxColumn(COL_REQ, width="small"),
+            COL_AUTO: st.column_config.CheckboxColumn(COL_AUTO, width="small"),
+            COL_DEFAULT_ATT: st.column_config.SelectboxColumn(
+                COL_DEFAULT_ATT, options=att_names,
+                help="Zamanlanmış gönderimde kullanılacak preset (satırın kategorisinde olmalı)",
+            ),
+            COL_CHANNELS: st.column_config.TextColumn(COL_CHANNELS, help="Virgülle ayrılmış kanal ID'leri (boş = kategori kanalı)"),
+            COL_DELETE: st.column_config.CheckboxColumn(COL_DELETE, width="small"),
+        },
+    )
+    # Sayfadaki düzenlemeler tüm günün tablosuna işlenir (sayfa/arama değişince kaybolmaz)
+    df_all.loc[edited_page.index, GRID_COLUMNS] = edited_page[GRID_COLUMNS]
+    st.session_state[buffer_key] = df_all
+
+    updates, deletes = diff_day_rows(st.session_state[orig_key], df_all, categories, attachments_all)
+    csave, csort, creset, _ = st.columns([2, 1.6, 1.4, 3])
+    if csave.button(
+        f"💾 Günlük satırları kaydet ({len(updates)} değişiklik, {len(deletes)} silme)",
+        type="primary",
+        disabled=not (updates or deletes),
+        key="day_rows_save",
+    ):
+        db_update_day_rows(selected_day_key, updates, deletes)
+        st.session_state.pop(buffer_key, None)
+        st.success("Kaydedildi ✅")
+        st.rerun()
+    if csort.button("🔢 Sırayı uygula", help="Tabloyu Sıra kolonuna göre dizer (kaydetmeden)"):
+        st.session_state[buffer_key] = arrange(df_all, st.session_state[orig_key])
+        st.session_state["day_rows_ver"] += 1
+        st.rerun()
+    if creset.button("↩️ Geri al", disabled=not (updates or deletes), key="day_rows_reset"):
+        st.session_state.pop(buffer_key, None)
+        st.rerun()
+
+    st.divider()
+
+    # -------- Yeni Satır Ekle --------
+    st.subheader("Yeni Satır Ekle")
+    new_text = st.text_input(
+        "Mesaj",
+        placeholder="Örn: Bugünün Ana Kampanyası {{Kampanya}} Kampanyası Aktif Edildi.",
+        key="new_row_text",
+    )
+    new_cat2 = st.selectbox("Kategori", options=categories, index=0, key="new_row_cat")
+    new_req = st.checkbox("Bu satırda ek zorunlu olsun", value=False, key="new_row_req")
+
+    if st.button("➕ Satırı Ekle"):
+        t = (new_text or "").strip()
+        if not t:
+            st.warning("Mesaj boş olamaz.")
+        else:
+            db_add_day_row(selected_day_key, t, new_cat2, bool(new_req))
+            st.session_state.pop(buffer_key, None)
+            st.success("Satır eklendi ✅")
+            st.rerun()
+
+    st.caption("İpucu: Değişken placeholder `{{Kampanya}}` gibi. Değişken kategorisi satır kategorisiyle aynı olmalı.")
+    st.divider()
+
+    # -------- Değişkenler --------
+    st.subheader("Değişkenler")
+    existing_vars = sorted(list(variables.keys()))
+    pick = st.selectbox("Düzenlemek için mevcut değişken (opsiyonel)", options=["(Yeni)"] + existing_vars, key="var_pick")
+
+    if pick != "(Yeni)":
+        vdef = variables.get(pick, {})
+        default_name = pick
+        default_cat = vdef.get("category", DEFAULT_CATEGORY) if isinstance(vdef, dict) else DEFAULT_CATEGORY
+        default_opts = "\n".join(vdef.get("options", [])) if isinstance(vdef, dict) else ""
+        default_value = vdef.get("default", "") if isinstance(vdef, dict) else ""
+    else:
+        default_name, default_cat, default_opts, default_value = "", DEFAULT_CATEGORY, "", ""
+
+    v1, v2, v3 = st.columns([2, 2, 5])
+    var_name = v1.text_input("Değişken Adı", value=default_name, placeholder="Kampanya", key="var_name")
+    var_cat = v2.selectbox("Kategori", options=categories, index=categories.index(default_cat) if default_cat in categories else 0, key="var_cat")
+    var_opts = v3.text_area("Seçenekler (satır satır)", value=default_opts, height=120, key="var_opts")
+
+    # Zamanlanmış gönderimde (Oto satırlar) kullanılacak değer
+    opts_live = [x.strip() for x in (var_opts or "").splitlines() if x.strip()]
+    default_choices = [""] + opts_live
+    var_default = st.selectbox(
+        "Varsayılan değer (otomatik gönderim)",
+        options=default_choices,
+        index=default_choices.index(default_value) if default_value in default_choices else 0,
+        key=f"var_default_{pick}",
+    )
+
+    bA, bB, _ = st.columns([2, 2, 6])
+    if bA.button("💾 Kaydet / Güncelle", key="var_save", type="primary"):
+        name = (var_name or "").strip()
+        if not name:
+            st.error("Değişken adı boş olamaz.")
+        else:
+            options = [x.strip() for x in (var_opts or "").splitlines() if x.strip()]
+            db_upsert_variable(name, var_cat, options, var_default)
+            st.success(f"Kaydedildi: {name} ✅")
+            st.rerun()
+
+    if bB.button("🗑️ Sil", disabled=(pick == "(Yeni)"), key="var_del"):
+        db_delete_variable(pick)
+        st.success("Silindi ✅")
+        st.rerun()
+
+    st.divider()
+
+    # -------- Ek Presetleri --------
+    st.subheader("Ek Presetleri (Lightshot URL)")
+    existing_atts = sorted(list(attachments_all.keys()))
+    apick = st.selectbox("Düzenlemek için preset (opsiyonel)", options=["(Yeni)"] + existing_atts, key="att_pick")
+
+    if apick != "(Yeni)":
+        adef = attachments_all.get(apick, {})
+        default_att_name = apick
+        default_att_cat = adef.get("category", DEFAULT_CATEGORY) if isinstance(adef, dict) else DEFAULT_CATEGORY
+        default_att_url = adef.get("url", "") if isinstance(adef, dict) else ""
+    else:
+        default_att_name, default_att_cat, default_att_url = "", DEFAULT_CATEGORY, ""
+
+    a1, a2, a3 = st.columns([2, 2, 5])
+    att_name = a1.text_input("Ek Adı", value=default_att_name, placeholder="16 Aralık Limitli", key="att_name")
+    att_cat = a2.selectbox("Kategori", options=categories, index=categories.index(default_att_cat) if default_att_cat in categories else 0, key="att_cat")
+    att_url = a3.text_input("Lightshot / prnt.sc URL", value=default_att_url, placeholder="https://prnt.sc/xxxxxxx", key="att_url")
+
+    inferred_date = extract_tr_date_from_name((att_name or "").strip())
+    if inferred_date:
+        st.caption(f"🗓️ Tarih algılandı: {format_tr_date(inferred_date)} (bu tarihten önce otomatik gizlenir)")
+
+    xA, xB, _ = st.columns([2, 2, 6])
+    if xA.button("💾 Kaydet / Güncelle", key="att_save", type="primary"):
+        n = (att_name or "").strip()
+        u = (att_url or "").strip()
+        if not n or not u:
+            st.error("Ek adı ve URL zorunlu.")
+        else:
+            vdate = extract_tr_date_from_name(n)
+            db_upsert_attachment(n, att_cat, u, vdate)
+            st.success("Eklendi/Güncellendi ✅")
+            st.rerun()
+
+    if xB.button("🗑️ Sil", disabled=(apick == "(Yeni)"), key="att_del"):
+        db_delete_attachment(apick)
+        st.success("Silindi ✅")
+        st.rerun()
+
+    with st.expander("🩺 Preset sağlığı"):
+        st.caption("Aktif preset linkleri arka planda düzenli kontrol edilir; bozuk olanlar gönderimde seçilemez.")
+        health_atts = attachments_all
+        if st.button("🔎 Şimdi kontrol et", key="att_health_check"):
+            with st.spinner("Preset linkleri kontrol ediliyor..."):
+                res = check_presets()
+            if res["broken"]:
+                st.warning(f"Bozuk: {', '.join(res['broken'])}")
+            else:
+                st.success(f"{res['ok']}/{res['presets']} preset sağlam ✅")
+            health_atts = db_get_attachments(include_expired=True)
+        health_rows = [
+            {
+                "Preset": n,
+                "Kategori": a.get("category"),
+                "Durum": "✅ Sağlam" if a.get("status") == PRESET_OK else ("❌ Bozuk" if is_broken(a) else "— Kontrol edilmedi"),
+                "Son kontrol": a["checked_at"].astimezone().strftime("%d.%m %H:%M") if a.get("checked_at") else "",
+                "Hata": a.get("check_error") or "",
+                "Boyut (KB)": round(a["image_bytes"] / 1024, 1) if a.get("image_bytes") else None,
+                "Görsel": a.get("image_url") or "",
+            }
+            for n, a in sorted(health_atts.items())
+            if isinstance(a, dict) and (a.get("valid_date") is None or a["valid_date"] >= TODAY)
+        ]
+        if health_rows:
+            st.dataframe(pd.DataFrame(health_rows), width="stretch", hide_index=True)
+        else:
+            st.write("Aktif preset yok.")
+
+    st.divider()
+
+    # -------- Operatörler --------
+    st.subheader("Operatörler")
+    st.markdown('<div class="small-muted">Parola ve Slack token secrets’ta durur; burada secret adı yazılır (APP_PASSWORD*, SLACK_USER_TOKEN*, SLACK_CHANNEL_ID*). Kanallar boşsa kanal secret’ı kullanılır. Kategoriler boşsa operatör tüm satırları görür.</div>', unsafe_allow_html=True)
+
+    operators_all = registry.all
+    ops_df = pd.DataFrame(
+        [
+            {
+                "Kullanıcı": o["user_key"], "Rol": o["role"], "Parola secret": o["password_secret"],
+                "Token secret": o["token_secret"], "Kanallar": ", ".join(o["default_channels"]),
+                "Kanal secret": o["channel_secret"], "Kategoriler": ", ".join(o["categories"]), "Aktif": o["active"],
+            }
+            for o in operators_all
+        ],
+        columns=["Kullanıcı", "Rol", "Parola secret", "Token secret", "Kanallar", "Kanal secret", "Kategoriler", "Aktif"],
+    )
+    ops_edit = st.data_editor(
+        ops_df,
+        num_rows="dynamic",
+        hide_index=True,
+        width="stretch",
+        key="operators_editor",
+        column_config={
+            "Rol": st.column_config.SelectboxColumn("Rol", options=list(ROLES), required=True),
+            "Aktif": st.column_config.CheckboxColumn("Aktif", default=True),
+        },
+    )
+    if st.button("💾 Operatörleri Kaydet", key="operators_save"):
+        ops_new, ops_errors = [], []
+        for pos, r in enumerate(ops_edit.to_dict("records"), start=1):
+            key = str(r.get("Kullanıcı") or "").strip()
+            if not key:
+                continue
+            cats = [c.strip() for c in str(r.get("Kategoriler") or "").split(",") if c.strip()]
+            unknown = [c for c in cats if c not in categories]
+            if unknown:
+                ops_errors.append(f"{key}: bilinmeyen kategori ({', '.join(unknown)})")
+            if not str(r.get("Parola secret") or "").strip() or not str(r.get("Token secret") or "").strip():
+                ops_errors.append(f"{key}: parola ve token secret adı zorunlu")
+            for col, kind in (("Parola secret", "password"), ("Token secret", "token"), ("Kanal secret", "channel")):
+                name = str(r.get(col) or "").strip()
+                if name and not is_operator_secret(kind, name):
+                    ops_errors.append(f"{key}: {col} {OPERATOR_SECRET_PREFIXES[kind]} önekli olmalı ({name})")
+            ops_new.append((key, r.get("Rol") or "operator", r, cats, bool(r.get("Aktif")), pos))
+        keys_new = [o[0] for o in ops_new]
+        if len(set(keys_new)) != len(keys_new):
+            ops_errors.append("Aynı kullanıcı adı birden fazla kez yazılmış.")
+        if not any(role == "admin" and active for _, role, _, _, active, _ in ops_new):
+            ops_errors.append("En az bir aktif admin kalmalı.")
+        if ops_errors:
+            for e in ops_errors:
+                st.error(e)
+            st.stop()
+        for key, role, r, cats, active, pos in ops_new:
+            db_upsert_operator(
+                key, role, str(r.get("Parola secret") or ""), str(r.get("Token secret") or ""),
+                parse_channels(r.get("Kanallar")), str(r.get("Kanal secret") or ""), cats, active, pos,
+            )
+        for o in operators_all:
+            if o["user_key"] not in keys_new:
+                db_delete_operator(o["user_key"])
+        st.success("Operatörler kaydedildi ✅")
+        st.rerun()
+
+    st.divider()
+
+    # -------- Toplu İçe / Dışa Aktar --------
+    st.subheader("Toplu İçe / Dışa Aktar")
+    st.markdown('<div class="small-muted">Kategoriler, günlük satırlar, değişkenler ve presetler tek pakette. CSV = zip içinde bölüm başına bir dosya. İçe aktarmada paketteki günlerin satırları pakettekilerle değişir; diğer kayıtlar isimle güncellenir.</div>', unsafe_allow_html=True)
+
+    e1, e2, _ = st.columns([1.5, 2, 4])
+    export_fmt = e1.selectbox("Biçim", options=list(BUNDLE_FORMATS), key="bundle_export_fmt")
+    e2.download_button(
+        "⬇️ Dışa aktar",
+        data=lambda: export_file(export_fmt),  # tıklanınca üretilir
+        file_name=f"slack_panel_{TODAY_KEY}.{BUNDLE_FORMAT_EXT[export_fmt]}",
+        mime=BUNDLE_FORMAT_MIME[export_fmt],
+        key="bundle_export",
+    )
+
+    up = st.file_uploader("Paket yükle (.json / .yaml / .zip)", type=["json", "yaml", "yml", "zip"], key="bundle_upload")
+    if up is not None:
+        try:
+            bundle = parse_bundle(up.getvalue(), detect_format(up.name))
+        except BundleError as e:
+            st.error(f"Paket okunamadı: {e}")
+            st.stop()
+
+        st.dataframe(pd.DataFrame([bundle_summary(bundle)]), width="stretch", hide_index=True)
+        bundle_errors = validate_bundle(bundle, categories, variables, attachments_all)
+        if bundle_errors:
+            st.error(f"Paket geçersiz ({len(bundle_errors)} hata), içe aktarılmadı:")
+            for e in bundle_errors[:100]:
+                st.write(f"- {e}")
+        elif st.button("📥 İçe aktar", type="primary", key="bundle_import"):
+            try:
+                import_bundle(bundle)
+            except Exception as e:
+                st.error(f"İçe aktarma başarısız, hiçbir değişiklik yazılmadı: {e}")
+                st.stop()
+            for k in [k for k in st.session_state if str(k).startswith(("day_rows_buffer_", "day_rows_orig_"))]:
+                st.session_state.pop(k, None)
+            st.success("İçe aktarıldı ✅")
+            st.rerun()
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+
+
+
+
+
+
+
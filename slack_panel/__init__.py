@@ -0,0 +1,2 @@
+# slack_panel
+# Panelin Streamlit'ten bağımsız çekirdeği (DB, Slack, gönderim motoru, headless dispatcher).
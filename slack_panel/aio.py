@@ -0,0 +1,229 @@
+# slack_panel/aio.py
+# Asenkron I/O çekirdeği: süreç başına tek event loop (arka plan thread'i), paylaşımlı aiohttp
+# oturumu ve token başına AsyncWebClient. Streamlit script thread'i işi submit() ile loop'a verir;
+# Lightshot indirmeleri, upload'lar ve post'lar aynı loop'ta üst üste biner.
+
+import asyncio
+import atexit
+import re
+import threading
+import time
+from io import BytesIO
+
+import aiohttp
+from slack_sdk.web.async_client import AsyncWebClient
+
+from .cache import get_cache
+
+LIGHTSHOT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+LIGHTSHOT_TIMEOUT = aiohttp.ClientTimeout(total=10)
+MAX_PARALLEL_FETCHES = 8
+# İndirilen görseller paylaşımlı cache'te tutulur (warm-up doldurur, gönderim/link kontrolü okur)
+IMAGE_CACHE_TTL_SECONDS = 12 * 60 * 60
+# prnt.sc sayfası → og:image adresi (görsel adresi değişmez, sayfa isteği tekrar yapılmaz)
+RESOLVED_URL_TTL_SECONDS = 7 * 24 * 60 * 60
+OG_IMAGE_RE = re.compile(r'property="og:image"\s+content="([^"]+)"')
+
+_loop = None
+_loop_lock = threading.Lock()
+_session = None
+_clients: dict[tuple[str, str], AsyncWebClient] = {}
+_fetch_ms: dict[str, int] = {}  # url -> son cached_image_async süresi (ms; cache isabetinde ~0)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="slack-panel-aio", daemon=True).start()
+        return _loop
+
+def submit(coro):
+    # Loop'a iş verir, concurrent.futures.Future döner (UI bekleyip ilerleme gösterebilir)
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+def run(coro, timeout: float | None = None):
+    return submit(coro).result(timeout)
+
+class ProgressFeed:
+    # Uzun işin ilerlemesi: loop'taki iş add() ile yazar, UI (st.fragment) snapshot() ile okur.
+    # Sayaçlar kilitli; iş sürerken script yeniden çalışsa da aynı feed session_state'ten okunur.
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.done = 0
+        self.counts: dict[str, int] = {}
+        self.errors: list[str] = []
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, n: int = 0, outcome: str | None = None, error: str | None = None):
+        # n: tamamlanan iş birimi; outcome: sonuç sayacı (ör. sent / locked); error: kullanıcıya gösterilecek hata
+        with self._lock:
+            self.done += n
+            if outcome:
+                self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            if error:
+                self.errors.append(error)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "done": self.done,
+                "counts": dict(self.counts),
+                "errors": list(self.errors),
+                "elapsed": time.monotonic() - self.started,
+            }
+
+    def fraction(self) -> float:
+        return min(1.0, self.done / self.total) if self.total else 1.0
+
+def _get_session() -> aiohttp.ClientSession:
+    # Sadece loop thread'inde çağrılır; bağlantı havuzu tüm istekler arasında paylaşılır
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+    return _session
+
+@atexit.register
+def _close_session():
+    # Süreç kapanırken açık bağlantıları kapatır ("Unclosed client session" uyarısı olmasın)
+    if _loop is not None and _session is not None and not _session.closed:
+        try:
+            run(_session.close(), timeout=2)
+        except Exception:
+            pass
+
+def get_async_client(client) -> AsyncWebClient:
+    # client: senkron WebClient (token + base_url oradan alınır) → loop'a bağlı AsyncWebClient
+    key = (client.token or "", client.base_url)
+    ac = _clients.get(key)
+    if ac is None:
+        ac = AsyncWebClient(token=client.token, base_url=client.base_url, session=_get_session())
+        _clients[key] = ac
+    return ac
+
+# ================== LIGHTSHOT ==================
+async def _cache_call(fn, *args):
+    # Ağ/disk kullanan cache backend'leri loop'u bloklamasın
+    if get_cache().blocking:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+async def _fetch_lightshot(prnt_url: str, fresh: bool = False):
+    # Dönen: (BytesIO | None, hata metni, geçici_mi, çözülen og:image adresi)
+    # fresh: çözülmüş adres cache'i atlanır, sayfa yeniden okunur (preset sağlık kontrolü)
+    session = _get_session()
+    cache = get_cache()
+    image_url = ""
+    try:
+        if not fresh:
+            resolved = await _cache_call(cache.get, f"ls:{prnt_url}")
+            image_url = resolved.decode("utf-8") if resolved else ""
+        if not image_url:
+            async with session.get(prnt_url, headers=LIGHTSHOT_HEADERS, timeout=LIGHTSHOT_TIMEOUT) as page:
+                if page.status != 200:
+                    return None, f"lightshot sayfa HTTP {page.status}", page.status == 429 or page.status >= 500, ""
+                text = await page.text()
+            match = OG_IMAGE_RE.search(text)
+            if not match:
+                return None, "lightshot og:image yok", False, ""
+            image_url = match.group(1)
+            await _cache_call(cache.set, f"ls:{prnt_url}", image_url.encode("utf-8"), RESOLVED_URL_TTL_SECONDS)
+        async with session.get(image_url, headers=LIGHTSHOT_HEADERS, timeout=LIGHTSHOT_TIMEOUT) as img:
+            if img.status != 200:
+                return None, f"lightshot görsel HTTP {img.status}", img.status == 429 or img.status >= 500, image_url
+            if not img.headers.get("Content-Type", "").startswith("image/"):
+                return None, "lightshot görsel değil", False, image_url
+            return BytesIO(await img.read()), None, False, image_url
+    except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+        return None, f"lightshot: {e.__class__.__name__}", True, image_url
+    except aiohttp.ClientError as e:
+        return None, f"lightshot: {e.__class__.__name__}", False, image_url
+    except Exception as e:
+        return None, f"lightshot: {e}", False, image_url
+
+async def fetch_lightshot_image_async(prnt_url: str):
+    # helpers.fetch_lightshot_image_ex ile aynı sözleşme: (BytesIO | None, hata metni, geçici_mi)
+    bio, err, transient, _ = await _fetch_lightshot(prnt_url)
+    return bio, err, transient
+
+async def cached_image_async(prnt_url: str):
+    # fetch_lightshot_image_async + paylaşımlı cache (başarılı indirmeler TTL boyunca hiçbir replikada tekrar çekilmez)
+    cache = get_cache()
+    t0 = time.monotonic()
+    hit = await _cache_call(cache.get, f"img:{prnt_url}")
+    if hit is not None:
+        _fetch_ms[prnt_url] = int((time.monotonic() - t0) * 1000)
+        return BytesIO(hit), None, False
+    bio, err, transient = await fetch_lightshot_image_async(prnt_url)
+    if bio is not None:
+        await _cache_call(cache.set, f"img:{prnt_url}", bio.getvalue(), IMAGE_CACHE_TTL_SECONDS)
+    _fetch_ms[prnt_url] = int((time.monotonic() - t0) * 1000)
+    return bio, err, transient
+
+def fetch_ms(prnt_url: str) -> int | None:
+    # Gönderim metriği: bu linkin görseli en son kaç ms'de alındı (hiç alınmadıysa None)
+    return _fetch_ms.get(prnt_url)
+
+async def _prefetch(urls: list[str], feed: ProgressFeed | None = None) -> dict:
+    sem = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+
+    async def one(u):
+        async with sem:
+            res = await cached_image_async(u)
+        if feed is not None:
+            feed.add(1)
+        return u, res
+
+    return dict(await asyncio.gather(*(one(u) for u in urls)))
+
+def prefetch_images(urls) -> dict:
+    # Tekil linkleri paralel indirir (cache'te olanlar hemen döner). Dönen: url -> (BytesIO | None, hata, geçici_mi)
+    urls = sorted({u for u in urls if u})
+    if not urls:
+        return {}
+    return run(_prefetch(urls))
+
+def submit_prefetch(urls, feed: ProgressFeed | None = None):
+    # prefetch_images'ın beklemeyen hali: Future döner, feed tamamlanan link sayısını tutar
+    urls = sorted({u for u in urls if u})
+    if feed is not None:
+        feed.total = len(urls)
+    return submit(_prefetch(urls, feed))
+
+async def check_image_async(prnt_url: str) -> dict:
+    # Cache'e bakmadan linki baştan doğrular; başarılıysa görsel cache'i de tazelenir
+    t0 = time.monotonic()
+    bio, err, transient, image_url = await _fetch_lightshot(prnt_url, fresh=True)
+    if bio is not None:
+        await _cache_call(get_cache().set, f"img:{prnt_url}", bio.getvalue(), IMAGE_CACHE_TTL_SECONDS)
+    return {
+        "ok": bio is not None,
+        "error": err,
+        "transient": transient,
+        "image_url": image_url,
+        "bytes": len(bio.getbuffer()) if bio is not None else None,
+        "ms": int((time.monotonic() - t0) * 1000),
+    }
+
+async def _check(urls: list[str]) -> dict:
+    sem = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+
+    async def one(u):
+        async with sem:
+            return u, await check_image_async(u)
+
+    return dict(await asyncio.gather(*(one(u) for u in urls)))
+
+def check_images(urls) -> dict:
+    # Tekil linkleri paralel doğrular. Dönen: url -> check_image_async sonucu
+    urls = sorted({u for u in urls if u})
+    if not urls:
+        return {}
+    return run(_check(urls))
+
+def cached_urls() -> list[str]:
+    # Cache'te geçerli görseli olan linkler (link kontrolü sonucu olarak da kullanılır)
+    return [k[len("img:"):] for k in get_cache().keys("img:")]
@@ -0,0 +1,189 @@
+# slack_panel/archive.py
+# sent_log aylık partition bakımı (migration 7 sonrası):
+#   - ensure_partitions: bu ay + önümüzdeki aylar için partition'lar hazır olur
+#   - compact_old_partitions: saklama süresini (SENT_LOG_RETENTION_MONTHS) aşan aylar
+#     sent_log_daily_summary'ye (gün + kullanıcı sayıları) özetlenir, satırlar ARCHIVE_DIR altına
+#     sıkıştırılmış Parquet olarak yazılır ve partition düşürülür.
+#   - süresi dolmuş paylaşımlı cache kayıtları ve önceki günlerin satır sahiplikleri silinir
+# MaintenanceWorker süreç açılışında ve her gün MAINTENANCE_AT'te çalışır (app.py ve dispatcher).
+#
+#   python -m slack_panel.archive     # bakımı şimdi çalıştır
+
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+from psycopg import sql
+
+from .cache import get_cache
+from .config import get_secret
+from .db import connect, get_conn
+from .helpers import DAY_KEYS, next_run_at
+
+log = logging.getLogger("slack_panel.archive")
+
+PARTITION_MONTHS_AHEAD = 2
+DEFAULT_RETENTION_MONTHS = 6
+DEFAULT_ARCHIVE_DIR = "archive"
+DEFAULT_MAINTENANCE_AT = "03:00"
+
+# Aynı anda iki süreç aynı ayı sıkıştırmasın (pg_advisory_xact_lock anahtarı)
+ARCHIVE_LOCK_ID = 7_310_452
+
+
+def _month_start(d: date, offset: int = 0) -> date:
+    m = d.year * 12 + (d.month - 1) + offset
+    return date(m // 12, m % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"sent_log_y{month.year:04d}m{month.month:02d}"
+
+def is_partitioned(conn=None) -> bool:
+    conn = conn or get_conn()
+    with conn.cursor() as cur:
+        cur.execute("select relkind from pg_class where oid = to_regclass('sent_log')")
+        row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+def ensure_partitions(today: date | None = None, months_ahead: int = PARTITION_MONTHS_AHEAD, conn=None) -> list[str]:
+    # Bu ay ve sonraki months_ahead ay. Dönen: yeni oluşturulan partition adları
+    conn = conn or get_conn()
+    if not is_partitioned(conn):
+        return []
+    today = today or date.today()
+    created = []
+    with conn.cursor() as cur:
+        for i in range(months_ahead + 1):
+            start = _month_start(today, i)
+            name = partition_name(start)
+            cur.execute("select to_regclass(%s)", (name,))
+            if cur.fetchone()[0] is not None:
+                continue
+            cur.execute(
+                sql.SQL("create table if not exists {} partition of sent_log for values from ({}) to ({})").format(
+                    sql.Identifier(name), sql.Literal(start), sql.Literal(_month_start(start, 1)),
+                )
+            )
+            created.append(name)
+    for name in created:
+        log.info("Partition oluşturuldu: %s", name)
+    return created
+
+def list_partitions(conn=None) -> list[tuple[str, date]]:
+    # Dönen: [(partition adı, ay başı)] eskiden yeniye
+    conn = conn or get_conn()
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            select c.relname from pg_inherits i join pg_class c on c.oid = i.inhrelid
+            where i.inhparent = to_regclass('sent_log')
+            """
+        )
+        names = [r[0] for r in cur.fetchall()]
+    out = []
+    for n in names:
+        try:
+            out.append((n, date(int(n[-7:-3]), int(n[-2:]), 1)))
+        except ValueError:
+            continue  # elle eklenmiş, isim düzenine uymayan partition'a dokunma
+    return sorted(out, key=lambda x: x[1])
+
+def compact_partition(name: str, month: date, archive_dir: str, conn=None) -> int:
+    # Ayı özetler, Parquet'e yazar ve partition'ı düşürür. Dönen: arşivlenen satır sayısı (-1: atlandı)
+    conn = conn or get_conn()
+    table = sql.Identifier(name)
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute("select pg_advisory_xact_lock(%s)", (ARCHIVE_LOCK_ID,))
+            cur.execute("select to_regclass(%s)", (name,))
+            if cur.fetchone()[0] is None:
+                return -1  # başka süreç az önce sıkıştırdı
+            cur.execute(sql.SQL("select count(*) from {} where status in ('reserved','retrying')").format(table))
+            if cur.fetchone()[0]:
+                log.warning("Arşiv atlandı (%s): hâlâ açık (reserved/retrying) kayıt var", name)
+                return -1
+
+            cur.execute(sql.SQL("select * from {} order by id").format(table))
+            cols = [c.name for c in cur.description]
+            df = pd.DataFrame(cur.fetchall(), columns=cols)
+
+            cur.execute(
+                sql.SQL(
+                    """
+                    insert into sent_log_daily_summary(sent_date, user_key, sent_count, failed_count, total_count)
+                    select sent_date, coalesce(user_key, ''),
+                           count(*) filter (where status='sent'), count(*) filter (where status='failed'), count(*)
+                    from {}
+                    group by 1, 2
+                    on conflict (sent_date, user_key) do update
+                    set sent_count=excluded.sent_count, failed_count=excluded.failed_count,
+                        total_count=excluded.total_count, archived_at=now()
+                    """
+                ).format(table)
+            )
+
+            # Dosya önce yazılır; transaction commit olmazsa bir sonraki çalıştırma üzerine yazar
+            path = os.path.join(archive_dir, f"sent_log_{month.year:04d}_{month.month:02d}.parquet")
+            if len(df):
+                os.makedirs(archive_dir, exist_ok=True)
+                tmp = path + ".tmp"
+                df.to_parquet(tmp, index=False, compression="zstd")
+                os.replace(tmp, path)
+
+            cur.execute(sql.SQL("alter table sent_log detach partition {}").format(table))
+            cur.execute(sql.SQL("drop table {}").format(table))
+    log.info("Arşivlendi: %s (%s satır) → %s", name, len(df), path if len(df) else "-")
+    return len(df)
+
+def compact_old_partitions(today: date | None = None, retention_months: int | None = None, archive_dir: str | None = None, conn=None) -> dict:
+    # Saklama penceresi: bu ay + önceki retention_months ay canlı kalır. Dönen: partition -> satır sayısı
+    conn = conn or get_conn()
+    if not is_partitioned(conn):
+        return {}
+    today = today or date.today()
+    if retention_months is None:
+        retention_months = int(get_secret("SENT_LOG_RETENTION_MONTHS", str(DEFAULT_RETENTION_MONTHS)) or DEFAULT_RETENTION_MONTHS)
+    archive_dir = archive_dir or get_secret("ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR)
+    cutoff = _month_start(today, -retention_months)
+
+    done = {}
+    for name, month in list_partitions(conn):
+        if month >= cutoff:
+            break
+        done[name] = compact_partition(name, month, archive_dir, conn=conn)
+    return done
+
+def run_maintenance(today: date | None = None) -> dict:
+    with connect() as conn:
+        created = ensure_partitions(today, conn=conn)
+        compacted = compact_old_partitions(today, conn=conn)
+        conn.execute("delete from row_claims where claim_date < current_date")
+    purged = get_cache().purge()
+    return {"created": created, "compacted": compacted, "cache_purged": purged}
+
+class MaintenanceWorker(threading.Thread):
+    # Süreç başına bir tane: açılışta hemen, sonra her gün "at" saatinde run_maintenance
+    def __init__(self, at: str = DEFAULT_MAINTENANCE_AT):
+        super().__init__(name="slack-maintenance-worker", daemon=True)
+        self.at = at
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                run_maintenance()
+            except Exception:
+                log.exception("sent_log bakımı başarısız")
+            wait = (next_run_at(datetime.now(), self.at, list(DAY_KEYS)) - datetime.now()).total_seconds()
+            if self._stop_event.wait(max(0.0, wait)):
+                return
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    log.info("Bakım: %s", run_maintenance())
@@ -0,0 +1,461 @@
+# slack_panel/bundle.py
+# Tüm konfigürasyonun (kategoriler + kanalları, günlük satırlar, değişkenler + seçenekleri, ek presetleri)
+# toplu dışa/içe aktarımı. Biçimler:
+#   json / yaml : tek dosya; değişken seçenekleri "options" listesi olarak değişkenin içinde
+#   csv         : zip içinde bölüm başına bir CSV (categories.csv, day_rows.csv, ...)
+#
+#   python -m slack_panel.bundle export --format json -o config.json
+#   python -m slack_panel.bundle import config.json [--dry-run]
+#
+# İçe aktarma: önce tüm paket doğrulanır, sonra tek transaction'da COPY ile geçici staging
+# tablolarına yüklenir ve tek seferde birleştirilir. Paketteki günlerin satırları pakettekilerle
+# değişir (eski satırlar pasife alınır); kategori/değişken/preset'ler isimle upsert edilir.
+
+import argparse
+import csv
+import io
+import json
+import sys
+import tempfile
+import zipfile
+from datetime import date
+
+from .cache import bump_config
+from .db import connect, db_get_attachments, db_get_categories, db_get_variables
+from .helpers import DAY_KEYS, DEFAULT_CATEGORY, extract_tr_date_from_name, extract_vars, parse_channels
+
+BUNDLE_VERSION = 1
+FORMATS = ("json", "yaml", "csv")
+FORMAT_MIME = {"json": "application/json", "yaml": "application/x-yaml", "csv": "application/zip"}
+FORMAT_EXT = {"json": "json", "yaml": "yaml", "csv": "zip"}
+
+# Bölüm -> kolonlar (CSV başlıkları ve staging tabloları bu sırayla)
+SECTIONS = {
+    "categories": ["name", "channels"],
+    "day_rows": [
+        "day_key", "position", "text", "category", "requires_attachment", "auto_send", "default_attachment", "channels",
+    ],
+    "variables": ["name", "category", "default_value"],
+    "variable_options": ["variable_name", "position", "value"],
+    "attachments": ["name", "category", "url", "valid_date"],
+}
+
+# Dışa aktarım sorguları (CSV'de COPY ... TO STDOUT ile doğrudan akar)
+EXPORT_QUERIES = {
+    "categories": """
+        select c.name, array_to_string(array_agg(cc.channel_id order by cc.channel_id)
+                                       filter (where cc.channel_id is not null), ',') as channels
+        from categories c left join category_channels cc on cc.category_id = c.id
+        group by c.name order by c.name
+    """,
+    "day_rows": """
+        select d.day_key, d.position, d.text, c.name as category, coalesce(d.requires_attachment, false),
+               d.auto_send, coalesce(d.default_attachment, ''), array_to_string(d.channels, ',')
+        from day_rows d join categories c on c.id = d.category_id
+        where d.active
+        order by array_position(array['monday','tuesday','wednesday','thursday','friday','saturday','sunday'], d.day_key),
+                 d.position nulls last, d.id
+    """,
+    "variables": """
+        select v.name, c.name, coalesce(v.default_value, '')
+        from variables v join categories c on c.id = v.category_id order by v.name
+    """,
+    "variable_options": """
+        select variable_name, row_number() over (partition by variable_name order by id), value
+        from variable_options order by variable_name, id
+    """,
+    "attachments": """
+        select a.name, c.name, a.url, a.valid_date
+        from attachments a join categories c on c.id = a.category_id order by a.name
+    """,
+}
+
+_TRUE = {"1", "t", "true", "yes", "evet", "x", "✓"}
+
+
+class BundleError(ValueError):
+    pass
+
+
+# ================== EXPORT ==================
+def write_export(fp, fmt: str, conn=None):
+    # fp: ikili (binary) dosya benzeri. Satırlar DB'den parça parça okunup yazılır.
+    if fmt not in FORMATS:
+        raise BundleError(f"Bilinmeyen biçim: {fmt}")
+    own = conn is None
+    conn = conn or connect()
+    try:
+        if fmt == "csv":
+            _export_csv_zip(fp, conn)
+        elif fmt == "json":
+            _export_json(fp, conn)
+        else:
+            _export_yaml(fp, conn)
+    finally:
+        if own:
+            conn.close()
+
+def export_file(fmt: str, conn=None) -> io.BufferedReader:
+    # Dışa aktarım geçici dosyaya yazılır (bellekte BytesIO tutulmaz), baştan okunacak dosya döner.
+    # st.download_button dosyayı media storage'a tek parça okur; bu kopya akıtılamaz ama ikincisi oluşmaz.
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_export(tmp, fmt, conn)
+        tmp.flush()
+    except BaseException:
+        tmp.close()
+        raise
+    raw = tmp.detach()
+    raw.seek(0)
+    return io.BufferedReader(raw)
+
+def _export_csv_zip(fp, conn):
+    with zipfile.ZipFile(fp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for section, query in EXPORT_QUERIES.items():
+            with zf.open(f"{section}.csv", "w") as out, conn.cursor() as cur:
+                out.write((",".join(SECTIONS[section]) + "\n").encode())
+                with cur.copy(f"copy ({query}) to stdout with (format csv)") as copy:
+                    for chunk in copy:
+                        out.write(chunk)
+
+def _iter_section(conn, section: str, batch: int = 500):
+    cols = SECTIONS[section]
+    with conn.cursor() as cur:
+        cur.execute(EXPORT_QUERIES[section])
+        while rows := cur.fetchmany(batch):
+            for r in rows:
+                yield dict(zip(cols, r))
+
+def _export_record(section: str, rec: dict, options: dict) -> dict:
+    # JSON/YAML görünümü: kanallar liste, tarih ISO, değişken seçenekleri iç içe
+    rec = dict(rec)
+    if "channels" in rec:
+        rec["channels"] = parse_channels(rec["channels"])
+    if section == "attachments":
+        rec["valid_date"] = rec["valid_date"].isoformat() if rec["valid_date"] else None
+    if section == "variables":
+        rec["options"] = options.get(rec["name"], [])
+    return rec
+
+def _export_json(fp, conn):
+    options = {}
+    for o in _iter_section(conn, "variable_options"):
+        options.setdefault(o["variable_name"], []).append(o["value"])
+    w = io.TextIOWrapper(fp, encoding="utf-8", write_through=True)
+    w.write('{\n  "version": %d' % BUNDLE_VERSION)
+    for section in ("categories", "variables", "attachments", "day_rows"):
+        w.write(f',\n  "{section}": [')
+        for i, rec in enumerate(_iter_section(conn, section)):
+            w.write(("," if i else "") + "\n    " + json.dumps(_export_record(section, rec, options), ensure_ascii=False))
+        w.write("\n  ]")
+    w.write("\n}\n")
+    w.detach()
+
+def _export_yaml(fp, conn):
+    yaml = _yaml()
+    options = {}
+    for o in _iter_section(conn, "variable_options"):
+        options.setdefault(o["variable_name"], []).append(o["value"])
+    fp.write(f"version: {BUNDLE_VERSION}\n".encode())
+    for section in ("categories", "variables", "attachments", "day_rows"):
+        recs = [_export_record(section, rec, options) for rec in _iter_section(conn, section)]
+        fp.write(yaml.safe_dump({section: recs}, allow_unicode=True, sort_keys=False).encode("utf-8"))
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise BundleError("YAML için PyYAML kurulu değil (pip install pyyaml).")
+    return yaml
+
+# ================== PARSE ==================
+def detect_format(filename: str) -> str:
+    ext = (filename or "").rsplit(".", 1)[-1].lower()
+    if ext in ("yml", "yaml"):
+        return "yaml"
+    if ext in ("zip", "csv"):
+        return "csv"
+    return "json"
+
+def parse_bundle(data: bytes, fmt: str) -> dict:
+    # Dönen: bölüm -> normalize edilmiş satır listesi (düz tablo biçimi)
+    if fmt == "csv":
+        raw = _read_csv_zip(data)
+    else:
+        try:
+            doc = json.loads(data.decode("utf-8-sig")) if fmt == "json" else _yaml().safe_load(data.decode("utf-8-sig"))
+        except Exception as e:
+            raise BundleError(f"Dosya okunamadı: {e}")
+        if not isinstance(doc, dict):
+            raise BundleError("Paket bir nesne (bölüm → liste) olmalı.")
+        if int(doc.get("version", BUNDLE_VERSION) or BUNDLE_VERSION) != BUNDLE_VERSION:
+            raise BundleError(f"Desteklenmeyen paket sürümü: {doc.get('version')}")
+        raw = {s: list(doc.get(s) or []) for s in SECTIONS}
+        # İç içe seçenekler düz bölüme açılır
+        for v in raw["variables"]:
+            if isinstance(v, dict) and "options" in v:
+                for i, o in enumerate(v.get("options") or [], start=1):
+                    raw["variable_options"].append({"variable_name": v.get("name"), "position": i, "value": o})
+
+    for section, recs in raw.items():
+        if not all(isinstance(r, dict) for r in recs):
+            raise BundleError(f"{section}: her kayıt bir nesne olmalı.")
+    return {section: [_normalize(section, r) for r in raw.get(section, [])] for section in SECTIONS}
+
+def _read_csv_zip(data: bytes) -> dict:
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise BundleError("CSV paketi bir zip olmalı (bölüm başına bir .csv).")
+    raw = {s: [] for s in SECTIONS}
+    names = {n.rsplit("/", 1)[-1].lower(): n for n in zf.namelist()}
+    for section in SECTIONS:
+        n = names.get(f"{section}.csv")
+        if not n:
+            continue
+        with zf.open(n) as f:
+            raw[section] = list(csv.DictReader(io.TextIOWrapper(f, encoding="utf-8-sig")))
+    return raw
+
+def _as_bool(v) -> bool:
+    if isinstance(v, bool):
+        return v
+    return str(v or "").strip().lower() in _TRUE
+
+def _as_int(v):
+    try:
+        return int(float(v)) if str(v).strip() not in ("", "None") else None
+    except (TypeError, ValueError):
+        return None
+
+def _as_date(v):
+    if isinstance(v, date) or v is None:
+        return v
+    s = str(v).strip()
+    if not s or s == "None":
+        return None
+    try:
+        return date.fromisoformat(s)
+    except ValueError:
+        return "invalid"
+
+def _normalize(section: str, r: dict) -> dict:
+    def s(k):
+        return str(r.get(k) if r.get(k) is not None else "").strip()
+
+    if section == "categories":
+        return {"name": s("name"), "channels": parse_channels(r.get("channels"))}
+    if section == "day_rows":
+        return {
+            "day_key": s("day_key").lower(), "position": _as_int(r.get("position")), "text": s("text"),
+            "category": s("category") or DEFAULT_CATEGORY, "requires_attachment": _as_bool(r.get("requires_attachment")),
+            "auto_send": _as_bool(r.get("auto_send")), "default_attachment": s("default_attachment"),
+            "channels": parse_channels(r.get("channels")),
+        }
+    if section == "variables":
+        return {"name": s("name"), "category": s("category") or DEFAULT_CATEGORY, "default_value": s("default_value") or s("default")}
+    if section == "variable_options":
+        return {"variable_name": s("variable_name"), "position": _as_int(r.get("position")), "value": s("value")}
+    name = s("name")
+    vdate = _as_date(r.get("valid_date")) if r.get("valid_date") not in (None, "") else extract_tr_date_from_name(name)
+    return {"name": name, "category": s("category") or DEFAULT_CATEGORY, "url": s("url"), "valid_date": vdate}
+
+# ================== VALIDATE ==================
+def validate_bundle(b: dict, categories=None, variables=None, attachments=None) -> list[str]:
+    # Paket + DB'deki mevcut kayıtlar birlikte değerlendirilir. Dönen: hata satırları (boş = geçerli)
+    categories = db_get_categories() if categories is None else categories
+    variables = db_get_variables() if variables is None else variables
+    attachments = db_get_attachments(include_expired=True) if attachments is None else attachments
+    errors = []
+
+    def dupes(section, key):
+        seen = set()
+        for i, r in enumerate(b[section], start=1):
+            k = r[key] if isinstance(key, str) else tuple(r[x] for x in key)
+            if k in seen:
+                errors.append(f"{section} #{i}: tekrar eden kayıt ({k})")
+            seen.add(k)
+
+    for i, c in enumerate(b["categories"], start=1):
+        if not c["name"]:
+            errors.append(f"categories #{i}: ad boş")
+    dupes("categories", "name")
+    all_cats = set(categories) | {c["name"] for c in b["categories"]} | {DEFAULT_CATEGORY}
+
+    var_cat = {n: str((v or {}).get("category") or DEFAULT_CATEGORY) for n, v in variables.items()}
+    bundle_opts = {}
+    for o in b["variable_options"]:
+        bundle_opts.setdefault(o["variable_name"], []).append(o["value"])
+    for i, v in enumerate(b["variables"], start=1):
+        if not v["name"]:
+            errors.append(f"variables #{i}: ad boş")
+        if v["category"] not in all_cats:
+            errors.append(f"variables #{i} ({v['name']}): kategori yok ({v['category']})")
+        if v["default_value"] and v["default_value"] not in bundle_opts.get(v["name"], []):
+            errors.append(f"variables #{i} ({v['name']}): varsayılan değer seçeneklerde yok")
+        var_cat[v["name"]] = v["category"]
+    dupes("variables", "name")
+    bundle_vars = {v["name"] for v in b["variables"]}
+    for i, o in enumerate(b["variable_options"], start=1):
+        if o["variable_name"] not in bundle_vars:
+            errors.append(f"variable_options #{i}: değişken pakette yok ({o['variable_name']})")
+        if not o["value"]:
+            errors.append(f"variable_options #{i}: değer boş")
+
+    att_cat = {n: str((a or {}).get("category") or DEFAULT_CATEGORY) for n, a in attachments.items()}
+    for i, a in enumerate(b["attachments"], start=1):
+        if not a["name"] or not a["url"]:
+            errors.append(f"attachments #{i}: ad ve url zorunlu")
+        if a["category"] not in all_cats:
+            errors.append(f"attachments #{i} ({a['name']}): kategori yok ({a['category']})")
+        if a["valid_date"] == "invalid":
+            errors.append(f"attachments #{i} ({a['name']}): valid_date YYYY-AA-GG olmalı")
+        att_cat[a["name"]] = a["category"]
+    dupes("attachments", "name")
+
+    for i, r in enumerate(b["day_rows"], start=1):
+        label = f"day_rows #{i}"
+        if r["day_key"] not in DAY_KEYS:
+            errors.append(f"{label}: geçersiz day_key ({r['day_key']})")
+        if not r["text"]:
+            errors.append(f"{label}: metin boş")
+        if r["category"] not in all_cats:
+            errors.append(f"{label}: kategori yok ({r['category']})")
+        for v in extract_vars(r["text"]):
+            if v not in var_cat:
+                errors.append(f"{label}: değişken tanımlı değil ({v})")
+            elif var_cat[v] != r["category"]:
+                errors.append(f"{label}: değişken kategori uyumsuz ({v}/{var_cat[v]})")
+        if r["default_attachment"]:
+            if r["default_attachment"] not in att_cat:
+                errors.append(f"{label}: varsayılan ek yok ({r['default_attachment']})")
+            elif att_cat[r["default_attachment"]] != r["category"]:
+                errors.append(f"{label}: varsayılan ek kategori uyumsuz ({r['default_attachment']})")
+    return errors
+
+def bundle_summary(b: dict) -> dict:
+    return {
+        "Kategori": len(b["categories"]),
+        "Günlük satır": len(b["day_rows"]),
+        "Gün": len({r["day_key"] for r in b["day_rows"]}),
+        "Değişken": len(b["variables"]),
+        "Seçenek": len(b["variable_options"]),
+        "Preset": len(b["attachments"]),
+    }
+
+# ================== IMPORT ==================
+STAGING_DDL = """
+    create temp table stg_categories (name text, channels text[]) on commit drop;
+    create temp table stg_day_rows (
+        day_key text, position int, text text, category text, requires_attachment boolean, auto_send boolean,
+        default_attachment text, channels text[]
+    ) on commit drop;
+    create temp table stg_variables (name text, category text, default_value text) on commit drop;
+    create temp table stg_variable_options (variable_name text, position int, value text) on commit drop;
+    create temp table stg_attachments (name text, category text, url text, valid_date date) on commit drop;
+"""
+
+MERGE_SQL = [
+    "insert into categories(name) select name from stg_categories on conflict do nothing",
+    # Paketteki satır/değişken/preset'lerin kategorileri de var olsun (Genel dahil)
+    """
+    insert into categories(name)
+    select distinct category from (
+        select category from stg_day_rows union select category from stg_variables
+        union select category from stg_attachments
+    ) x where category is not null
+    on conflict do nothing
+    """,
+    """
+    delete from category_channels
+    where category_id in (select c.id from categories c join stg_categories s on s.name = c.name)
+    """,
+    """
+    insert into category_channels(category_id, channel_id)
+    select c.id, unnest(s.channels) from stg_categories s join categories c on c.name = s.name
+    where s.channels is not null
+    on conflict do nothing
+    """,
+    """
+    insert into variables(name, category_id, default_value)
+    select s.name, c.id, nullif(s.default_value, '') from stg_variables s join categories c on c.name = s.category
+    on conflict (name) do update set category_id=excluded.category_id, default_value=excluded.default_value
+    """,
+    "delete from variable_options where variable_name in (select name from stg_variables)",
+    """
+    insert into variable_options(variable_name, value)
+    select variable_name, value from stg_variable_options
+    order by variable_name, position nulls last
+    """,
+    """
+    insert into attachments(name, category_id, url, valid_date)
+    select s.name, c.id, s.url, s.valid_date from stg_attachments s join categories c on c.name = s.category
+    on conflict (name) do update set category_id=excluded.category_id, url=excluded.url, valid_date=excluded.valid_date
+    """,
+    # Paketteki günler tamamen pakettekilerle değişir (eskiler pasif: sent_log referansları korunur)
+    "update day_rows set active=false where active and day_key in (select distinct day_key from stg_day_rows)",
+    """
+    insert into day_rows(day_key, text, category_id, requires_attachment, active, auto_send, default_attachment, channels, position)
+    select s.day_key, s.text, c.id, s.requires_attachment, true, s.auto_send, nullif(s.default_attachment, ''),
+           case when cardinality(s.channels) > 0 then s.channels end,
+           row_number() over (partition by s.day_key order by s.position nulls last, s.ord)
+    from (select *, row_number() over () as ord from stg_day_rows) s join categories c on c.name = s.category
+    """,
+]
+
+def import_bundle(b: dict, conn=None) -> dict:
+    # Tek transaction: staging'e COPY + birleştirme. Hata olursa hiçbir şey yazılmaz.
+    own = conn is None
+    conn = conn or connect()
+    try:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(STAGING_DDL)
+                for section, cols in SECTIONS.items():
+                    if not b[section]:
+                        continue
+                    with cur.copy(f"copy stg_{section} ({', '.join(cols)}) from stdin") as copy:
+                        for rec in b[section]:
+                            copy.write_row([rec[c] if rec[c] != [] else None for c in cols])
+                for stmt in MERGE_SQL:
+                    cur.execute(stmt)
+    finally:
+        if own:
+            conn.close()
+    bump_config()
+    return bundle_summary(b)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m slack_panel.bundle", description="Konfigürasyon dışa/içe aktarımı")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    pe = sub.add_parser("export", help="Konfigürasyonu dışa aktar")
+    pe.add_argument("--format", choices=FORMATS, default="json")
+    pe.add_argument("-o", "--output", help="Dosya (boş = stdout)")
+    pi = sub.add_parser("import", help="Paketi doğrula ve içe aktar")
+    pi.add_argument("path")
+    pi.add_argument("--format", choices=FORMATS, help="Boş = uzantıdan")
+    pi.add_argument("--dry-run", action="store_true", help="Sadece doğrula")
+    args = p.parse_args(argv)
+
+    if args.cmd == "export":
+        if args.output:
+            with open(args.output, "wb") as f:
+                write_export(f, args.format)
+        else:
+            write_export(sys.stdout.buffer, args.format)
+        return
+
+    with open(args.path, "rb") as f:
+        data = f.read()
+    b = parse_bundle(data, args.format or detect_format(args.path))
+    errors = validate_bundle(b)
+    if errors:
+        raise SystemExit("Paket geçersiz:\n" + "\n".join(errors))
+    if args.dry_run:
+        print("Geçerli:", bundle_summary(b))
+        return
+    print("İçe aktarıldı:", import_bundle(b))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+# slack_panel/cache.py
+# Paylaşımlı cache katmanı: birden çok Streamlit replikası aynı görseli / konfigürasyonu ayrı ayrı
+# çekmesin diye. CACHE_BACKEND secret'ı ile seçilir:
+#   memory   (varsayılan) süreç içi sözlük — tek replika
+#   disk     CACHE_DIR altında dosya başına bir kayıt (replikalar ortak diski paylaşıyorsa)
+#   postgres UNLOGGED cache_entries tablosu (migration 12; WAL yazmaz, çökmede boşalır)
+#   redis    CACHE_URL (redis://host:6379/0); redis-py gerekir, Redis protokolü konuşan her sunucu olur
+# Tutulanlar:
+#   img:<prnt.sc link>  görsel byte'ları (aio.cached_image_async)
+#   ls:<prnt.sc link>   sayfadan çözülmüş og:image adresi
+#   cfg:<gen>:<anahtar> konfigürasyon okumaları (offline.read_through); ayar yazan her çağrı
+#                       bump_config ile nesli değiştirir, tüm replikalar bir sonraki okumada tazeler
+# Cache hatası (Redis/DB kapalı) gönderimi durdurmaz: uyarı loglanır, kayıt yok sayılır.
+# Nesneler (get_obj/set_obj) JSON olarak tutulur, pickle değil: paylaşımlı cache'e yazabilen biri
+# okuyan süreçte kod çalıştıramasın. date/datetime/bytes/tuple/set ve str olmayan sözlük anahtarları
+# "__t" etiketiyle saklanır; bunların dışındaki tipler cache'lenmez.
+
+import base64
+import functools
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+from .config import get_secret
+
+log = logging.getLogger("slack_panel.cache")
+
+DEFAULT_CACHE_DIR = "cache"
+CONFIG_CACHE_TTL_SECONDS = 60
+CONFIG_GEN_KEY = "cfg:gen"
+
+# ---------------- JSON kodlama ----------------
+_TAG = "__t"
+
+def _encode(o):
+    if o is None or isinstance(o, (str, bool, int, float)):
+        return o
+    if isinstance(o, datetime):
+        return {_TAG: "datetime", "v": o.isoformat()}
+    if isinstance(o, date):
+        return {_TAG: "date", "v": o.isoformat()}
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return {_TAG: "bytes", "v": base64.b64encode(bytes(o)).decode("ascii")}
+    if isinstance(o, tuple):
+        return {_TAG: "tuple", "v": [_encode(x) for x in o]}
+    if isinstance(o, (set, frozenset)):
+        return {_TAG: "set", "v": [_encode(x) for x in o]}
+    if isinstance(o, list):
+        return [_encode(x) for x in o]
+    if isinstance(o, dict):
+        if _TAG not in o and all(isinstance(k, str) for k in o):
+            return {k: _encode(v) for k, v in o.items()}
+        return {_TAG: "dict", "v": [[_encode(k), _encode(v)] for k, v in o.items()]}
+    raise TypeError(f"cache'lenemeyen tip: {type(o).__name__}")
+
+def _decode(o):
+    if isinstance(o, list):
+        return [_decode(x) for x in o]
+    if not isinstance(o, dict):
+        return o
+    tag = o.get(_TAG)
+    if tag is None:
+        return {k: _decode(v) for k, v in o.items()}
+    v = o["v"]
+    if tag == "datetime":
+        return datetime.fromisoformat(v)
+    if tag == "date":
+        return date.fromisoformat(v)
+    if tag == "bytes":
+        return base64.b64decode(v)
+    if tag == "tuple":
+        return tuple(_decode(x) for x in v)
+    if tag == "set":
+        return {_decode(x) for x in v}
+    if tag == "dict":
+        return {_decode(k): _decode(x) for k, x in v}
+    raise ValueError(f"bilinmeyen etiket: {tag}")
+
+def dumps(value) -> bytes:
+    return json.dumps(_encode(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads(raw: bytes):
+    return _decode(json.loads(raw))
+
+
+class CacheBackend:
+    # Alt sınıflar _get/_set/_delete/_keys/_purge yazar; hata yönetimi ve JSON kodlama burada
+    name = "base"
+    blocking = False  # True: ağ/disk I/O yapar, event loop'tan thread'e alınmalı
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self._get(key)
+        except Exception as e:
+            log.warning("Cache okunamadı (%s, %s): %s", self.name, key, e)
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float | None = None):
+        try:
+            self._set(key, bytes(value), ttl)
+        except Exception as e:
+            log.warning("Cache yazılamadı (%s, %s): %s", self.name, key, e)
+
+    def delete(self, key: str):
+        try:
+            self._delete(key)
+        except Exception as e:
+            log.warning("Cache silinemedi (%s, %s): %s", self.name, key, e)
+
+    def keys(self, prefix: str) -> list[str]:
+        # Süresi dolmamış anahtarlar
+        try:
+            return self._keys(prefix)
+        except Exception as e:
+            log.warning("Cache listelenemedi (%s, %s): %s", self.name, prefix, e)
+            return []
+
+    def purge(self) -> int:
+        # Süresi dolmuş kayıtları siler (bakım işi çağırır). Dönen: silinen sayısı
+        try:
+            return self._purge()
+        except Exception as e:
+            log.warning("Cache temizlenemedi (%s): %s", self.name, e)
+            return 0
+
+    def get_obj(self, key: str):
+        # Dönen: (bulundu_mu, değer)
+        raw = self.get(key)
+        if raw is None:
+            return False, None
+        try:
+            return True, loads(raw)
+        except Exception:
+            return False, None
+
+    def set_obj(self, key: str, value, ttl: float | None = None):
+        try:
+            raw = dumps(value)
+        except (TypeError, ValueError) as e:
+            log.warning("Cache'e yazılmadı (%s, %s): %s", self.name, key, e)
+            self.delete(key)  # eski değer bayat kalmasın
+            return
+        self.set(key, raw, ttl)
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+    def _keys(self, prefix):
+        raise NotImplementedError
+
+    def _purge(self):
+        return 0
+
+# ---------------- memory ----------------
+class MemoryCache(CacheBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._data: dict[str, tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        value, expires = hit
+        if expires is not None and expires <= time.time():
+            with self._lock:
+                self._data.pop(key, None)
+            return None
+        return value
+
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def _delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _keys(self, prefix):
+        now = time.time()
+        return [k for k, (_, exp) in list(self._data.items()) if k.startswith(prefix) and (exp is None or exp > now)]
+
+    def _purge(self):
+        now = time.time()
+        with self._lock:
+            dead = [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]
+            for k in dead:
+                del self._data[k]
+        return len(dead)
+
+# ---------------- disk ----------------
+class DiskCache(CacheBackend):
+    # Dosya adı anahtardan gelir: "k-<base64url(anahtar)>" (uzun anahtarlar "h-<sha256>").
+    # İçerik: JSON başlık satırı [anahtar, bitiş] + "\n" + değer byte'ları.
+    # keys() önce dosya adından önekle eler, sonra sadece eşleşenlerin başlık satırını okur (görsel gövdesi
+    # okunmaz). Yazma geçici dosya + os.replace (okuyan yarım dosya görmez). Eski biçimdeki (pickle)
+    # dosyalar okunmaz, purge ile silinir.
+    name = "disk"
+    blocking = True
+    MAX_NAME_KEY = 180
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _name(self, key):
+        enc = base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+        if len(enc) <= self.MAX_NAME_KEY:
+            return "k-" + enc
+        return "h-" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, self._name(key))
+
+    @staticmethod
+    def _name_key(name):
+        # "k-" adından anahtar ("h-" adlarında anahtar sadece başlıkta)
+        enc = name[2:]
+        return base64.urlsafe_b64decode(enc + "=" * (-len(enc) % 4)).decode("utf-8")
+
+    @staticmethod
+    def _read_header(f):
+        try:
+            key, expires = json.loads(f.readline())
+        except ValueError:
+            return None
+        return key, expires
+
+    def _get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                head = self._read_header(f)
+                if head is None or head[0] != key:
+                    return None
+                if head[1] is not None and head[1] <= time.time():
+                    return None
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _set(self, key, value, ttl):
+        head = json.dumps([key, time.time() + ttl if ttl else None], ensure_ascii=True).encode("ascii")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(head + b"\n")
+                f.write(value)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _delete(self, key):
+        self._delete_path(self._path(key))
+
+    def _entries(self, prefix: str = ""):
+        # (yol, anahtar, bitiş); önek dosya adından elenir, başlık sadece adayda okunur
+        for name in os.listdir(self.directory):
+            if name.startswith("k-"):
+                try:
+                    key = self._name_key(name)
+                except ValueError:
+                    continue
+                if not key.startswith(prefix):
+                    continue
+            elif not name.startswith("h-"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    head = self._read_header(f)
+            except FileNotFoundError:
+                continue
+            if head is not None and head[0].startswith(prefix):
+                yield path, head[0], head[1]
+
+    def _keys(self, prefix):
+        now = time.time()
+        return [k for _, k, exp in self._entries(prefix) if exp is None or exp > now]
+
+    def _purge(self):
+        now = time.time()
+        n = 0
+        for path, _, exp in self._entries():
+            if exp is not None and exp <= now:
+                self._delete_path(path)
+                n += 1
+        for name in os.listdir(self.directory):
+            if not name.startswith(("k-", "h-", ".tmp-")):
+                self._delete_path(os.path.join(self.directory, name))  # eski biçim
+                n += 1
+        return n
+
+    @staticmethod
+    def _delete_path(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+# ---------------- postgres ----------------
+class PostgresCache(CacheBackend):
+    # Kendi bağlantısı (db.connect): aio thread'lerinden gelen sık get/set'ler sorguları paylaşımlı
+    # bağlantıda (db.get_conn) sıraya sokmaz. Tablo migration 12 ile gelir.
+    # DB kesintisinde (offline modu) her çağrı DB_CONNECT_TIMEOUT beklemesin diye süreç içi cache'e düşer;
+    # bağlantı gelince paylaşımlı tabloya dönülür (kesinti sırasında yazılanlar yerelde kalır, TTL ile düşer).
+    name = "postgres"
+    blocking = True
+
+    def __init__(self):
+        self._fallback = MemoryCache()
+        self._conn = None
+        self._conn_lock = threading.Lock()
+
+    def _cur(self):
+        from .db import connect
+        with self._conn_lock:
+            if self._conn is None or self._conn.closed or self._conn.broken:
+                self._conn = connect()
+            return self._conn.cursor()
+
+    def close(self):
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _run(self, op: str, *args):
+        from . import offline
+        if offline.is_offline():
+            return getattr(self._fallback, op)(*args)
+        try:
+            return getattr(self, "_pg" + op)(*args)
+        except Exception as e:
+            if not offline.is_connection_error(e):
+                raise
+            offline.mark_offline(e)
+            return getattr(self._fallback, op)(*args)
+
+    def _get(self, key):
+        return self._run("_get", key)
+
+    def _set(self, key, value, ttl):
+        return self._run("_set", key, value, ttl)
+
+    def _delete(self, key):
+        return self._run("_delete", key)
+
+    def _keys(self, prefix):
+        return self._run("_keys", prefix)
+
+    def _purge(self):
+        return self._run("_purge")
+
+    def _pg_get(self, key):
+        with self._cur() as cur:
+            cur.execute(
+                "select value from cache_entries where key=%s and (expires_at is null or expires_at > now())",
+                (key,),
+            )
+            row = cur.fetchone()
+        return bytes(row[0]) if row else None
+
+    def _pg_set(self, key, value, ttl):
+        with self._cur() as cur:
+            cur.execute(
+                """
+                insert into cache_entries(key, value, expires_at)
+                values (%s, %s, case when %s::float8 is null then null else now() + make_interval(secs => %s) end)
+                on conflict (key) do update set value=excluded.value, expires_at=excluded.expires_at
+                """,
+                (key, value, ttl, ttl),
+            )
+
+    def _pg_delete(self, key):
+        with self._cur() as cur:
+            cur.execute("delete from cache_entries where key=%s", (key,))
+
+    def _pg_keys(self, prefix):
+        like = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._cur() as cur:
+            cur.execute(
+                "select key from cache_entries where key like %s and (expires_at is null or expires_at > now())",
+                (like,),
+            )
+            return [r[0] for r in cur.fetchall()]
+
+    def _pg_purge(self):
+        with self._cur() as cur:
+            cur.execute("delete from cache_entries where expires_at <= now()")
+            return cur.rowcount
+
+# ---------------- redis ----------------
+class RedisCache(CacheBackend):
+    # Süre dolumu Redis'te (SET ... EX); purge gerekmez
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url: str = "", client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND=redis için redis-py kurulu değil (pip install redis).")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+
+    def _get(self, key):
+        return self.client.get(key)
+
+    def _set(self, key, value, ttl):
+        self.client.set(key, value, ex=max(1, int(ttl)) if ttl else None)
+
+    def _delete(self, key):
+        self.client.delete(key)
+
+    def _keys(self, prefix):
+        pattern = "".join("\\" + c if c in "*?[]\\" else c for c in prefix) + "*"
+        return [k.decode("utf-8") if isinstance(k, bytes) else k for k in self.client.scan_iter(match=pattern, count=500)]
+
+# ---------------- seçim ----------------
+BACKENDS = {"memory": MemoryCache, "disk": DiskCache, "postgres": PostgresCache, "redis": RedisCache}
+
+_cache: CacheBackend | None = None
+_cache_lock = threading.Lock()
+
+def make_cache(kind: str = "") -> CacheBackend:
+    kind = (kind or "memory").strip().lower()
+    if kind == "disk":
+        return DiskCache(get_secret("CACHE_DIR", DEFAULT_CACHE_DIR))
+    if kind == "redis":
+        return RedisCache(get_secret("CACHE_URL"))
+    if kind not in BACKENDS:
+        raise RuntimeError(f"Bilinmeyen CACHE_BACKEND: {kind} ({', '.join(BACKENDS)})")
+    return BACKENDS[kind]()
+
+def get_cache() -> CacheBackend:
+    # Süreç başına tek backend (CACHE_BACKEND secret'ı)
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = make_cache(get_secret("CACHE_BACKEND", "memory"))
+        return _cache
+
+def set_cache(backend: CacheBackend):
+    # Test / yük testi için backend'i değiştirir
+    global _cache
+    with _cache_lock:
+        _cache = backend
+
+# ---------------- konfigürasyon ----------------
+def config_key(key: str) -> str:
+    gen = get_cache().get(CONFIG_GEN_KEY)
+    return f"cfg:{(gen or b'0').decode()}:{key}"
+
+def bump_config():
+    # Eski nesildeki kayıtlar TTL ile düşer, okuyanlar yeni nesil anahtarına bakar
+    get_cache().set(CONFIG_GEN_KEY, uuid.uuid4().hex.encode())
+
+def invalidates_config(fn):
+    # Konfigürasyon yazan db fonksiyonları: çağrıdan sonra (kuyruğa alınsa bile) tüm replikalarda cache geçersiz
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            bump_config()
+    return wrapper
@@ -0,0 +1,30 @@
+# slack_panel/config.py
+# Secret/ayar okuma: Streamlit içinde st.secrets, dışarıda (dispatcher vb.) ortam değişkenleri.
+
+import os
+import re
+
+# Operatör kayıtlarındaki secret adları (admin ekranında yazılır, DB'de durur) sadece bu önekleri taşıyabilir
+# ("<önek>" ya da "<önek>_<EK>", örn. APP_PASSWORD_2): kayıt üzerinden DATABASE_URL gibi başka secret'lar okunamasın.
+OPERATOR_SECRET_PREFIXES = {"password": "APP_PASSWORD", "token": "SLACK_USER_TOKEN", "channel": "SLACK_CHANNEL_ID"}
+_OPERATOR_SECRET_PATTERNS = {k: re.compile(rf"^{p}(?:_[A-Z0-9]+)*$") for k, p in OPERATOR_SECRET_PREFIXES.items()}
+
+
+def get_secret(name: str, default: str = "") -> str:
+    # Önce ortam değişkeni (headless çalıştırma), sonra .streamlit/secrets.toml
+    val = os.environ.get(name)
+    if val:
+        return val
+    try:
+        import streamlit as st
+        val = st.secrets.get(name, default)
+    except Exception:
+        return default
+    return val if val not in (None, "") else default
+
+def is_operator_secret(kind: str, name: str) -> bool:
+    return bool(_OPERATOR_SECRET_PATTERNS[kind].match(name or ""))
+
+def get_operator_secret(kind: str, name: str) -> str:
+    # İzin verilmeyen ad tanımsız secret gibi davranır (boş döner)
+    return get_secret(name) if is_operator_secret(kind, name) else ""
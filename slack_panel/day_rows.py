@@ -0,0 +1,90 @@
+# slack_panel/day_rows.py
+# Ayarlar > Günlük Satırlar grid'i: DB satırları <-> data_editor tablosu ve kaydederken sadece farklar.
+# Tablo index'i day_rows.id; "Sıra" = day_rows.position, serbest sayı girilebilir (2.5 satırı 2 ile 3 arasına taşır).
+# Yeni sıra, mevcut position değerleri yeniden dağıtılarak bulunur: sadece yeri değişen satırlar yazılır.
+
+import pandas as pd
+
+from .helpers import DEFAULT_CATEGORY, parse_channels
+
+COL_ORDER = "Sıra"
+COL_TEXT = "Metin"
+COL_CATEGORY = "Kategori"
+COL_REQ = "Ek"
+COL_AUTO = "Oto"
+COL_DEFAULT_ATT = "Varsayılan ek"
+COL_CHANNELS = "Kanallar"
+COL_DELETE = "Sil"
+
+GRID_COLUMNS = [COL_ORDER, COL_TEXT, COL_CATEGORY, COL_REQ, COL_AUTO, COL_DEFAULT_ATT, COL_CHANNELS, COL_DELETE]
+
+
+def day_rows_frame(rows: list[dict]) -> pd.DataFrame:
+    # db_get_day_rows sonucu (zaten sıralı) → grid tablosu
+    df = pd.DataFrame(
+        {
+            COL_ORDER: [float(r["position"] if r.get("position") is not None else i + 1) for i, r in enumerate(rows)],
+            COL_TEXT: [str(r.get("text", "") or "") for r in rows],
+            COL_CATEGORY: [str(r.get("category") or DEFAULT_CATEGORY) for r in rows],
+            COL_REQ: [bool(r.get("requires_attachment", False)) for r in rows],
+            COL_AUTO: [bool(r.get("auto_send", False)) for r in rows],
+            COL_DEFAULT_ATT: [str(r.get("default_attachment", "") or "") for r in rows],
+            COL_CHANNELS: [", ".join(r.get("channels") or []) for r in rows],
+            COL_DELETE: [False] * len(rows),
+        },
+        index=pd.Index([int(r["id"]) for r in rows], name="id"),
+    )
+    return df[GRID_COLUMNS]
+
+def filter_rows(df: pd.DataFrame, query: str) -> pd.DataFrame:
+    # Metin / kategori / kanal içinde büyük-küçük harf duyarsız arama
+    q = (query or "").strip().casefold()
+    if not q:
+        return df
+    hay = (df[COL_TEXT].astype(str) + " " + df[COL_CATEGORY].astype(str) + " " + df[COL_CHANNELS].astype(str)).str.casefold()
+    return df[hay.str.contains(q, regex=False)]
+
+def arrange(df: pd.DataFrame, original: pd.DataFrame) -> pd.DataFrame:
+    # Sıra kolonuna göre diz (eşitlikte mevcut sıra korunur); satırlar, kendi orijinal position
+    # değerlerini küçükten büyüğe paylaşır. Böylece silme boşluk bırakır, taşıma sadece aradakileri kaydırır.
+    out = df.assign(_pos=range(len(df))).sort_values([COL_ORDER, "_pos"], kind="stable").drop(columns="_pos")
+    out[COL_ORDER] = sorted(float(original.at[rid, COL_ORDER]) for rid in out.index)
+    return out
+
+def normalize_row(row, categories: list[str], attachments: dict) -> dict:
+    # Grid satırı → DB alanları (kategori yoksa Genel, ek gerekmiyorsa/kategori uymuyorsa varsayılan ek boş)
+    cat = str(row[COL_CATEGORY] or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+    if cat not in categories:
+        cat = DEFAULT_CATEGORY
+    req = bool(row[COL_REQ])
+    att = str(row[COL_DEFAULT_ATT] or "").strip()
+    preset = attachments.get(att)
+    if not req or not isinstance(preset, dict) or str(preset.get("category") or DEFAULT_CATEGORY).strip() != cat:
+        att = ""
+    return {
+        "text": str(row[COL_TEXT] or "").strip(),
+        "category": cat,
+        "requires_attachment": req,
+        "auto_send": bool(row[COL_AUTO]),
+        "default_attachment": att or None,
+        "channels": parse_channels(row[COL_CHANNELS]) or None,
+    }
+
+def diff_day_rows(original: pd.DataFrame, edited: pd.DataFrame, categories: list[str], attachments: dict):
+    # Dönen: (updates {id: {kolon: değer}}, deletes [id]). Metni boşaltılan satır da silinir.
+    deletes = [
+        int(rid) for rid, row in edited.iterrows()
+        if bool(row[COL_DELETE]) or not str(row[COL_TEXT] or "").strip()
+    ]
+    kept = arrange(edited.drop(index=deletes), original)
+
+    updates = {}
+    for rid, row in kept.iterrows():
+        new = normalize_row(row, categories, attachments)
+        old = normalize_row(original.loc[rid], categories, attachments)
+        changed = {k: v for k, v in new.items() if old.get(k) != v}
+        if row[COL_ORDER] != original.at[rid, COL_ORDER]:
+            changed["position"] = int(row[COL_ORDER])
+        if changed:
+            updates[int(rid)] = changed
+    return updates, deletes
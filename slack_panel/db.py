@@ -0,0 +1,936 @@
+# slack_panel/db.py
+# Tüm DB erişimi (Supabase / Postgres). Streamlit'e bağımlı değil.
+
+import threading
+from datetime import date
+
+import psycopg
+from psycopg import sql
+from psycopg.types.json import Jsonb
+
+from . import offline
+from .cache import bump_config, invalidates_config
+from .config import get_secret, is_operator_secret
+from .helpers import DEFAULT_CATEGORY, DEFAULT_CATEGORY_ID
+from .offline import offline_default, read_through, write_behind
+
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def connect():
+    # Yeni bağlantı (uzun transaction açan bakım/migration işleri paylaşımlı bağlantıyı kullanmaz)
+    db_url = get_secret("DATABASE_URL")
+    if not db_url:
+        raise RuntimeError("DATABASE_URL secrets içinde yok.")
+    # connect_timeout: DB ulaşılamazken her çağrı uzun süre beklemesin (offline modu devreye girsin)
+    return psycopg.connect(db_url, autocommit=True, connect_timeout=int(get_secret("DB_CONNECT_TIMEOUT", "5")))
+
+def get_conn():
+    # Süreç başına tek bağlantı (Streamlit'teki st.cache_resource davranışının aynısı)
+    global _conn
+    with _conn_lock:
+        if _conn is None or _conn.closed or _conn.broken:
+            _conn = connect()
+        return _conn
+
+# ---------------- KATEGORİLER (id <-> ad) ----------------
+# Tablolar kategoriyi categories.id ile tutar; API'ler ad ile çalışır. Eşleme bellekte tutulur,
+# db_get_categories her çağrıda tazeler, bilinmeyen id/ad görülürse bir kere yeniden yüklenir.
+_category_names: dict[int, str] = {}
+_category_ids: dict[str, int] = {}
+
+@read_through("categories")
+def _fetch_categories():
+    with get_conn().cursor() as cur:
+        cur.execute("select id, name from categories order by name")
+        return cur.fetchall()
+
+def _load_category_map():
+    # Sözlükler yerinde değişmez, yenisiyle değiştirilir (okuyan thread'ler yarım eşleme görmez)
+    global _category_names, _category_ids
+    rows = _fetch_categories()
+    _category_names = {int(i): n for i, n in rows}
+    _category_ids = {n: int(i) for i, n in rows}
+    return rows
+
+def category_name(category_id) -> str:
+    cid = int(category_id if category_id is not None else DEFAULT_CATEGORY_ID)
+    if cid not in _category_names:
+        _load_category_map()
+    return _category_names.get(cid, DEFAULT_CATEGORY)
+
+def category_id(name: str) -> int:
+    # Bilinmeyen / boş ad → Genel
+    name = (name or "").strip()
+    if not name:
+        return DEFAULT_CATEGORY_ID
+    if name not in _category_ids:
+        _load_category_map()
+    return _category_ids.get(name, DEFAULT_CATEGORY_ID)
+
+def db_get_category_ids() -> dict[str, int]:
+    # ad -> id (doğrulamada kategori eşleşmesi id karşılaştırmasıyla yapılır)
+    if not _category_ids:
+        _load_category_map()
+    return dict(_category_ids)
+
+def db_get_categories():
+    rows = _load_category_map()
+    cats = [r[1] for r in rows] if rows else []
+    if DEFAULT_CATEGORY not in cats:
+        cats.insert(0, DEFAULT_CATEGORY)
+    return cats
+
+@invalidates_config
+@write_behind
+def db_add_category(name: str):
+    name = (name or "").strip()
+    if not name:
+        return
+    with get_conn().cursor() as cur:
+        cur.execute("insert into categories(name) values (%s) on conflict do nothing", (name,))
+    bump_config()  # eşleme yeni nesilden (DB'den) okunsun
+    _load_category_map()
+
+@invalidates_config
+@write_behind
+def db_rename_category(old: str, new: str) -> bool:
+    # Tek satır: satırlar/değişkenler/preset'ler id ile bağlı. Dönen: False = ad boş/aynı ya da zaten var
+    old, new = (old or "").strip(), (new or "").strip()
+    if not old or not new or old == new or old == DEFAULT_CATEGORY:
+        return False
+    with get_conn().cursor() as cur:
+        cur.execute(
+            "update categories set name=%s where name=%s and not exists (select 1 from categories where name=%s)",
+            (new, old, new),
+        )
+        ok = cur.rowcount == 1
+    bump_config()  # eşleme yeni nesilden (DB'den) okunsun
+    _load_category_map()
+    return ok
+
+@invalidates_config
+@write_behind
+def db_delete_category(name: str):
+    # Tek satır: day_rows/variables/attachments FK ile Genel'e düşer, category_channels cascade silinir
+    name = (name or "").strip()
+    if not name or name == DEFAULT_CATEGORY:
+        return
+    with get_conn().cursor() as cur:
+        cur.execute("delete from categories where name=%s and id<>%s", (name, DEFAULT_CATEGORY_ID))
+    bump_config()  # eşleme yeni nesilden (DB'den) okunsun
+    _load_category_map()
+
+@read_through(lambda day_key: f"day_rows:{day_key}")
+def db_get_day_rows(day_key: str):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select id, text, category_id, requires_attachment, auto_send, default_attachment, channels, position
+            from day_rows
+            where day_key=%s and active=true
+            order by position nulls last, id
+            """,
+            (day_key,),
+        )
+        rows = cur.fetchall()
+    return [
+        {
+            "id": int(r[0]), "text": r[1], "category": category_name(r[2]), "category_id": int(r[2]),
+            "requires_attachment": bool(r[3]), "auto_send": bool(r[4]), "default_attachment": r[5] or "",
+            "channels": list(r[6] or []), "position": r[7],
+        }
+        for r in rows
+    ]
+
+# Satır ayarlarında düzenlenebilen kolonlar (db_update_day_rows sadece bunları yazar; "category" adı id'ye çevrilir)
+DAY_ROW_FIELDS = ("text", "category_id", "requires_attachment", "auto_send", "default_attachment", "channels", "position")
+
+@invalidates_config
+@write_behind
+def db_update_day_rows(day_key: str, updates: dict[int, dict], deletes: list[int]):
+    # Sadece değişen satırlar: updates = {id: {kolon: değer}}, deletes = pasife alınacak id'ler.
+    # Silme yumuşak (active=false): sent_log'daki day_row_id referansları bozulmaz.
+    # Transaction kendi bağlantısında: paylaşımlı bağlantıyı kullanan diğer thread'ler araya girmez.
+    # Kategori id'leri bağlantı açılmadan çözülür (category_id paylaşımlı bağlantıyla eşlemeyi yükleyebilir).
+    changes = []
+    for rid, fields in updates.items():
+        if "category" in fields:
+            fields = {**fields, "category_id": category_id(fields["category"])}
+        cols = [c for c in DAY_ROW_FIELDS if c in fields]
+        if cols:
+            changes.append((int(rid), cols, [fields[c] for c in cols]))
+    with connect() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                if deletes:
+                    cur.execute(
+                        "update day_rows set active=false where day_key=%s and id = any(%s)",
+                        (day_key, [int(x) for x in deletes]),
+                    )
+                for rid, cols, values in changes:
+                    cur.execute(
+                        sql.SQL("update day_rows set {} where id=%s and day_key=%s").format(
+                            sql.SQL(", ").join(sql.SQL("{}=%s").format(sql.Identifier(c)) for c in cols)
+                        ),
+                        values + [rid, day_key],
+                    )
+
+@invalidates_config
+@write_behind
+def db_add_day_row(day_key: str, text: str, category: str, requires_attachment: bool):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            insert into day_rows(day_key, text, category_id, requires_attachment, active, position)
+            values (%s, %s, %s, %s, true,
+                    (select coalesce(max(position), 0) + 1 from day_rows where day_key=%s and active))
+            """,
+            (day_key, text, category_id(category), bool(requires_attachment), day_key),
+        )
+
+@read_through("category_channels")
+def db_get_category_channels() -> dict[str, list[str]]:
+    out = {}
+    with get_conn().cursor() as cur:
+        cur.execute("select category_id, channel_id from category_channels order by category_id, channel_id")
+        for cid, ch in cur.fetchall():
+            out.setdefault(category_name(cid), []).append(ch)
+    return out
+
+@invalidates_config
+@write_behind
+def db_set_category_channels(category: str, channels: list[str]):
+    category = (category or "").strip()
+    if not category:
+        return
+    cid = category_id(category)
+    with get_conn().cursor() as cur:
+        cur.execute("delete from category_channels where category_id=%s", (cid,))
+        for ch in channels or []:
+            cur.execute(
+                "insert into category_channels(category_id, channel_id) values (%s,%s) on conflict do nothing",
+                (cid, ch),
+            )
+
+@read_through(lambda max_options=None: f"variables:{max_options}")
+def db_get_variables(max_options: int | None = None):
+    # max_options: bundan fazla seçeneği olan değişkenin listesi yüklenmez ("options" boş, "option_count" dolu);
+    # bu seçenekler options.search_options ile aranır
+    out = {}
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select v.name, v.category_id, v.default_value, count(o.id), coalesce(max(o.id), 0)
+            from variables v left join variable_options o on o.variable_name = v.name
+            group by v.name order by v.name
+            """
+        )
+        vars_ = cur.fetchall()
+        for name, cid, default_value, n, max_id in vars_:
+            opts = []
+            if max_options is None or n <= max_options:
+                cur.execute("select value from variable_options where variable_name=%s order by id", (name,))
+                opts = [x[0] for x in cur.fetchall()]
+            out[name] = {
+                "category": category_name(cid), "category_id": int(cid), "options": opts, "default": default_value or "",
+                "option_count": int(n), "options_version": f"{n}:{max_id}",
+            }
+    return out
+
+@read_through(lambda name: f"variable_options:{name}")
+def db_get_variable_options(name: str) -> list[str]:
+    with get_conn().cursor() as cur:
+        cur.execute("select value from variable_options where variable_name=%s order by id", (name,))
+        return [r[0] for r in cur.fetchall()]
+
+_has_trgm = None
+
+def _trgm_available() -> bool:
+    global _has_trgm
+    if _has_trgm is None:
+        with get_conn().cursor() as cur:
+            cur.execute("select 1 from pg_extension where extname='pg_trgm'")
+            _has_trgm = cur.fetchone() is not None
+    return _has_trgm
+
+@offline_default(list)
+def db_search_variable_options(name: str, query: str, limit: int) -> list[str]:
+    # Bellek içi index'e sığmayan listeler için: önce prefix, sonra içerir, pg_trgm varsa benzerlik sırası
+    q = (query or "").strip()
+    like = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with get_conn().cursor() as cur:
+        if _trgm_available():
+            cur.execute(
+                """
+                select value from variable_options
+                where variable_name=%s and (value ilike %s or value %% %s)
+                order by value ilike %s desc, similarity(value, %s) desc, id
+                limit %s
+                """,
+                (name, f"%{like}%", q, f"{like}%", q, limit),
+            )
+        else:
+            cur.execute(
+                """
+                select value from variable_options
+                where variable_name=%s and value ilike %s
+                order by value ilike %s desc, length(value), id
+                limit %s
+                """,
+                (name, f"%{like}%", f"{like}%", limit),
+            )
+        return [r[0] for r in cur.fetchall()]
+
+@invalidates_config
+@write_behind
+def db_upsert_variable(name: str, category: str, options: list[str], default_value: str = ""):
+    name = (name or "").strip()
+    if not name:
+        return
+    category = (category or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+    options = [o.strip() for o in (options or []) if o and o.strip()]
+    default_value = (default_value or "").strip()
+    if default_value not in options:
+        default_value = ""
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            insert into variables(name, category_id, default_value)
+            values (%s,%s,%s)
+            on conflict (name) do update set category_id=excluded.category_id, default_value=excluded.default_value
+            """,
+            (name, category_id(category), default_value or None),
+        )
+        cur.execute("delete from variable_options where variable_name=%s", (name,))
+        for o in options:
+            cur.execute("insert into variable_options(variable_name, value) values (%s,%s)", (name, o))
+
+@invalidates_config
+@write_behind
+def db_delete_variable(name: str):
+    name = (name or "").strip()
+    if not name:
+        return
+    with get_conn().cursor() as cur:
+        cur.execute("delete from variables where name=%s", (name,))
+
+@read_through(lambda include_expired: f"attachments:{bool(include_expired)}")
+def db_get_attachments(include_expired: bool):
+    cols = "name, category_id, url, valid_date, health_status, health_checked_at, health_error, image_url, image_bytes"
+    with get_conn().cursor() as cur:
+        if include_expired:
+            cur.execute(f"select {cols} from attachments order by name")
+        else:
+            cur.execute(
+                f"""
+                select {cols}
+                from attachments
+                where valid_date is null or valid_date >= current_date
+                order by name
+                """
+            )
+        rows = cur.fetchall()
+    out = {}
+    for name, cid, url, vdate, status, checked_at, check_error, image_url, image_bytes in rows:
+        out[name] = {
+            "category": category_name(cid), "category_id": int(cid), "url": url, "valid_date": vdate,
+            # Sağlık (preset_health): status None = henüz kontrol edilmedi
+            "status": status, "checked_at": checked_at, "check_error": check_error,
+            "image_url": image_url, "image_bytes": image_bytes,
+        }
+    return out
+
+@invalidates_config
+@write_behind
+def db_upsert_attachment(name: str, category: str, url: str, valid_date):
+    name = (name or "").strip()
+    url = (url or "").strip()
+    if not name or not url:
+        return
+    category = (category or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+    with get_conn().cursor() as cur:
+        # URL değişirse eski sağlık sonucu geçersiz (bir sonraki kontrole kadar bilinmiyor)
+        cur.execute(
+            """
+            insert into attachments(name, category_id, url, valid_date)
+            values (%s,%s,%s,%s)
+            on conflict (name) do update
+            set category_id=excluded.category_id, url=excluded.url, valid_date=excluded.valid_date,
+                health_status=case when attachments.url = excluded.url then attachments.health_status end,
+                health_checked_at=case when attachments.url = excluded.url then attachments.health_checked_at end,
+                health_error=case when attachments.url = excluded.url then attachments.health_error end,
+                image_url=case when attachments.url = excluded.url then attachments.image_url end,
+                image_bytes=case when attachments.url = excluded.url then attachments.image_bytes end
+            """,
+            (name, category_id(category), url, valid_date),
+        )
+
+@offline_default(int)
+def db_set_attachment_health(results: list[dict]) -> int:
+    # results: {"name", "url", "status" ('ok' | 'broken' | None = geçici hata, durum korunur), "error", "image_url", "bytes"}
+    # Kontrol sırasında URL'i değişen preset'e yazılmaz. Dönen: durumu değişen preset sayısı
+    # Son kontrol zamanı da konfigürasyonun parçası: yazımdan sonra cache nesli her zaman değişir
+    changed = 0
+    with get_conn().cursor() as cur:
+        for r in results:
+            cur.execute(
+                """
+                update attachments
+                set health_checked_at=now(),
+                    health_error=%s,
+                    health_status=coalesce(%s, health_status),
+                    image_url=coalesce(%s, image_url),
+                    image_bytes=coalesce(%s, image_bytes)
+                where name=%s and url=%s
+                returning (select a.health_status from attachments a where a.name=attachments.name) is distinct from health_status
+                """,
+                (r.get("error"), r.get("status"), r.get("image_url") or None, r.get("bytes"), r["name"], r["url"]),
+            )
+            row = cur.fetchone()
+            changed += bool(row and row[0])
+    if results:
+        bump_config()
+    return changed
+
+@invalidates_config
+@write_behind
+def db_delete_attachment(name: str):
+    name = (name or "").strip()
+    if not name:
+        return
+    with get_conn().cursor() as cur:
+        cur.execute("delete from attachments where name=%s", (name,))
+
+# ---------------- SATIR SAHİPLİĞİ (soft lease) ----------------
+# Operatör bir satırı hazırlamaya başlayınca (değer/ek seçince) satırı ROW_CLAIM_SECONDS için tutar.
+# Başkasının tuttuğu satır link kontrolüne, görsel indirmeye ve gönderime alınmaz. Kesin kilit yine
+# db_try_reserve_send'dir; bu sadece boşa hazırlık / indirme işini önler.
+ROW_CLAIM_SECONDS = 180
+
+@offline_default(dict)
+def db_sync_row_claims(d: date, user_key: str, claim_ids: list[int], release_ids: list[int] | None = None) -> dict[int, str]:
+    # claim_ids: tutulacak/yenilenecek satırlar (başkasında ve süresi dolmamışsa alınmaz)
+    # release_ids: bırakılacak satırlar. Dönen: o günün geçerli sahipleri (day_row_id -> user_key)
+    claim_ids = sorted({int(x) for x in claim_ids or []})
+    release_ids = sorted({int(x) for x in release_ids or []} - set(claim_ids))
+    with get_conn().cursor() as cur:
+        if release_ids:
+            cur.execute(
+                "delete from row_claims where claim_date=%s and user_key=%s and day_row_id = any(%s)",
+                (d, user_key, release_ids),
+            )
+        if claim_ids:
+            cur.execute(
+                """
+                insert into row_claims(claim_date, day_row_id, user_key, expires_at)
+                select %s, x, %s, now() + make_interval(secs => %s) from unnest(%s::bigint[]) as x
+                on conflict (claim_date, day_row_id) do update
+                set user_key=excluded.user_key, expires_at=excluded.expires_at,
+                    claimed_at=case when row_claims.user_key=excluded.user_key then row_claims.claimed_at else now() end
+                where row_claims.user_key=excluded.user_key or row_claims.expires_at < now()
+                """,
+                (d, user_key, ROW_CLAIM_SECONDS, claim_ids),
+            )
+        cur.execute(
+            "select day_row_id, user_key from row_claims where claim_date=%s and expires_at >= now()",
+            (d,),
+        )
+        return {int(rid): u for rid, u in cur.fetchall()}
+
+# ---------------- OPERATÖRLER ----------------
+@read_through("operators")
+def db_get_operators() -> list[dict]:
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select o.user_key, o.role, o.password_secret, o.token_secret, o.default_channels, o.channel_secret,
+                   o.active, coalesce(array_agg(oc.category_id) filter (where oc.category_id is not null), '{}')
+            from operators o left join operator_categories oc on oc.user_key = o.user_key
+            group by o.user_key
+            order by o.position nulls last, o.user_key
+            """
+        )
+        rows = cur.fetchall()
+    return [
+        {
+            "user_key": r[0], "role": r[1], "password_secret": r[2], "token_secret": r[3],
+            "default_channels": list(r[4] or []), "channel_secret": r[5] or "", "active": bool(r[6]),
+            "category_ids": sorted(int(x) for x in r[7]), "categories": sorted(category_name(x) for x in r[7]),
+        }
+        for r in rows
+    ]
+
+@invalidates_config
+@write_behind
+def db_upsert_operator(
+    user_key: str, role: str, password_secret: str, token_secret: str, default_channels: list[str],
+    channel_secret: str = "", categories: list[str] | None = None, active: bool = True, position: int | None = None,
+):
+    # categories: izinli kategori adları (boş = tümü)
+    # Secret adları config.OPERATOR_SECRET_PREFIXES dışındaysa ValueError (kayıt yazılmaz)
+    user_key = (user_key or "").strip()
+    if not user_key:
+        return
+    password_secret, token_secret = password_secret.strip(), token_secret.strip()
+    channel_secret = (channel_secret or "").strip()
+    for kind, name in (("password", password_secret), ("token", token_secret), ("channel", channel_secret)):
+        if (name or kind != "channel") and not is_operator_secret(kind, name):
+            raise ValueError(f"{user_key}: izin verilmeyen secret adı ({name or 'boş'})")
+    category_ids = sorted({category_id(c) for c in categories or [] if (c or "").strip()})
+    # Transaction kendi bağlantısında (paylaşımlı bağlantıdaki diğer çağrılar araya girmez)
+    with connect() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    insert into operators(user_key, role, password_secret, token_secret, default_channels, channel_secret, active, position)
+                    values (%s, %s, %s, %s, %s, %s, %s,
+                            coalesce(%s, (select coalesce(max(position), 0) + 1 from operators)))
+                    on conflict (user_key) do update
+                    set role=excluded.role, password_secret=excluded.password_secret, token_secret=excluded.token_secret,
+                        default_channels=excluded.default_channels, channel_secret=excluded.channel_secret,
+                        active=excluded.active, position=coalesce(%s, operators.position)
+                    """,
+                    (
+                        user_key, role, password_secret, token_secret, list(default_channels or []),
+                        channel_secret or None, bool(active), position, position,
+                    ),
+                )
+                cur.execute("delete from operator_categories where user_key=%s", (user_key,))
+                for cid in category_ids:
+                    cur.execute("insert into operator_categories(user_key, category_id) values (%s, %s)", (user_key, cid))
+
+@invalidates_config
+@write_behind
+def db_delete_operator(user_key: str):
+    user_key = (user_key or "").strip()
+    if not user_key:
+        return
+    with get_conn().cursor() as cur:
+        cur.execute("delete from operators where user_key=%s", (user_key,))
+
+# ---------------- SENT LOG (day_row_id + kanal bazlı) ----------------
+def db_get_sent_channels_for_date(d: date) -> dict[int, set[str]]:
+    # day_row_id -> o gün gönderilmiş/gönderilmekte olan kanallar ('' = kanal kolonu öncesi eski kayıt)
+    # 'failed' kayıtlar kilit tutmaz, satır tekrar görünür. Henüz DB'ye işlenmemiş yerel kilitler de eklenir.
+    out = {rid: set(chs) for rid, chs in _db_get_sent_channels_for_date(d).items()}
+    for rid, chs in offline.local_sent_channels(d).items():
+        out.setdefault(rid, set()).update(chs)
+    return out
+
+@read_through(lambda d: f"sent_channels:{d}", shared=False)
+def _db_get_sent_channels_for_date(d: date) -> dict[int, set[str]]:
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select day_row_id, channel from sent_log
+            where sent_date=%s and day_row_id is not null and status<>'failed'
+            """,
+            (d,),
+        )
+        rows = cur.fetchall()
+    out = {}
+    for rid, ch in rows:
+        out.setdefault(int(rid), set()).add(ch or "")
+    return out
+
+@offline_default(list)
+def db_get_sent_rows_for_date(d: date):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select id, sent_date, coalesce(user_key,'') as user_key, day_row_id, channel, status, template_text
+            from sent_log
+            where sent_date=%s
+            order by id
+            """,
+            (d,),
+        )
+        rows = cur.fetchall()
+    out = []
+    for rid, sdate, ukey, day_row_id, channel, status, text in rows:
+        out.append({
+            "ID": int(rid),
+            "Tarih": str(sdate),
+            "Kullanıcı": (ukey or "Bilinmiyor"),
+            "DayRowID": int(day_row_id) if day_row_id is not None else None,
+            "Kanal": channel or "",
+            "Durum": status,
+            "Mesaj": text,
+        })
+    return out
+
+@offline_default(list)
+def db_get_log_dates_summary():
+    # Canlı partition'lar + arşivlenmiş (sıkıştırılmış) aylar
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select sent_date, sum(n)::int from (
+                select sent_date, count(*) as n from sent_log where status='sent' group by sent_date
+                union all
+                select sent_date, sum(sent_count) from sent_log_daily_summary group by sent_date
+            ) x
+            group by sent_date
+            order by sent_date desc
+            """
+        )
+        return cur.fetchall()
+
+@offline_default(list)
+def db_get_archived_summary_for_date(d: date):
+    # Arşivlenmiş gün: satır detayı Parquet'te, burada kullanıcı bazlı sayılar
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select user_key, sent_count, failed_count, total_count
+            from sent_log_daily_summary
+            where sent_date=%s
+            order by user_key
+            """,
+            (d,),
+        )
+        rows = cur.fetchall()
+    return [
+        {"Kullanıcı": (u or "Bilinmiyor"), "Gönderilen": int(s), "Hatalı": int(f), "Toplam": int(t)}
+        for u, s, f, t in rows
+    ]
+
+@offline_default(dict)
+def db_get_send_metrics(start: date, end: date) -> dict:
+    # Gönderim Logu panosu (canlı partition'lar; arşivlenmiş aylar sadece günlük özet olarak var)
+    #   daily: gün bazlı gönderilen / hatalı / tekrar denenen
+    #   latency / latency_weekly: metot bazlı p50 / p95 (ms); Lightshot indirmesi "lightshot" metodu
+    #   by_category / by_attachment: hata oranı;  errors: en sık hata kodları
+    out = {}
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select sent_date, count(*) filter (where status='sent'), count(*) filter (where status='failed'),
+                   count(*) filter (where attempts > 1 or status='retrying'), coalesce(sum(bytes_uploaded) filter (where status='sent'), 0)
+            from sent_log where sent_date between %s and %s
+            group by sent_date order by sent_date
+            """,
+            (start, end),
+        )
+        out["daily"] = [
+            {"Tarih": d, "Gönderilen": int(s), "Hatalı": int(f), "Tekrar denenen": int(r), "Yüklenen MB": round(float(b) / 1e6, 2)}
+            for d, s, f, r, b in cur.fetchall()
+        ]
+
+        timings = """
+            select sent_date, send_method as method, send_ms as ms from sent_log
+            where sent_date between %s and %s and send_ms is not null
+            union all
+            select sent_date, 'lightshot', fetch_ms from sent_log
+            where sent_date between %s and %s and fetch_ms is not null
+        """
+        cur.execute(
+            f"""
+            select method, count(*), percentile_cont(0.5) within group (order by ms),
+                   percentile_cont(0.95) within group (order by ms)
+            from ({timings}) x group by method order by method
+            """,
+            (start, end, start, end),
+        )
+        out["latency"] = [
+            {"Metot": m, "Adet": int(n), "p50 ms": round(p50), "p95 ms": round(p95)} for m, n, p50, p95 in cur.fetchall()
+        ]
+        cur.execute(
+            f"""
+            select date_trunc('week', sent_date)::date, method, percentile_cont(0.5) within group (order by ms),
+                   percentile_cont(0.95) within group (order by ms)
+            from ({timings}) x group by 1, 2 order by 1, 2
+            """,
+            (start, end, start, end),
+        )
+        out["latency_weekly"] = [
+            {"Hafta": w, "Metot": m, "p50 ms": round(p50), "p95 ms": round(p95)} for w, m, p50, p95 in cur.fetchall()
+        ]
+
+        for key, col, label in (("by_category", "category", "Kategori"), ("by_attachment", "attachment_choice", "Ek")):
+            cur.execute(
+                sql.SQL(
+                    """
+                    select {col}, count(*), count(*) filter (where status='failed'), count(*) filter (where attempts > 1)
+                    from sent_log
+                    where sent_date between %s and %s and status in ('sent', 'failed') and {col} is not null
+                    group by {col} order by count(*) filter (where status='failed') desc, {col}
+                    """
+                ).format(col=sql.Identifier(col)),
+                (start, end),
+            )
+            out[key] = [
+                {label: v, "Toplam": int(n), "Hatalı": int(f), "Hata %": round(100.0 * f / n, 1) if n else 0.0, "Tekrar denenen": int(r)}
+                for v, n, f, r in cur.fetchall()
+            ]
+
+        cur.execute(
+            """
+            select error_code, count(*), count(*) filter (where status='failed')
+            from sent_log where sent_date between %s and %s and error_code is not null
+            group by error_code order by count(*) desc limit 20
+            """,
+            (start, end),
+        )
+        out["errors"] = [{"Hata kodu": c, "Adet": int(n), "Kalıcı": int(f)} for c, n, f in cur.fetchall()]
+    return out
+
+# sent_log durum makinesi: reserved → sent | failed | retrying
+#   reserved: Slack çağrısı öncesi kilit; lease_expires_at geçerse reconcile_stale_reservations karar verir
+#   retrying: geçici hata, kilit korunur; next_attempt_at gelince retry worker tekrar 'reserved' yapar
+#   failed:   kilit bırakıldı, aynı satır/kanal tekrar rezerve edilebilir
+RESERVE_LEASE_SECONDS = 120
+
+def db_try_reserve_send(
+    d: date, day_row_id: int, template_text: str, user_key: str, channel: str = "", message_text: str = "",
+    category: str = "", image_url: str = "", selections: dict | None = None, attachment_choice: str = "",
+    send_key: str = "",
+):
+    # Dönen: sent_log.id (kilit alındı) veya None (başkası tutuyor / zaten gönderilmiş)
+    # category + image_url, retry worker'ın mesajı aynen yeniden gönderebilmesi için saklanır.
+    # selections + attachment_choice: ertesi hafta tabloyu ön doldurmak için (db_get_last_selections)
+    # send_key: mesajın metadata'sında yollanan anahtar; reconcile Slack geçmişinde bununla birebir eşleştirir
+    # DB'ye ulaşılamıyorsa kilit yerelde alınır (negatif id), bağlantı gelince offline.sync sent_log'a yazar.
+    if not day_row_id:
+        return None
+    if offline.is_offline():
+        return offline.reserve_local(
+            d, day_row_id, template_text, user_key, channel, message_text, category, image_url, selections, attachment_choice,
+            send_key,
+        )
+    try:
+        return _db_try_reserve_send(
+            d, day_row_id, template_text, user_key, channel, message_text, category, image_url, selections, attachment_choice,
+            send_key,
+        )
+    except Exception as e:
+        if not offline.is_connection_error(e):
+            raise
+        offline.mark_offline(e)
+        return offline.reserve_local(
+            d, day_row_id, template_text, user_key, channel, message_text, category, image_url, selections, attachment_choice,
+            send_key,
+        )
+
+def _db_try_reserve_send(
+    d, day_row_id, template_text, user_key, channel, message_text, category, image_url, selections, attachment_choice,
+    send_key,
+):
+    template_text = (template_text or "").strip()
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            insert into sent_log(sent_date, user_key, day_row_id, channel, template_text, message_text,
+                                 category, image_url, selections, attachment_choice, send_key,
+                                 status, reserved_at, lease_expires_at, attempts)
+            values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'reserved', now(), now() + make_interval(secs => %s), 1)
+            on conflict (sent_date, day_row_id, channel) do update
+            set user_key=excluded.user_key, template_text=excluded.template_text,
+                message_text=excluded.message_text, category=excluded.category, image_url=excluded.image_url,
+                selections=excluded.selections, attachment_choice=excluded.attachment_choice,
+                send_key=excluded.send_key, slack_file_id=null,
+                status='reserved', error=null, next_attempt_at=null,
+                reserved_at=now(), lease_expires_at=excluded.lease_expires_at,
+                attempts=sent_log.attempts + 1
+            where sent_log.status='failed'
+            returning id
+            """,
+            (
+                d, user_key, int(day_row_id), channel or "", template_text, message_text or "",
+                category or None, image_url or None, Jsonb(selections) if selections else None,
+                attachment_choice or None, send_key or None, RESERVE_LEASE_SECONDS,
+            ),
+        )
+        row = cur.fetchone()
+    return int(row[0]) if row else None
+
+@offline_default(dict)
+def db_get_last_selections(day_row_ids: list[int]) -> dict[int, dict]:
+    # Satır başına en son başarılı gönderimdeki seçimler (distinct on + sent_log_day_row_latest index'i)
+    # Dönen: day_row_id -> {"selections": {değişken: değer}, "attachment": "Ek Seç" değeri}
+    ids = sorted({int(x) for x in day_row_ids or []})
+    if not ids:
+        return {}
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select distinct on (day_row_id) day_row_id, selections, attachment_choice
+            from sent_log
+            where day_row_id = any(%s) and status='sent'
+            order by day_row_id, sent_date desc, id desc
+            """,
+            (ids,),
+        )
+        rows = cur.fetchall()
+    return {int(rid): {"selections": dict(sel or {}), "attachment": att or ""} for rid, sel, att in rows}
+
+@offline_default(int)
+def db_extend_leases(log_ids: list[int]) -> int:
+    # Slack çağrısı sürerken sahibi lease'i uzatır: reconcile canlı gönderimi 'failed' yapıp kilidi bırakmasın
+    ids = [int(i) for i in log_ids if int(i) > 0]
+    if not ids:
+        return 0
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            update sent_log set lease_expires_at=now() + make_interval(secs => %s)
+            where id = any(%s) and status='reserved'
+            """,
+            (RESERVE_LEASE_SECONDS, ids),
+        )
+        return cur.rowcount
+
+# Negatif log_id = yerel (çevrimdışı) rezervasyon; DB güncellemeleri ulaşılamazsa kuyruğa alınır
+def db_mark_sent(log_id: int, slack_ts: str = "", slack_file_id: str = "", metrics: dict | None = None):
+    if int(log_id) < 0:
+        return offline.settle_local(-int(log_id), "sent", slack_ts=slack_ts, slack_file_id=slack_file_id)
+    return _db_mark_sent(log_id, slack_ts, slack_file_id, metrics)
+
+def db_mark_failed(log_id: int, error: str = "", metrics: dict | None = None):
+    if int(log_id) < 0:
+        return offline.settle_local(-int(log_id), "failed", error=error)
+    return _db_mark_failed(log_id, error, metrics)
+
+def db_mark_retrying(log_id: int, error: str, delay_seconds: float, metrics: dict | None = None):
+    if int(log_id) < 0:
+        return offline.settle_local(-int(log_id), "retrying", error=error, delay_seconds=delay_seconds)
+    return _db_mark_retrying(log_id, error, delay_seconds, metrics)
+
+def db_set_slack_file_id(log_id: int, slack_file_id: str):
+    # Upload kanalda paylaşılmadan önce çağrılır; reconcile dosyayı bu id ile bulur.
+    # Kuyruğa alınmaz: yazılamazsa hata yükselir ve upload tamamlanmaz.
+    if int(log_id) < 0:
+        return offline.set_local_file_id(-int(log_id), slack_file_id)
+    with get_conn().cursor() as cur:
+        cur.execute("update sent_log set slack_file_id=%s where id=%s", (slack_file_id or None, int(log_id)))
+
+# Gönderim metrikleri (migration 15): verilmeyen alan eski değerini korur (reconcile metrik yazmaz)
+METRIC_FIELDS = ("fetch_ms", "send_ms", "send_method", "bytes_uploaded", "error_code")
+_METRICS_SET = ", ".join(f"{c}=coalesce(%s, {c})" for c in METRIC_FIELDS)
+_SENT_METRICS_SET = ", ".join(f"{c}=coalesce(%s, {c})" for c in METRIC_FIELDS[:-1]) + ", error_code=null"
+
+def _metric_values(metrics: dict | None, fields=METRIC_FIELDS) -> list:
+    metrics = metrics or {}
+    return [metrics.get(c) if metrics.get(c) not in ("", None) else None for c in fields]
+
+# Geç gelen başarı: lease'i dolup reconcile'ın 'failed' yaptığı (başkası tekrar rezerve etmemiş) kayıt yine
+# 'sent' olur; mesaj Slack'e gitmiştir, satır tekrar listelenip ikinci kez gönderilmesin
+@write_behind
+def _db_mark_sent(log_id: int, slack_ts: str = "", slack_file_id: str = "", metrics: dict | None = None):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            f"""
+            update sent_log
+            set status='sent', slack_ts=%s, slack_file_id=%s, lease_expires_at=null, error=null,
+                {_SENT_METRICS_SET}
+            where id=%s and (status='reserved' or (status='failed' and error like 'reconcile:%%'))
+            """,
+            [slack_ts or None, slack_file_id or None] + _metric_values(metrics, METRIC_FIELDS[:-1]) + [int(log_id)],
+        )
+
+@write_behind
+def _db_mark_failed(log_id: int, error: str = "", metrics: dict | None = None):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            f"""
+            update sent_log
+            set status='failed', error=%s, lease_expires_at=null, {_METRICS_SET}
+            where id=%s and status='reserved'
+            """,
+            [(error or "")[:500]] + _metric_values(metrics) + [int(log_id)],
+        )
+
+@write_behind
+def _db_mark_retrying(log_id: int, error: str, delay_seconds: float, metrics: dict | None = None):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            f"""
+            update sent_log
+            set status='retrying', error=%s, lease_expires_at=null,
+                next_attempt_at=now() + make_interval(secs => %s), {_METRICS_SET}
+            where id=%s and status='reserved'
+            """,
+            [(error or "")[:500], float(delay_seconds)] + _metric_values(metrics) + [int(log_id)],
+        )
+
+@offline_default(list)
+def db_claim_due_retries(user_keys: list[str], limit: int = 20):
+    # Zamanı gelmiş 'retrying' kayıtları atomik olarak tekrar 'reserved' yapar (birden çok süreç güvenli)
+    if not user_keys:
+        return []
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            update sent_log s
+            set status='reserved', reserved_at=now(), lease_expires_at=now() + make_interval(secs => %s),
+                attempts=s.attempts + 1, send_key=coalesce(s.send_key, gen_random_uuid()::text)
+            where s.id in (
+                select id from sent_log
+                where status='retrying' and next_attempt_at <= now() and user_key = any(%s)
+                order by next_attempt_at
+                limit %s
+                for update skip locked
+            )
+            returning s.id, s.sent_date, s.day_row_id, s.channel, s.user_key, coalesce(s.template_text,''),
+                      coalesce(s.message_text,''), coalesce(s.category,''), coalesce(s.image_url,''), s.attempts,
+                      s.send_key
+            """,
+            (RESERVE_LEASE_SECONDS, list(user_keys), int(limit)),
+        )
+        rows = cur.fetchall()
+    return [
+        {
+            "id": int(r[0]), "sent_date": r[1], "day_row_id": int(r[2]), "channel": r[3], "user_key": r[4],
+            "template": r[5], "message": r[6], "category": r[7], "image_url": r[8], "attempts": int(r[9]),
+            "send_key": r[10],
+        }
+        for r in rows
+    ]
+
+@offline_default(0)
+def db_count_retrying(user_key: str | None = None) -> int:
+    with get_conn().cursor() as cur:
+        cur.execute(
+            "select count(*) from sent_log where status='retrying' and (%s::text is null or user_key=%s)",
+            (user_key, user_key),
+        )
+        return int(cur.fetchone()[0])
+
+def db_fail_retrying(user_key: str, error: str) -> int:
+    # Tekrar denemesi kalmayan süreç (dispatch --once) çıkmadan önce: kalan 'retrying' kayıtlar 'failed'
+    # olur, kilit bırakılır (satır bir sonraki çalıştırmada / panelde tekrar gönderilebilir)
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            update sent_log set status='failed', error=%s, next_attempt_at=null
+            where status='retrying' and user_key=%s
+            """,
+            (error, user_key),
+        )
+        return cur.rowcount
+
+@offline_default(list)
+def db_get_stale_reservations(user_key: str | None = None):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            select id, sent_date, day_row_id, channel, coalesce(send_key,''), coalesce(slack_file_id,''), reserved_at,
+                   coalesce(user_key,'')
+            from sent_log
+            where status='reserved' and lease_expires_at < now()
+              and (%s::text is null or user_key=%s)
+            order by id
+            """,
+            (user_key, user_key),
+        )
+        rows = cur.fetchall()
+    return [
+        {
+            "id": int(r[0]), "sent_date": r[1], "day_row_id": r[2], "channel": r[3],
+            "send_key": r[4], "slack_file_id": r[5], "reserved_at": r[6], "user_key": r[7],
+        }
+        for r in rows
+    ]
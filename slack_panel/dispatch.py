@@ -0,0 +1,181 @@
+# slack_panel/dispatch.py
+# Headless zamanlanmış gönderim (Streamlit dışında):
+#
+#   python -m slack_panel.dispatch            # her DISPATCH_DAYS gününde DISPATCH_AT saatinde gönderir
+#   python -m slack_panel.dispatch --once     # bugünün satırlarını şimdi gönderir, retry kuyruğunu boşaltır ve çıkar
+#
+# Yalnızca "auto_send" işaretli day_rows gönderilir. Değişkenler variables.default_value,
+# ek zorunlu satırlar day_rows.default_attachment preset'i ile doldurulur. Varsayılanı eksik
+# satırlar atlanır (operatöre kalır). Kilit, panel ile aynı sent_log (sent_date, day_row_id, channel);
+# hedef kanallar satır > kategori > SLACK_CHANNEL_ID önceliğiyle çözülür. Geçici hatalar sent_log'da
+# 'retrying' olarak kalır ve bekleme döngüsünde tekrar denenir.
+
+import argparse
+import logging
+import time
+from datetime import date, datetime
+
+from slack_sdk import WebClient
+
+from .archive import DEFAULT_MAINTENANCE_AT, MaintenanceWorker
+from .config import get_secret
+from .db import (
+    db_get_attachments, db_get_categories, db_get_category_channels, db_get_day_rows,
+    db_get_sent_channels_for_date, db_get_variables,
+)
+from .aio import prefetch_images
+from .helpers import DAY_KEYS, DEFAULT_CATEGORY, extract_vars, next_run_at
+from .migrations import ensure_schema
+from .offline import SyncWorker
+from .preset_health import DEFAULT_PRESET_CHECK_MINUTES, PresetHealthWorker
+from .retry import DRAIN_TIMEOUT_SECONDS, RETRY_POLL_SECONDS, drain_retries, process_due_retries
+from .slack import make_client
+from .warmup import DEFAULT_WARMUP_AT, WarmupWorker
+from .sender import (
+    FAILED, LOCKED, RETRYING, SENT, attachment_link, build_send_item, plan_sends, reconcile_stale_reservations,
+    resolve_channels, row_fully_sent, send_units,
+)
+
+log = logging.getLogger("slack_panel.dispatch")
+
+DEFAULT_AT = "09:00"
+DEFAULT_DAYS = "monday,tuesday,wednesday,thursday,friday"
+DEFAULT_USER_KEY = "Otomatik"
+
+
+def collect_auto_items(d: date, variables: dict, attachments: dict, categories: list[str], category_channels: dict, default_channel: str):
+    # Dönen: (gönderilecek item listesi, atlanan satır notları); item["channels"] hedef kanallar
+    sent_channels = db_get_sent_channels_for_date(d)
+    items, skipped = [], []
+
+    rows = [r for r in db_get_day_rows(DAY_KEYS[d.weekday()]) if r.get("auto_send")]
+    prefetched = prefetch_images(
+        attachment_link(bool(r.get("requires_attachment", False)), r.get("default_attachment", ""), "", attachments)
+        for r in rows
+    )
+
+    for r in rows:
+
+        template = str(r.get("text", "") or "")
+        row_cat = str(r.get("category") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+        if row_cat not in categories:
+            row_cat = DEFAULT_CATEGORY
+
+        targets = resolve_channels(r, row_cat, category_channels, default_channel)
+        done = sent_channels.get(int(r["id"]), set())
+        if row_fully_sent(targets, done):
+            continue
+
+        selections = {
+            v: (variables.get(v, {}) or {}).get("default", "")
+            for v in extract_vars(template)
+        }
+        item, err = build_send_item(
+            day_row_id=int(r["id"]),
+            template=template,
+            message=template,
+            row_cat=row_cat,
+            req=bool(r.get("requires_attachment", False)),
+            selections=selections,
+            ek_sec=r.get("default_attachment", ""),
+            link="",
+            variables=variables,
+            attachments=attachments,
+            prefetched=prefetched,
+        )
+        if err:
+            skipped.append(err)
+        else:
+            item["channels"] = [ch for ch in targets if ch not in done]
+            items.append(item)
+    return items, skipped
+
+def run_dispatch(d: date, client: WebClient, channel_id: str, user_key: str, dry_run: bool = False, batch: bool = False) -> dict:
+    rec = reconcile_stale_reservations(client, user_key)
+    if rec[SENT] or rec[FAILED] or rec["pending"]:
+        log.info("Reconcile: %s gönderilmiş, %s serbest bırakıldı, %s bekliyor", rec[SENT], rec[FAILED], rec["pending"])
+
+    categories = db_get_categories()
+    variables = db_get_variables()
+    attachments = db_get_attachments(include_expired=False)
+    category_channels = db_get_category_channels()
+
+    items, skipped = collect_auto_items(d, variables, attachments, categories, category_channels, channel_id)
+    for s in skipped:
+        log.warning("Atlandı (varsayılan eksik) %s", s)
+
+    counts = {SENT: 0, LOCKED: 0, FAILED: 0, RETRYING: 0, "skipped": len(skipped)}
+    units = plan_sends(items, batch=batch)
+    if dry_run:
+        for unit in units:
+            for item in unit:
+                log.info("[dry-run] %s → %s", item["message"], ",".join(item["channels"]))
+        units = []
+    for unit_results in send_units(client, d, units, user_key):
+        for outcome, err in unit_results:
+            counts[outcome] += 1
+            if err:
+                log.error("Gönderilemedi %s", err)
+
+    log.info(
+        "Otomatik gönderim bitti | Gönderilen: %s | Kilitli: %s | Hatalı: %s | Tekrar denenecek: %s | Atlanan: %s",
+        counts[SENT], counts[LOCKED], counts[FAILED], counts[RETRYING], counts["skipped"],
+    )
+    return counts
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m slack_panel.dispatch", description="Zamanlanmış Slack gönderimi")
+    p.add_argument("--once", action="store_true", help="Bugünün satırlarını şimdi gönder ve çık")
+    p.add_argument("--at", default=get_secret("DISPATCH_AT", DEFAULT_AT), help="Gönderim saati (HH:MM)")
+    p.add_argument("--days", default=get_secret("DISPATCH_DAYS", DEFAULT_DAYS), help="Virgülle ayrılmış gün anahtarları")
+    p.add_argument("--dry-run", action="store_true", help="Göndermeden sadece listele")
+    p.add_argument(
+        "--batch", action="store_true", default=get_secret("DISPATCH_BATCH", "") in ("1", "true", "True"),
+        help="Aynı kategorideki eksiz satırları tek Block Kit mesajında topla",
+    )
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    token = get_secret("SLACK_USER_TOKEN")
+    channel_id = get_secret("SLACK_CHANNEL_ID")
+    user_key = get_secret("DISPATCH_USER_KEY", DEFAULT_USER_KEY)
+    if not token or not channel_id:
+        raise SystemExit("SLACK_USER_TOKEN / SLACK_CHANNEL_ID tanımlı değil.")
+    client = make_client(token)
+    ensure_schema()
+
+    if args.once:
+        run_dispatch(date.today(), client, channel_id, user_key, dry_run=args.dry_run, batch=args.batch)
+        if not args.dry_run:
+            # Bu süreçten sonra kayıtları tekrar deneyen olmaz (panelin worker'ı sadece operatörlerin kaydını alır)
+            timeout = float(get_secret("DISPATCH_DRAIN_SECONDS", DRAIN_TIMEOUT_SECONDS))
+            log.info("Retry kuyruğu boşaltma: %s", drain_retries(user_key, client, timeout))
+        return
+
+    days = [x.strip().lower() for x in args.days.split(",") if x.strip()]
+    # Gönderim saatinden önce preset görselleri ısıt (açılışta + her gönderim günü WARMUP_AT'te)
+    WarmupWorker(at=get_secret("WARMUP_AT", DEFAULT_WARMUP_AT), days=days).start()
+    MaintenanceWorker(at=get_secret("MAINTENANCE_AT", DEFAULT_MAINTENANCE_AT)).start()
+    # DB kesintisinde yerelde tutulan kilit/durumlar bağlantı gelince sent_log'a işlenir
+    SyncWorker().start()
+    # Bozuk preset'ler gönderimden önce işaretlensin (default_attachment'ı bozuk satır atlanır)
+    PresetHealthWorker(minutes=float(get_secret("PRESET_CHECK_MINUTES", DEFAULT_PRESET_CHECK_MINUTES))).start()
+    while True:
+        target = next_run_at(datetime.now(), args.at, days)
+        log.info("Sonraki otomatik gönderim: %s", target.isoformat(timespec="minutes"))
+        while (wait := (target - datetime.now()).total_seconds()) > 0:
+            # Beklerken retry kuyruğunu da işle (kendi kullanıcısının kayıtları)
+            try:
+                process_due_retries({user_key: client})
+            except Exception:
+                log.exception("Retry turu başarısız")
+            time.sleep(min(wait, RETRY_POLL_SECONDS))
+        try:
+            run_dispatch(target.date(), client, channel_id, user_key, dry_run=args.dry_run, batch=args.batch)
+        except Exception:
+            log.exception("Otomatik gönderim başarısız")
+
+
+if __name__ == "__main__":
+    main()
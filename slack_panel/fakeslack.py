@@ -0,0 +1,233 @@
+# slack_panel/fakeslack.py
+# Yerel Slack + Lightshot taklidi (aiohttp). Gönderim yolunu gerçek workspace'e ve prnt.sc'ye
+# dokunmadan denemek, yük testi (slack_panel.loadtest) ve kilit çakışmalarını ölçmek için.
+#   - /api/chat.postMessage, files.getUploadURLExternal + /upload/<id> + files.completeUploadExternal
+#     (files_upload_v2 akışı), files.info, conversations.history, auth.test
+#   - Kanal başına hız sınırı: saniyede rate_limit çağrıdan fazlası HTTP 429 + Retry-After ("ratelimited")
+#   - /ls/<kod>: og:image içeren Lightshot sayfası, /ls/img/<kod>.png: PNG
+#
+#   python -m slack_panel.fakeslack --port 8765 --latency 0.05 --rate-limit 1
+#   SLACK_API_URL=http://127.0.0.1:8765/api/ streamlit run app.py
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from aiohttp import web
+
+# 1x1 PNG; image_kb ile sonuna dolgu eklenir (upload boyutunu büyütmek için)
+PNG_1PX = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+
+class FakeSlack:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limit: float = 0.0, image_kb: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit  # kanal başına saniyede izin verilen çağrı (0 = sınırsız)
+        self.image = PNG_1PX + b"\0" * (image_kb * 1024)
+        self.messages: list[dict] = []  # {"channel", "text", "ts", "file_id", "metadata"}
+        self.calls: dict[str, int] = {}
+        self.rate_limited = 0
+        self.base_url = ""
+        self._recent: dict[str, deque] = {}
+        self._uploads: dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._runner = None
+
+    # ---------------- yardımcılar ----------------
+    async def _delay(self):
+        d = self.latency + random.uniform(-self.jitter, self.jitter)
+        if d > 0:
+            await asyncio.sleep(d)
+
+    def _limited(self, channel: str) -> bool:
+        if not self.rate_limit or not channel:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            q = self._recent.setdefault(channel, deque())
+            while q and now - q[0] >= 1.0:
+                q.popleft()
+            if len(q) >= self.rate_limit:
+                self.rate_limited += 1
+                return True
+            q.append(now)
+        return False
+
+    def _record(self, channel: str, text: str, file_id: str = "", metadata=None) -> str:
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata or "null")
+        with self._lock:
+            ts = f"{time.time():.6f}"
+            self.messages.append({"channel": channel, "text": text or "", "ts": ts, "file_id": file_id, "metadata": metadata})
+        return ts
+
+    def _history_message(self, m: dict, include_metadata: bool) -> dict:
+        out = {"type": "message", "text": m["text"], "ts": m["ts"]}
+        if m["file_id"]:
+            out["files"] = [{"id": m["file_id"]}]
+        if include_metadata and m["metadata"]:
+            out["metadata"] = m["metadata"]
+        return out
+
+    @staticmethod
+    async def _params(req) -> dict:
+        # slack_sdk bazı metotlarda argümanları query string'de yollar (files.completeUploadExternal)
+        params = dict(req.query)
+        if req.content_type == "application/json":
+            params.update(await req.json())
+        else:
+            params.update(await req.post())
+        return params
+
+    @staticmethod
+    def _ok(**data):
+        return web.json_response({"ok": True, **data})
+
+    @staticmethod
+    def _error(code: str, status: int = 200, headers=None):
+        return web.json_response({"ok": False, "error": code}, status=status, headers=headers)
+
+    # ---------------- Slack Web API ----------------
+    async def api(self, req):
+        method = req.match_info["method"]
+        params = await self._params(req)
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        await self._delay()
+
+        channel = str(params.get("channel") or params.get("channel_id") or "")
+        if method in ("chat.postMessage", "files.completeUploadExternal") and self._limited(channel):
+            return self._error("ratelimited", status=429, headers={"Retry-After": "1"})
+
+        if method == "auth.test":
+            return self._ok(user_id="U0FAKE", team="fake")
+        if method == "chat.postMessage":
+            if not channel:
+                return self._error("channel_not_found")
+            ts = self._record(channel, params.get("text", ""), metadata=params.get("metadata"))
+            return self._ok(channel=channel, ts=ts, message={"ts": ts, "text": params.get("text", "")})
+        if method == "files.getUploadURLExternal":
+            file_id = f"F{next(self._ids):08d}"
+            return self._ok(upload_url=f"{self.base_url}/upload/{file_id}", file_id=file_id)
+        if method == "files.completeUploadExternal":
+            files = params.get("files") or "[]"
+            files = json.loads(files) if isinstance(files, str) else files
+            file_id = str(files[0].get("id", "")) if files else ""
+            if file_id not in self._uploads:
+                return self._error("file_not_found")
+            ts = self._record(channel, params.get("initial_comment", ""), file_id)
+            shares = {"public": {channel: [{"ts": ts}]}} if channel else {}
+            return self._ok(files=[{"id": file_id, "title": files[0].get("title", ""), "shares": shares}])
+        if method == "files.info":
+            file_id = str(params.get("file", ""))
+            if file_id not in self._uploads:
+                return self._error("file_not_found")
+            shares = {}
+            with self._lock:
+                for m in self.messages:
+                    if m["file_id"] == file_id:
+                        shares.setdefault("public", {}).setdefault(m["channel"], []).append({"ts": m["ts"]})
+            return self._ok(file={"id": file_id, "shares": shares})
+        if method == "conversations.history":
+            oldest = float(params.get("oldest") or 0)
+            include_metadata = str(params.get("include_all_metadata", "")).lower() in ("1", "true")
+            with self._lock:
+                msgs = [
+                    self._history_message(m, include_metadata)
+                    for m in reversed(self.messages)
+                    if m["channel"] == channel and float(m["ts"]) >= oldest
+                ]
+            return self._ok(messages=msgs, has_more=False)
+        return self._error("unknown_method", status=404)
+
+    async def upload(self, req):
+        body = await req.read()
+        await self._delay()
+        with self._lock:
+            self._uploads[req.match_info["file_id"]] = len(body)
+        return web.Response(text="OK - " + str(len(body)))
+
+    # ---------------- Lightshot ----------------
+    async def lightshot_page(self, req):
+        await self._delay()
+        code = req.match_info["code"]
+        return web.Response(
+            text=f'<html><head><meta property="og:image" content="{self.base_url}/ls/img/{code}.png"/></head></html>',
+            content_type="text/html",
+        )
+
+    async def lightshot_image(self, req):
+        await self._delay()
+        return web.Response(body=self.image, content_type="image/png")
+
+    def lightshot_url(self, code: str) -> str:
+        return f"{self.base_url}/ls/{code}"
+
+    # ---------------- sunucu ----------------
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/api/{method}", self.api)
+        app.router.add_get("/api/{method}", self.api)  # conversations.history GET ile gelir
+        app.router.add_post("/upload/{file_id}", self.upload)
+        app.router.add_get("/ls/img/{code}.png", self.lightshot_image)
+        app.router.add_get("/ls/{code}", self.lightshot_page)
+        return app
+
+    def start(self, host: str = "127.0.0.1", port: int = 8765) -> str:
+        # Kendi event loop'unda arka plan thread'i. Dönen: kök URL (Slack API = <url>/api/)
+        self.base_url = f"http://{host}:{port}"
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        self._loop.run_until_complete(web.TCPSite(self._runner, host, port).start())
+        threading.Thread(target=self._loop.run_forever, name="fake-slack", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"messages": len(self.messages), "calls": dict(self.calls), "rate_limited": self.rate_limited}
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m slack_panel.fakeslack", description="Yerel Slack + Lightshot taklidi")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=0.05, help="Her isteğe eklenen gecikme (sn)")
+    p.add_argument("--jitter", type=float, default=0.02)
+    p.add_argument("--rate-limit", type=float, default=0.0, help="Kanal başına saniyede çağrı (0 = sınırsız)")
+    p.add_argument("--image-kb", type=int, default=0, help="Lightshot görseline eklenecek dolgu (KB)")
+    args = p.parse_args(argv)
+
+    fake = FakeSlack(args.latency, args.jitter, args.rate_limit, args.image_kb)
+    url = fake.start(args.host, args.port)
+    print(f"Slack API : {url}/api/   (SLACK_API_URL)")
+    print(f"Lightshot : {url}/ls/<kod>")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(fake.summary(), ensure_ascii=False))
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# slack_panel/helpers.py
+# Streamlit'ten bağımsız sabitler ve yardımcılar (app.py ve headless dispatcher ortak kullanır).
+
+import re
+from io import BytesIO
+from datetime import date, datetime, timedelta
+
+import requests
+
+# ================== CONSTANTS ==================
+DAY_KEYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+DAYS_TR = {
+    0: "Pazartesi", 1: "Salı", 2: "Çarşamba",
+    3: "Perşembe", 4: "Cuma", 5: "Cumartesi", 6: "Pazar"
+}
+
+SELECT_PLACEHOLDER = "Seçiniz…"
+MANUAL_OPTION = "Manuel"
+DEFAULT_CATEGORY = "Genel"
+DEFAULT_CATEGORY_ID = 0  # categories.id; FK'ler silinen kategoride buna düşer (migration 9)
+
+VAR_PATTERN = re.compile(r"\{\{([^{}]+)\}\}")
+
+# Anchor temizleme
+ANCHOR_HTML = re.compile(r'<a\s+[^>]*href=[\'"][^\'"]+[\'"][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+ANCHOR_MD = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')  # [text](url)
+
+# ================== TR DATE (locale bağımsız) ==================
+TR_MONTHS = {
+    "ocak": 1, "şubat": 2, "subat": 2, "mart": 3, "nisan": 4,
+    "mayıs": 5, "mayis": 5, "haziran": 6, "temmuz": 7,
+    "ağustos": 8, "agustos": 8, "eylül": 9, "eylul": 9,
+    "ekim": 10, "kasım": 11, "kasim": 11, "aralık": 12, "aralik": 12
+}
+TR_MONTH_NAMES = {
+    1: "Ocak", 2: "Şubat", 3: "Mart", 4: "Nisan", 5: "Mayıs", 6: "Haziran",
+    7: "Temmuz", 8: "Ağustos", 9: "Eylül", 10: "Ekim", 11: "Kasım", 12: "Aralık"
+}
+
+DATE_PREFIX_RE = re.compile(
+    r"^\s*(\d{1,2})\.?\s+([A-Za-zÇĞİÖŞÜçğıöşü]+)\s*(\d{4})?\b",
+    re.UNICODE
+)
+
+def extract_tr_date_from_name(name: str):
+    if not name:
+        return None
+    m = DATE_PREFIX_RE.match(name.strip())
+    if not m:
+        return None
+    day = int(m.group(1))
+    mon = (m.group(2) or "").strip().lower()
+    year = int(m.group(3)) if m.group(3) else date.today().year
+    month = TR_MONTHS.get(mon)
+    if not month:
+        return None
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def format_tr_date(d: date) -> str:
+    return f"{d.day:02d} {TR_MONTH_NAMES[d.month]} {d.year}"
+
+# ================== HELPERS ==================
+def next_run_at(now: datetime, at: str, days: list[str]) -> datetime:
+    # Bir sonraki "days" gününün HH:MM anı (dispatcher ve warm-up zamanlaması)
+    hh, mm = (int(x) for x in at.split(":", 1))
+    candidate = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    for _ in range(8):
+        if DAY_KEYS[candidate.weekday()] in days:
+            return candidate
+        candidate += timedelta(days=1)
+    raise ValueError("Gün listesi geçerli bir gün içermiyor.")
+
+def extract_vars(text: str) -> list[str]:
+    if not text:
+        return []
+    return [m.group(1).strip() for m in VAR_PATTERN.finditer(text) if m.group(1).strip()]
+
+def is_unselected(value) -> bool:
+    return str(value if value is not None else "").strip() in ("", SELECT_PLACEHOLDER, "None")
+
+def parse_channels(text) -> list[str]:
+    # "C123, C456\nC789" -> ["C123", "C456", "C789"] (sıra korunur, tekrarlar atılır)
+    if isinstance(text, (list, tuple, set)):
+        parts = [str(x) for x in text]
+    else:
+        parts = re.split(r"[,\s]+", str(text or ""))
+    out = []
+    for p in parts:
+        p = p.strip()
+        if p and p not in out:
+            out.append(p)
+    return out
+
+def looks_like_lightshot(url: str) -> bool:
+    if not url:
+        return False
+    u = url.strip().lower()
+    return ("prnt.sc/" in u) or ("prntscr.com" in u) or ("image.prntscr.com" in u)
+
+def fetch_lightshot_image_ex(prnt_url: str):
+    # Dönen: (BytesIO | None, hata metni, geçici_mi)
+    # Geçici: timeout / bağlantı / 429 / 5xx → tekrar denenebilir. Kalıcı: 404, og:image yok, resim değil.
+    headers = {"User-Agent": "Mozilla/5.0"}
+    try:
+        page = requests.get(prnt_url, headers=headers, timeout=10)
+        if page.status_code != 200:
+            return None, f"lightshot sayfa HTTP {page.status_code}", _is_transient_status(page.status_code)
+        match = re.search(r'property="og:image"\s+content="([^"]+)"', page.text)
+        if not match:
+            return None, "lightshot og:image yok", False
+        image_url = match.group(1)
+        img = requests.get(image_url, headers=headers, timeout=10)
+        if img.status_code == 200 and img.headers.get("Content-Type", "").startswith("image/"):
+            return BytesIO(img.content), None, False
+        if img.status_code != 200:
+            return None, f"lightshot görsel HTTP {img.status_code}", _is_transient_status(img.status_code)
+        return None, "lightshot görsel değil", False
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+        return None, f"lightshot: {e.__class__.__name__}", True
+    except requests.RequestException as e:
+        return None, f"lightshot: {e.__class__.__name__}", False
+    except Exception as e:
+        return None, f"lightshot: {e}", False
+
+def _is_transient_status(code: int) -> bool:
+    return code == 429 or code >= 500
+
+def fetch_lightshot_image(prnt_url: str):
+    return fetch_lightshot_image_ex(prnt_url)[0]
+
+def strip_anchors(text: str) -> str:
+    if not text:
+        return text
+    text = ANCHOR_HTML.sub(r"\1", text)
+    text = ANCHOR_MD.sub(r"\1", text)
+    return text
+
+def safe_filename_from_category(cat: str) -> str:
+    cat = (cat or "image").strip()
+    cat = re.sub(r'[\\/:*?"<>|]', "_", cat)
+    cat = re.sub(r"\s+", " ", cat).strip()
+    base = cat[:60] if cat else "image"
+    return f"{base}.png"
@@ -0,0 +1,187 @@
+# slack_panel/loadtest.py
+# Yük testi: N eşzamanlı operatör (ayrı süreç = ayrı DB bağlantısı + ayrı aio loop) aynı satırları
+# aynı anda göndermeye çalışır; db_try_reserve_send kilidi yarışır, Slack yerine fakeslack kullanılır.
+# Rapor: mesaj/sn, gönderim süresi p50/p95 (rezervasyon → settle), kilitli/tekrar/başarısız sayıları ve
+# Slack tarafında çift gönderim sayısı (aynı satır aynı kanala birden fazla mesaj).
+#
+#   python -m slack_panel.loadtest --operators 4 --rows 50 --channels 3 --rate-limit 1
+#
+# Sadece yerel Postgres'e yazar (DATABASE_URL localhost / unix socket olmalı, aksi halde --allow-remote).
+# Satırlar gerçek day_rows ile çakışmayan sentetik day_row_id'lerle bugünün sent_log'una yazılır ve
+# sonunda silinir (--keep ile bırakılır).
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from urllib.parse import urlparse
+
+from .config import get_secret
+from .fakeslack import FakeSlack
+from .helpers import MANUAL_OPTION
+
+# Sentetik day_row_id aralığı (gerçek bigserial id'lerle çakışmaz)
+LOADTEST_ROW_BASE = 9_000_000_000
+
+
+def _is_local(db_url: str) -> bool:
+    u = urlparse(db_url)
+    host = u.hostname or ""
+    return host in ("", "localhost", "127.0.0.1", "::1") or host.startswith("/")
+
+def _marker(run: str, row: int) -> str:
+    return f"[lt-{run}-{row}]"
+
+def _operator(i: int, spec: dict) -> dict:
+    # Alt süreç: kendi bağlantısı ve loop'u ile tüm satırları (karışık sırayla) göndermeyi dener
+    from . import aio
+    from .sender import build_send_item, plan_sends, send_units_async
+    from .slack import make_client
+
+    os.environ["SLACK_API_URL"] = spec["slack_url"]
+    client = make_client("xoxp-loadtest")
+    rows = list(range(spec["rows"]))
+    random.Random(spec["seed"] + i).shuffle(rows)
+
+    # Görselli satırlar prnt.sc linkiyle doğrulanır, görsel fakeslack'in Lightshot sayfasından önceden çekilir
+    links = {r: f"https://prnt.sc/lt{spec['run']}{r}" for r in rows if spec["image_every"] and r % spec["image_every"] == 0}
+    fetched = aio.prefetch_images(f"{spec['ls_url']}/ls/lt{spec['run']}{r}" for r in links)
+    prefetched = {link: fetched[f"{spec['ls_url']}/ls/lt{spec['run']}{r}"] for r, link in links.items()}
+
+    items = []
+    for r in rows:
+        req = r in links
+        item, err = build_send_item(
+            spec["row_base"] + r, f"Yük testi {r}", f"Yük testi {r} {_marker(spec['run'], r)}", "Genel",
+            req, {}, MANUAL_OPTION if req else "", links.get(r, ""), {}, {}, prefetched=prefetched,
+        )
+        if item is None:
+            raise RuntimeError(err)
+        item["channels"] = spec["channels"]
+        items.append(item)
+
+    # Tüm operatörler aynı anda başlasın
+    time.sleep(max(0.0, spec["start_at"] - time.time()))
+    timings = []
+    t0 = time.monotonic()
+    results = aio.run(send_units_async(client, date.fromisoformat(spec["date"]), plan_sends(items, False), f"loadtest-{i}", timings=timings))
+    elapsed = time.monotonic() - t0
+    outcomes = Counter(o for unit in results for o, _ in unit)
+    return {"operator": i, "elapsed": elapsed, "outcomes": dict(outcomes), "timings": timings}
+
+def _percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+def cleanup(run_ids: list[int], d: date):
+    from .db import get_conn
+    with get_conn().cursor() as cur:
+        cur.execute("delete from sent_log where sent_date=%s and day_row_id = any(%s)", (d, run_ids))
+        return cur.rowcount
+
+def run_load_test(
+    operators: int = 4, rows: int = 50, channels: int = 2, image_every: int = 4,
+    latency: float = 0.05, jitter: float = 0.02, rate_limit: float = 0.0, image_kb: int = 0,
+    port: int = 8765, keep: bool = False,
+) -> dict:
+    from .db import get_conn
+    from .migrations import ensure_schema
+
+    ensure_schema()
+    run = f"{int(time.time()) % 100000:05d}{random.randint(0, 99):02d}"
+    row_base = LOADTEST_ROW_BASE + int(run) * 1000
+    if rows > 1000:
+        raise SystemExit("--rows en fazla 1000")
+    d = date.today()
+    chans = [f"CLOAD{c:02d}" for c in range(channels)]
+
+    fake = FakeSlack(latency, jitter, rate_limit, image_kb)
+    base = fake.start("127.0.0.1", port)
+    spec = {
+        "run": run, "row_base": row_base, "rows": rows, "channels": chans, "image_every": image_every,
+        "slack_url": f"{base}/api/", "ls_url": base, "date": d.isoformat(), "seed": int(run),
+        "start_at": time.time() + 2.0,
+    }
+    try:
+        with ProcessPoolExecutor(max_workers=operators) as pool:
+            t0 = time.time()
+            reports = list(pool.map(_operator, range(operators), [spec] * operators))
+            wall = time.time() - max(t0, spec["start_at"])
+
+        ids = [row_base + r for r in range(rows)]
+        with get_conn().cursor() as cur:
+            cur.execute(
+                "select status, count(*) from sent_log where sent_date=%s and day_row_id = any(%s) group by status",
+                (d, ids),
+            )
+            db_status = dict(cur.fetchall())
+
+        per_key = Counter(
+            (m["channel"], m["text"][m["text"].find(f"[lt-{run}-"):].split("]")[0])
+            for m in fake.messages if f"[lt-{run}-" in m["text"]
+        )
+        delivered = sum(per_key.values())
+        outcomes = Counter()
+        for r in reports:
+            outcomes.update(r["outcomes"])
+        timings = [t for r in reports for t in r["timings"]]
+        summary = {
+            "operators": operators,
+            "rows": rows,
+            "channels": channels,
+            "expected_messages": rows * channels,
+            "slack_messages": delivered,
+            "duplicates": sum(n - 1 for n in per_key.values() if n > 1),
+            "missing": rows * channels - len(per_key),
+            "wall_seconds": round(wall, 3),
+            "messages_per_sec": round(delivered / wall, 2) if wall > 0 else 0.0,
+            "send_p50_ms": round(_percentile(timings, 50) * 1000, 1),
+            "send_p95_ms": round(_percentile(timings, 95) * 1000, 1),
+            "outcomes": dict(outcomes),
+            "sent_log": db_status,
+            "slack": fake.summary(),
+        }
+    finally:
+        fake.stop()
+        if not keep:
+            cleanup([row_base + r for r in range(rows)], d)
+    return summary
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m slack_panel.loadtest", description="Eşzamanlı operatör yük testi (yerel)")
+    p.add_argument("--operators", type=int, default=4)
+    p.add_argument("--rows", type=int, default=50)
+    p.add_argument("--channels", type=int, default=2)
+    p.add_argument("--image-every", type=int, default=4, help="Her n. satır görselli (0 = hiçbiri)")
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--jitter", type=float, default=0.02)
+    p.add_argument("--rate-limit", type=float, default=0.0, help="Kanal başına saniyede çağrı (0 = sınırsız)")
+    p.add_argument("--image-kb", type=int, default=0)
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--keep", action="store_true", help="sent_log kayıtlarını silme")
+    p.add_argument("--allow-remote", action="store_true", help="Yerel olmayan DATABASE_URL'e de yaz")
+    args = p.parse_args(argv)
+
+    db_url = get_secret("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL tanımlı değil.")
+    if not _is_local(db_url) and not args.allow_remote:
+        raise SystemExit("DATABASE_URL yerel değil; yük testi sadece yerel Postgres'te çalışır (--allow-remote).")
+
+    summary = run_load_test(
+        args.operators, args.rows, args.channels, args.image_every,
+        args.latency, args.jitter, args.rate_limit, args.image_kb, args.port, args.keep,
+    )
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if summary["duplicates"]:
+        raise SystemExit(f"Çift gönderim: {summary['duplicates']}")
+
+
+if __name__ == "__main__":
+    main()
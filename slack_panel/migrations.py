@@ -0,0 +1,498 @@
+# slack_panel/migrations.py
+# Versiyonlu şema migration'ları. app.py ve dispatcher açılışta run_migrations() çağırır;
+# elle çalıştırmak için:
+#
+#   python -m slack_panel.migrations            # bekleyenleri uygula + index kontrolü
+#   python -m slack_panel.migrations --check    # sadece index kontrolü
+#
+# Kurallar: uygulanmış bir migration değiştirilmez, yenisi listenin sonuna eklenir. Her adım
+# idempotent yazılır (if not exists), böylece şemayı eskiden elle kurmuş veritabanları da sorunsuz geçer.
+
+import argparse
+import logging
+
+from .archive import ensure_partitions
+from .db import connect, get_conn
+
+log = logging.getLogger("slack_panel.migrations")
+
+# Aynı anda açılan iki süreç migration'ı iki kere uygulamasın (pg_advisory_xact_lock anahtarı)
+MIGRATION_LOCK_ID = 7_310_451
+
+MIGRATIONS = [
+    (1, "temel tablolar", """
+        create table if not exists categories (
+            name text primary key
+        );
+        create table if not exists day_rows (
+            id bigserial primary key,
+            day_key text not null,
+            text text not null,
+            category text,
+            requires_attachment boolean default false,
+            active boolean default true
+        );
+        create table if not exists variables (
+            name text primary key,
+            category text
+        );
+        create table if not exists variable_options (
+            id bigserial primary key,
+            variable_name text references variables(name) on delete cascade,
+            value text
+        );
+        create table if not exists attachments (
+            name text primary key,
+            category text,
+            url text,
+            valid_date date
+        );
+        create table if not exists sent_log (
+            id bigserial primary key,
+            sent_date date not null,
+            user_key text,
+            template_text text
+        );
+        alter table sent_log add column if not exists day_row_id bigint;
+        drop index if exists sent_log_unique_day_template;
+    """),
+    (2, "zamanlanmış gönderim", """
+        alter table day_rows add column if not exists auto_send boolean not null default false;
+        alter table day_rows add column if not exists default_attachment text;
+        alter table variables add column if not exists default_value text;
+    """),
+    (3, "çoklu kanal", """
+        alter table sent_log add column if not exists channel text not null default '';
+        create unique index if not exists sent_log_unique_day_row_channel on sent_log (sent_date, day_row_id, channel);
+        drop index if exists sent_log_unique_day_row;
+        alter table day_rows add column if not exists channels text[];
+        create table if not exists category_channels (
+            category text not null,
+            channel_id text not null,
+            primary key (category, channel_id)
+        );
+    """),
+    (4, "iki aşamalı kilit", """
+        alter table sent_log add column if not exists status text not null default 'sent';
+        alter table sent_log add column if not exists message_text text;
+        alter table sent_log add column if not exists slack_ts text;
+        alter table sent_log add column if not exists slack_file_id text;
+        alter table sent_log add column if not exists reserved_at timestamptz;
+        alter table sent_log add column if not exists lease_expires_at timestamptz;
+        alter table sent_log add column if not exists attempts int not null default 0;
+        alter table sent_log add column if not exists error text;
+    """),
+    (5, "retry kuyruğu", """
+        alter table sent_log drop constraint if exists sent_log_status_check;
+        alter table sent_log add constraint sent_log_status_check
+            check (status in ('reserved','sent','failed','retrying'));
+        alter table sent_log add column if not exists next_attempt_at timestamptz;
+        alter table sent_log add column if not exists category text;
+        alter table sent_log add column if not exists image_url text;
+        create index if not exists sent_log_retry_due on sent_log (next_attempt_at) where status='retrying';
+    """),
+    (6, "sık sorgu indexleri + kısıtlar", """
+        -- db_get_day_rows: where day_key=? and active order by id (index-only scan)
+        create index if not exists day_rows_day_key_active on day_rows (day_key, id)
+            include (text, category, requires_attachment, auto_send, default_attachment, channels)
+            where active;
+        -- db_get_variables: variable_options where variable_name=? order by id
+        create index if not exists variable_options_variable_name on variable_options (variable_name, id) include (value);
+        -- db_get_attachments(include_expired=False): valid_date >= current_date
+        create index if not exists attachments_valid_date on attachments (valid_date);
+        -- Gönderim logu özeti: status='sent' günleri
+        create index if not exists sent_log_sent_dates on sent_log (sent_date) where status='sent';
+        -- Reconcile: lease'i dolmuş rezervasyonlar
+        create index if not exists sent_log_stale_reserved on sent_log (lease_expires_at) where status='reserved';
+
+        -- Yeni satırlar için geçerli; eski veriyi bloklamasın diye not valid
+        alter table day_rows drop constraint if exists day_rows_day_key_check;
+        alter table day_rows add constraint day_rows_day_key_check check (
+            day_key in ('monday','tuesday','wednesday','thursday','friday','saturday','sunday')
+        ) not valid;
+        alter table sent_log drop constraint if exists sent_log_attempts_check;
+        alter table sent_log add constraint sent_log_attempts_check check (attempts >= 0) not valid;
+    """),
+    (7, "sent_log aylık partition + arşiv özeti", """
+        -- Mevcut tablo yeniden adlandırılır, aynı kolonlarla range partitioned sent_log kurulur, veri taşınır.
+        -- Partition'da unique/PK index'leri partition anahtarını (sent_date) içermek zorunda.
+        alter table sent_log rename to sent_log_legacy;
+        -- PK adı elle kurulmuş şemalarda farklı olabilir: pg_constraint'ten bulunur (yeni sent_log_pkey ile çakışmasın)
+        do $$
+        declare pk text;
+        begin
+            select conname into pk from pg_constraint
+            where conrelid = 'sent_log_legacy'::regclass and contype = 'p';
+            if pk is not null and pk <> 'sent_log_legacy_pkey' then
+                execute format('alter table sent_log_legacy rename constraint %I to sent_log_legacy_pkey', pk);
+            end if;
+        end $$;
+        drop index if exists sent_log_unique_day_row_channel;
+        drop index if exists sent_log_retry_due;
+        drop index if exists sent_log_sent_dates;
+        drop index if exists sent_log_stale_reserved;
+        do $$
+        declare seq text := pg_get_serial_sequence('sent_log_legacy', 'id');
+        begin
+            if seq is not null then
+                execute format('alter sequence %s owned by none', seq);
+            end if;
+        end $$;
+
+        create table sent_log (like sent_log_legacy including defaults including constraints)
+            partition by range (sent_date);
+        alter table sent_log add constraint sent_log_pkey primary key (id, sent_date);
+        create unique index sent_log_unique_day_row_channel on sent_log (sent_date, day_row_id, channel);
+        create index sent_log_retry_due on sent_log (next_attempt_at) where status='retrying';
+        create index sent_log_sent_dates on sent_log (sent_date) where status='sent';
+        create index sent_log_stale_reserved on sent_log (lease_expires_at) where status='reserved';
+
+        do $$
+        declare m date;
+        begin
+            for m in
+                select generate_series(
+                    date_trunc('month', coalesce((select min(sent_date) from sent_log_legacy), current_date)),
+                    date_trunc('month', current_date) + interval '2 months',
+                    interval '1 month'
+                )::date
+            loop
+                execute format(
+                    'create table if not exists %I partition of sent_log for values from (%L) to (%L)',
+                    'sent_log_' || to_char(m, '"y"YYYY"m"MM'), m, (m + interval '1 month')::date
+                );
+            end loop;
+        end $$;
+
+        insert into sent_log select * from sent_log_legacy;
+        drop table sent_log_legacy;
+        -- id sequence'ı yeni tabloya bağla (default ifadesinin bağımlı olduğu sequence)
+        do $$
+        declare seq regclass;
+        begin
+            select d.refobjid::regclass into seq
+            from pg_depend d
+            join pg_attrdef ad on ad.oid = d.objid
+            join pg_class s on s.oid = d.refobjid and s.relkind = 'S'
+            where d.classid = 'pg_attrdef'::regclass and d.refclassid = 'pg_class'::regclass
+              and ad.adrelid = 'sent_log'::regclass
+            limit 1;
+            if seq is not null then
+                execute format('alter sequence %s owned by sent_log.id', seq);
+            end if;
+        end $$;
+
+        -- Sıkıştırılmış (arşivlenmiş) aylar: gün + kullanıcı bazlı sayılar
+        create table if not exists sent_log_daily_summary (
+            sent_date date not null,
+            user_key text not null default '',
+            sent_count int not null default 0,
+            failed_count int not null default 0,
+            total_count int not null default 0,
+            archived_at timestamptz not null default now(),
+            primary key (sent_date, user_key)
+        );
+    """),
+    (8, "day_rows sıra kolonu", """
+        -- Sıralama artık id ile değil position ile (kaydet sadece değişen satırları günceller)
+        alter table day_rows add column if not exists position int;
+        update day_rows d set position = x.rn
+        from (select id, row_number() over (partition by day_key order by id) as rn from day_rows) x
+        where x.id = d.id and d.position is null;
+        create index if not exists day_rows_day_key_position on day_rows (day_key, position, id)
+            include (text, category, requires_attachment, auto_send, default_attachment, channels)
+            where active;
+        drop index if exists day_rows_day_key_active;
+    """),
+    (9, "kategori id + foreign key", """
+        -- Kategoriler id ile referanslanır: yeniden adlandırma tek satır, silme FK ile Genel'e (id 0) düşer.
+        -- Bilinmeyen kategori adları (uygulamanın zaten Genel saydığı) Genel'e bağlanır.
+        insert into categories(name) values ('Genel') on conflict do nothing;
+        alter table categories add column if not exists id bigint;
+        create sequence if not exists categories_id_seq owned by categories.id;
+        update categories set id = 0 where name = 'Genel';
+        update categories set id = nextval('categories_id_seq') where id is null;
+        alter table categories alter column id set default nextval('categories_id_seq');
+        alter table categories alter column id set not null;
+        alter table categories drop constraint if exists categories_pkey;
+        -- Kısıt zaten varsa (yarıda kalıp tekrar çalışan migration, elle eklenmiş kısıt) tekrar eklenmez
+        do $$
+        begin
+            if not exists (select 1 from pg_constraint where conname = 'categories_name_key') then
+                alter table categories add constraint categories_name_key unique (name);
+            end if;
+        end $$;
+        alter table categories add constraint categories_pkey primary key (id);
+
+        alter table day_rows add column if not exists category_id bigint not null default 0
+            references categories(id) on delete set default;
+        update day_rows t set category_id = c.id from categories c where c.name = t.category;
+        alter table day_rows drop column if exists category;
+        create index if not exists day_rows_category_id on day_rows (category_id);
+        -- category kolonu düştüğünde INCLUDE'unda olduğu index de düşer; category_id ile yeniden
+        create index if not exists day_rows_day_key_position on day_rows (day_key, position, id)
+            include (text, category_id, requires_attachment, auto_send, default_attachment, channels)
+            where active;
+
+        alter table variables add column if not exists category_id bigint not null default 0
+            references categories(id) on delete set default;
+        update variables t set category_id = c.id from categories c where c.name = t.category;
+        alter table variables drop column if exists category;
+        create index if not exists variables_category_id on variables (category_id);
+
+        alter table attachments add column if not exists category_id bigint not null default 0
+            references categories(id) on delete set default;
+        update attachments t set category_id = c.id from categories c where c.name = t.category;
+        alter table attachments drop column if exists category;
+        create index if not exists attachments_category_id on attachments (category_id);
+
+        alter table category_channels add column if not exists category_id bigint
+            references categories(id) on delete cascade;
+        update category_channels t set category_id = c.id from categories c where c.name = t.category;
+        delete from category_channels where category_id is null;
+        alter table category_channels drop constraint if exists category_channels_pkey;
+        alter table category_channels drop column if exists category;
+        alter table category_channels alter column category_id set not null;
+        alter table category_channels add constraint category_channels_pkey primary key (category_id, channel_id);
+    """),
+    (10, "seçenek araması (pg_trgm)", """
+        -- Büyük seçenek listelerinde DB araması (db_search_variable_options). Eklenti kurulamıyorsa
+        -- (yetki / paket yok) arama ilike ile devam eder.
+        do $$
+        begin
+            create extension if not exists pg_trgm;
+        exception when others then
+            raise notice 'pg_trgm kurulamadı (%), seçenek araması ilike ile yapılacak', sqlerrm;
+        end $$;
+        do $$
+        begin
+            if exists (select 1 from pg_extension where extname = 'pg_trgm') then
+                create index if not exists variable_options_value_trgm on variable_options
+                    using gin (value gin_trgm_ops);
+            end if;
+        end $$;
+    """),
+    (11, "sent_log seçim geçmişi", """
+        -- Gönderilen değişken değerleri + ek seçimi; tablo bunlarla ön doldurulur (db_get_last_selections)
+        alter table sent_log add column if not exists selections jsonb;
+        alter table sent_log add column if not exists attachment_choice text;
+        create index if not exists sent_log_day_row_latest on sent_log (day_row_id, sent_date desc, id desc)
+            where status='sent';
+    """),
+    (12, "paylaşımlı cache tablosu", """
+        -- CACHE_BACKEND=postgres: UNLOGGED (WAL yok, replikasyona gitmez, çökmede boşalır; cache için yeterli)
+        create unlogged table if not exists cache_entries (
+            key text primary key,
+            value bytea not null,
+            expires_at timestamptz
+        );
+        create index if not exists cache_entries_expires_at on cache_entries (expires_at);
+    """),
+    (13, "operatör kayıtları", """
+        -- Parola ve Slack token DB'de tutulmaz: secret adı (referans) saklanır
+        create table if not exists operators (
+            user_key text primary key,
+            role text not null default 'operator' check (role in ('admin', 'operator')),
+            password_secret text not null,
+            token_secret text not null,
+            default_channels text[] not null default '{}',
+            channel_secret text,
+            active boolean not null default true,
+            position int
+        );
+        -- Boş = tüm kategoriler
+        create table if not exists operator_categories (
+            user_key text not null references operators(user_key) on delete cascade on update cascade,
+            category_id bigint not null references categories(id) on delete cascade,
+            primary key (user_key, category_id)
+        );
+        -- Önceki sabit iki kullanıcı
+        insert into operators(user_key, role, password_secret, token_secret, channel_secret, position) values
+            ('Sinan', 'admin', 'APP_PASSWORD', 'SLACK_USER_TOKEN', 'SLACK_CHANNEL_ID', 1),
+            ('Yağmur', 'operator', 'APP_PASSWORD_2', 'SLACK_USER_TOKEN_2', 'SLACK_CHANNEL_ID_2', 2)
+        on conflict do nothing;
+    """),
+    (14, "satır sahipliği (row claims)", """
+        -- Kısa ömürlü: operatör satırı hazırlarken tutar, editör açıkken yenilenir. Çökmede kaybolması sorun değil.
+        create unlogged table if not exists row_claims (
+            claim_date date not null,
+            day_row_id bigint not null,
+            user_key text not null,
+            claimed_at timestamptz not null default now(),
+            expires_at timestamptz not null,
+            primary key (claim_date, day_row_id)
+        );
+    """),
+    (15, "gönderim metrikleri", """
+        -- Gönderim başına süre/boyut/hata kodu (deneme sayısı attempts'ta); Gönderim Logu panosu okur
+        alter table sent_log add column if not exists fetch_ms int;
+        alter table sent_log add column if not exists send_ms int;
+        alter table sent_log add column if not exists send_method text;
+        alter table sent_log add column if not exists bytes_uploaded bigint;
+        alter table sent_log add column if not exists error_code text;
+    """),
+    (16, "preset sağlık kontrolü", """
+        -- preset_health.check_presets yazar; aktif preset seçimi attachments_valid_date (migration 6) ile
+        alter table attachments add column if not exists health_status text;
+        alter table attachments drop constraint if exists attachments_health_status_check;
+        alter table attachments add constraint attachments_health_status_check
+            check (health_status in ('ok','broken'));
+        alter table attachments add column if not exists health_checked_at timestamptz;
+        alter table attachments add column if not exists health_error text;
+        alter table attachments add column if not exists image_url text;
+        alter table attachments add column if not exists image_bytes int;
+    """),
+    (17, "gönderim idempotency anahtarı", """
+        -- Rezervasyonda üretilir, chat.postMessage metadata'sında yollanır; reconcile mesajı bununla eşleştirir
+        alter table sent_log add column if not exists send_key text;
+    """),
+]
+
+# Sık sorgular ve kullanabilecekleri indexler (EXPLAIN ile doğrulanır)
+HOT_QUERIES = [
+    (
+        "day_rows (day_key, active, order by position)",
+        "select id, text from day_rows where day_key=%s and active=true order by position, id",
+        ("monday",),
+        {"day_rows_day_key_position"},
+    ),
+    (
+        "sent_log (sent_date)",
+        "select day_row_id, channel from sent_log where sent_date=current_date and status<>'failed'",
+        (),
+        {"sent_log_unique_day_row_channel"},
+    ),
+    (
+        "variable_options (variable_name, order by id)",
+        "select value from variable_options where variable_name=%s order by id",
+        ("x",),
+        {"variable_options_variable_name"},
+    ),
+    (
+        "attachments (valid_date)",
+        "select name from attachments where valid_date >= current_date",
+        (),
+        {"attachments_valid_date"},
+    ),
+    (
+        "sent_log seçim geçmişi (distinct on day_row_id)",
+        """
+        select distinct on (day_row_id) day_row_id, selections from sent_log
+        where day_row_id = any(%s) and status='sent' order by day_row_id, sent_date desc, id desc
+        """,
+        ([1, 2],),
+        {"sent_log_day_row_latest"},
+    ),
+    (
+        "sent_log retry kuyruğu",
+        "select id from sent_log where status='retrying' and next_attempt_at <= now() order by next_attempt_at",
+        (),
+        {"sent_log_retry_due"},
+    ),
+]
+
+
+def applied_versions(conn=None) -> set[int]:
+    conn = conn or get_conn()
+    with conn.cursor() as cur:
+        cur.execute("select to_regclass('schema_migrations')")
+        if cur.fetchone()[0] is None:
+            return set()
+        cur.execute("select version from schema_migrations")
+        return {int(r[0]) for r in cur.fetchall()}
+
+def run_migrations(conn=None) -> list[int]:
+    # Bekleyen migration'ları sırayla, her biri kendi transaction'ında uygular. Dönen: uygulanan versiyonlar
+    conn = conn or get_conn()
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            create table if not exists schema_migrations (
+                version int primary key,
+                name text not null,
+                applied_at timestamptz not null default now()
+            )
+            """
+        )
+
+    applied = []
+    for version, name, sql in MIGRATIONS:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute("select pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                cur.execute("select 1 from schema_migrations where version=%s", (version,))
+                if cur.fetchone():
+                    continue
+                cur.execute(sql)
+                cur.execute("insert into schema_migrations(version, name) values (%s, %s)", (version, name))
+        log.info("Migration %s uygulandı: %s", version, name)
+        applied.append(version)
+    return applied
+
+def _plan_indexes(node: dict) -> set[str]:
+    found = {node["Index Name"]} if "Index Name" in node else set()
+    for child in node.get("Plans", []) or []:
+        found |= _plan_indexes(child)
+    return found
+
+def check_indexes(conn=None) -> list[str]:
+    # Her sık sorgu için EXPLAIN: beklenen index planlayıcı tarafından kullanılabiliyor mu?
+    # Küçük tablolarda seq scan zaten daha ucuz; enable_seqscan=off ile "kullanılabilir mi" sorulur.
+    # Dönen: sorun satırları (boşsa her şey yolunda)
+    conn = conn or get_conn()
+    problems = []
+    for label, sql, params, expected in HOT_QUERIES:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute("set local enable_seqscan = off")
+                try:
+                    cur.execute("explain (format json) " + sql, params)
+                except Exception as e:
+                    problems.append(f"{label}: EXPLAIN başarısız ({e.__class__.__name__})")
+                    continue
+                plan = cur.fetchone()[0][0]["Plan"]
+        used = _plan_indexes(plan)
+        if used:
+            # Partition index'leri ebeveyn (partitioned) index adına çevrilir
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    select coalesce(p.inhparent::regclass::text, c.relname)
+                    from pg_class c left join pg_inherits p on p.inhrelid = c.oid
+                    where c.relname = any(%s) and c.relkind in ('i', 'I')
+                    """,
+                    (sorted(used),),
+                )
+                used |= {r[0] for r in cur.fetchall()}
+        if not used & expected:
+            problems.append(f"{label}: beklenen index kullanılmıyor ({', '.join(sorted(expected))}; plan: {', '.join(sorted(used)) or 'seq scan'})")
+    return problems
+
+def ensure_schema() -> list[str]:
+    # Açılış kontrolü: migration'lar + sent_log partition'ları + index doğrulaması. Dönen: check_indexes sorunları
+    with connect() as conn:
+        run_migrations(conn)
+        ensure_partitions(conn=conn)
+        problems = check_indexes(conn)
+    for p in problems:
+        log.warning("Index kontrolü: %s", p)
+    return problems
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m slack_panel.migrations", description="Şema migration'ları")
+    p.add_argument("--check", action="store_true", help="Migration uygulamadan sadece index kontrolü yap")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not args.check:
+        applied = run_migrations()
+        log.info("Uygulanan migration: %s", ", ".join(map(str, applied)) or "yok (şema güncel)")
+    problems = check_indexes()
+    if problems:
+        raise SystemExit("Index kontrolü başarısız:\n" + "\n".join(problems))
+    log.info("Index kontrolü OK")
+
+
+if __name__ == "__main__":
+    main()
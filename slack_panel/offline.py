@@ -0,0 +1,451 @@
+# slack_panel/offline.py
+# DB (Supabase) yavaş / ulaşılamaz olduğunda panel çalışmaya devam etsin diye yerel SQLite (WAL) deposu:
+#   - snapshot: konfigürasyon okumalarının son başarılı sonucu (read_through); DB yokken buradan okunur
+#   - writes:   DB yokken yapılan ayar değişiklikleri ve sent_log durum güncellemeleri (write_behind), sırayla
+#   - reservations: DB yokken alınan gönderim kilitleri (negatif log id), bağlantı gelince sent_log'a işlenir;
+#     (sent_date, day_row_id, channel) DB'de başkası tarafından tutuluyorsa "conflicts"e yazılır
+# Bağlantı hatasından sonra OFFLINE_RETRY_SECONDS boyunca DB denenmez (her çağrı timeout beklemesin).
+# SyncWorker bekleyenleri DB geri gelince işler (app.py ve dispatcher).
+
+import functools
+import inspect
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+import psycopg
+
+from .cache import CONFIG_CACHE_TTL_SECONDS, bump_config, config_key, get_cache
+from .config import get_secret
+
+log = logging.getLogger("slack_panel.offline")
+
+DEFAULT_OFFLINE_DB = "offline/slack_panel.sqlite3"
+OFFLINE_RETRY_SECONDS = 15
+SYNC_INTERVAL_SECONDS = 15
+
+SCHEMA = """
+create table if not exists snapshot (
+    key text primary key,
+    value blob not null,
+    saved_at real not null
+);
+create table if not exists writes (
+    id integer primary key autoincrement,
+    fn text not null,
+    args blob not null,
+    created_at real not null
+);
+create table if not exists reservations (
+    id integer primary key autoincrement,
+    sent_date text not null,
+    day_row_id integer not null,
+    channel text not null,
+    user_key text,
+    template_text text,
+    message_text text,
+    category text,
+    image_url text,
+    selections blob,
+    attachment_choice text,
+    status text not null default 'reserved',
+    slack_ts text,
+    slack_file_id text,
+    send_key text,
+    error text,
+    next_attempt_at real,
+    created_at real not null,
+    unique (sent_date, day_row_id, channel)
+);
+create table if not exists conflicts (
+    id integer primary key autoincrement,
+    sent_date text not null,
+    day_row_id integer not null,
+    channel text not null,
+    local_status text not null,
+    remote_status text,
+    message_text text,
+    detected_at real not null
+);
+"""
+
+# write_behind ile kuyruğa alınan çağrının dönüşü (truthy: çağıran "başarılı" sayar)
+QUEUED = "queued"
+
+_offline_until = 0.0
+_last_error = ""
+_init_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_path = None
+_snapshot_hashes: dict[str, int] = {}
+
+
+class OfflineError(psycopg.OperationalError):
+    # DB'ye ulaşılamıyor ve istenen okuma için kayıtlı kopya yok
+    pass
+
+
+def _db():
+    global _path
+    with _init_lock:
+        if _path is None:
+            path = get_secret("OFFLINE_DB", DEFAULT_OFFLINE_DB)
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with closing(sqlite3.connect(path, timeout=10, isolation_level=None)) as con:
+                con.execute("pragma journal_mode=wal")
+                con.executescript(SCHEMA)
+                # create if not exists eski dosyaya yeni kolon eklemez
+                if "send_key" not in {r[1] for r in con.execute("pragma table_info(reservations)")}:
+                    con.execute("alter table reservations add column send_key text")
+            _path = path
+    con = sqlite3.connect(_path, timeout=10, isolation_level=None)
+    con.execute("pragma synchronous=normal")
+    return closing(con)
+
+# ---------------- bağlantı durumu ----------------
+def is_connection_error(e: BaseException) -> bool:
+    # Bağlantı kopması / kurulamaması / timeout (veri hataları değil)
+    return isinstance(e, (psycopg.OperationalError, psycopg.InterfaceError))
+
+def db_available() -> bool:
+    return time.time() >= _offline_until
+
+def is_offline() -> bool:
+    return not db_available()
+
+def last_error() -> str:
+    return _last_error
+
+def mark_offline(e: BaseException | None = None):
+    global _offline_until, _last_error
+    if db_available():
+        log.warning("DB'ye ulaşılamıyor, çevrimdışı moda geçildi: %s", e)
+    _offline_until = time.time() + OFFLINE_RETRY_SECONDS
+    _last_error = str(e or "")
+
+def mark_online():
+    global _offline_until, _last_error
+    _offline_until = 0.0
+    _last_error = ""
+
+# ---------------- snapshot (read-through) ----------------
+def save_snapshot(key: str, value):
+    blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    h = hash(blob)
+    if _snapshot_hashes.get(key) == h:
+        return  # değişmemiş, diske yazma
+    with _db() as con:
+        con.execute(
+            "insert into snapshot(key, value, saved_at) values (?, ?, ?) "
+            "on conflict (key) do update set value=excluded.value, saved_at=excluded.saved_at",
+            (key, blob, time.time()),
+        )
+    _snapshot_hashes[key] = h
+
+def load_snapshot(key: str):
+    # Dönen: (bulundu_mu, değer)
+    with _db() as con:
+        row = con.execute("select value from snapshot where key=?", (key,)).fetchone()
+    return (True, pickle.loads(row[0])) if row else (False, None)
+
+def read_through(key, shared: bool = True):
+    # key: sabit metin ya da argümanlardan anahtar üreten fonksiyon
+    # shared: sonuç paylaşımlı cache'te de tutulur (cache.config_key; ayar yazımında geçersiz olur).
+    #         Sık değişen okumalar (gönderim kilitleri) için False.
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs) if callable(key) else key
+            ck = config_key(k) if shared else None
+            if ck:
+                found, value = get_cache().get_obj(ck)
+                if found:
+                    return value
+            if db_available():
+                try:
+                    value = fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_connection_error(e):
+                        raise
+                    mark_offline(e)
+                else:
+                    save_snapshot(k, value)
+                    if ck:
+                        get_cache().set_obj(ck, value, CONFIG_CACHE_TTL_SECONDS)
+                    return value
+            found, value = load_snapshot(k)
+            if not found:
+                raise OfflineError(f"DB'ye ulaşılamıyor ve kayıtlı kopya yok ({k}): {_last_error}")
+            return value
+        return wrapper
+    return deco
+
+def offline_default(default):
+    # DB yokken anlamı olmayan okumalar (sayaçlar, retry/reconcile listeleri): boş değer döner
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if db_available():
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_connection_error(e):
+                        raise
+                    mark_offline(e)
+            return default() if callable(default) else default
+        return wrapper
+    return deco
+
+# ---------------- write-behind ----------------
+def pending_writes() -> int:
+    with _db() as con:
+        return int(con.execute("select count(*) from writes").fetchone()[0])
+
+def write_behind(fn):
+    # DB yoksa (ya da önünde bekleyen yazma varsa, sıra bozulmasın diye) çağrı kuyruğa alınır → QUEUED
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if db_available():
+            if pending_writes():
+                sync()
+            if db_available() and not pending_writes():
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_connection_error(e):
+                        raise
+                    mark_offline(e)
+        with _db() as con:
+            con.execute(
+                "insert into writes(fn, args, created_at) values (?, ?, ?)",
+                (fn.__name__, pickle.dumps((args, kwargs)), time.time()),
+            )
+        log.info("Çevrimdışı: %s kuyruğa alındı", fn.__name__)
+        return QUEUED
+    return wrapper
+
+# ---------------- yerel rezervasyonlar ----------------
+def reserve_local(
+    d: date, day_row_id: int, template_text: str, user_key: str, channel: str, message_text: str,
+    category: str = "", image_url: str = "", selections: dict | None = None, attachment_choice: str = "",
+    send_key: str = "",
+):
+    # db_try_reserve_send'in çevrimdışı karşılığı. Dönen: -yerel id (kilit alındı) veya None
+    with _db() as con:
+        cur = con.execute(
+            """
+            insert into reservations(sent_date, day_row_id, channel, user_key, template_text, message_text, category,
+                                     image_url, selections, attachment_choice, send_key, status, created_at)
+            values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'reserved', ?)
+            on conflict (sent_date, day_row_id, channel) do update
+            set user_key=excluded.user_key, template_text=excluded.template_text, message_text=excluded.message_text,
+                category=excluded.category, image_url=excluded.image_url, selections=excluded.selections,
+                attachment_choice=excluded.attachment_choice, send_key=excluded.send_key, slack_file_id=null,
+                status='reserved', error=null, created_at=excluded.created_at
+            where reservations.status='failed'
+            returning id
+            """,
+            (
+                d.isoformat(), int(day_row_id), channel or "", user_key, (template_text or "").strip(), message_text or "",
+                category or None, image_url or None, pickle.dumps(selections) if selections else None,
+                attachment_choice or None, send_key or None, time.time(),
+            ),
+        )
+        row = cur.fetchone()
+    return -int(row[0]) if row else None
+
+def set_local_file_id(local_id: int, slack_file_id: str):
+    with _db() as con:
+        con.execute("update reservations set slack_file_id=? where id=?", (slack_file_id or None, int(local_id)))
+
+def settle_local(local_id: int, status: str, slack_ts: str = "", slack_file_id: str = "", error: str = "", delay_seconds: float = 0.0):
+    with _db() as con:
+        con.execute(
+            "update reservations set status=?, slack_ts=?, slack_file_id=?, error=?, next_attempt_at=? where id=?",
+            (
+                status, slack_ts or None, slack_file_id or None, (error or "")[:500] or None,
+                time.time() + delay_seconds if status == "retrying" else None, int(local_id),
+            ),
+        )
+
+def local_sent_channels(d: date) -> dict[int, set[str]]:
+    # Henüz sent_log'a işlenmemiş yerel kilitler (db_get_sent_channels_for_date bunları ekler)
+    with _db() as con:
+        rows = con.execute(
+            "select day_row_id, channel from reservations where sent_date=? and status<>'failed'", (d.isoformat(),)
+        ).fetchall()
+    out = {}
+    for rid, ch in rows:
+        out.setdefault(int(rid), set()).add(ch or "")
+    return out
+
+def pending_counts() -> dict:
+    with _db() as con:
+        return {
+            "writes": int(con.execute("select count(*) from writes").fetchone()[0]),
+            "reservations": int(con.execute("select count(*) from reservations").fetchone()[0]),
+            "conflicts": int(con.execute("select count(*) from conflicts").fetchone()[0]),
+        }
+
+def get_conflicts(limit: int = 100) -> list[dict]:
+    with _db() as con:
+        rows = con.execute(
+            """
+            select sent_date, day_row_id, channel, local_status, remote_status, message_text, detected_at
+            from conflicts order by id desc limit ?
+            """,
+            (int(limit),),
+        ).fetchall()
+    return [
+        {
+            "Tarih": r[0], "DayRowID": r[1], "Kanal": r[2], "Yerel": r[3], "DB": r[4] or "",
+            "Mesaj": r[5] or "", "Tespit": datetime.fromtimestamp(r[6]).strftime("%Y-%m-%d %H:%M"),
+        }
+        for r in rows
+    ]
+
+def clear_conflicts():
+    with _db() as con:
+        con.execute("delete from conflicts")
+
+# ---------------- senkronizasyon ----------------
+def _replay_writes(db) -> int:
+    done = 0
+    while True:
+        with _db() as con:
+            row = con.execute("select id, fn, args from writes order by id limit 1").fetchone()
+        if not row:
+            return done
+        wid, fn_name, blob = row
+        args, kwargs = pickle.loads(blob)
+        fn = getattr(db, fn_name, None)
+        try:
+            if fn is None:
+                raise AttributeError(fn_name)
+            inspect.unwrap(fn)(*args, **kwargs)
+        except Exception as e:
+            if is_connection_error(e):
+                raise
+            # Tekrar oynatılamayan yazma (ör. aynı ada yeniden adlandırma) kuyruğu tıkamasın
+            log.error("Kuyruktaki %s uygulanamadı, atlandı: %s", fn_name, e)
+        with _db() as con:
+            con.execute("delete from writes where id=?", (wid,))
+        done += 1
+
+def _sync_reservations(db) -> tuple[int, int]:
+    # Sonuçlanmış (ya da lease'i dolmuş) yerel kilitleri sent_log'a yazar. Dönen: (işlenen, çakışma)
+    stale_before = time.time() - db.RESERVE_LEASE_SECONDS
+    with _db() as con:
+        rows = con.execute(
+            """
+            select id, sent_date, day_row_id, channel, user_key, template_text, message_text, category, image_url,
+                   selections, attachment_choice, status, slack_ts, slack_file_id, send_key, error, next_attempt_at,
+                   created_at
+            from reservations
+            where status<>'reserved' or created_at < ?
+            order by id
+            """,
+            (stale_before,),
+        ).fetchall()
+
+    done = conflicts = 0
+    for (lid, sdate, rid, ch, ukey, tmpl, msg, cat, img, sel, att, status, ts, fid, skey, err, next_at, created) in rows:
+        created_at = datetime.fromtimestamp(created).astimezone()
+        with db.get_conn().cursor() as cur:
+            cur.execute(
+                """
+                insert into sent_log(sent_date, user_key, day_row_id, channel, template_text, message_text, category,
+                                     image_url, selections, attachment_choice, status, slack_ts, slack_file_id, send_key,
+                                     error, reserved_at, lease_expires_at, next_attempt_at, attempts)
+                values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 1)
+                on conflict (sent_date, day_row_id, channel) do update
+                set user_key=excluded.user_key, template_text=excluded.template_text,
+                    message_text=excluded.message_text, category=excluded.category, image_url=excluded.image_url,
+                    selections=excluded.selections, attachment_choice=excluded.attachment_choice,
+                    status=excluded.status, slack_ts=excluded.slack_ts, slack_file_id=excluded.slack_file_id,
+                    send_key=excluded.send_key, error=excluded.error, reserved_at=excluded.reserved_at,
+                    lease_expires_at=excluded.lease_expires_at, next_attempt_at=excluded.next_attempt_at,
+                    attempts=sent_log.attempts + 1
+                where sent_log.status='failed'
+                returning id
+                """,
+                (
+                    date.fromisoformat(sdate), ukey, rid, ch, tmpl, msg, cat, img,
+                    db.Jsonb(pickle.loads(sel)) if sel else None, att, status, ts, fid, skey, err, created_at,
+                    # reserved: lease dolmuş olarak yazılır, reconcile Slack geçmişine bakıp karar verir
+                    created_at + timedelta(seconds=db.RESERVE_LEASE_SECONDS) if status == "reserved" else None,
+                    datetime.fromtimestamp(next_at).astimezone() if next_at else None,
+                ),
+            )
+            inserted = cur.fetchone() is not None
+            remote = None
+            if not inserted:
+                cur.execute(
+                    "select status from sent_log where sent_date=%s and day_row_id=%s and channel=%s",
+                    (date.fromisoformat(sdate), rid, ch),
+                )
+                r = cur.fetchone()
+                remote = r[0] if r else None
+        with _db() as con:
+            if not inserted and status != "failed":
+                # Aynı satır/kanal çevrimdışıyken başka bir yerden de gönderilmiş (ya da kilitli)
+                con.execute(
+                    """
+                    insert into conflicts(sent_date, day_row_id, channel, local_status, remote_status, message_text, detected_at)
+                    values (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (sdate, rid, ch, status, remote, msg, time.time()),
+                )
+                conflicts += 1
+                log.warning("Çakışma: %s satır %s kanal %s (yerel %s, DB %s)", sdate, rid, ch, status, remote)
+            con.execute("delete from reservations where id=?", (lid,))
+        done += 1
+    return done, conflicts
+
+def sync() -> dict:
+    # Önce yazmalar (sırayla), sonra yerel kilitler. Bağlantı yine koparsa kalan sonraki tura kalır.
+    from . import db
+
+    out = {"writes": 0, "reservations": 0, "conflicts": 0}
+    if not _sync_lock.acquire(blocking=False):
+        return out  # başka thread zaten senkronize ediyor
+    try:
+        out["writes"] = _replay_writes(db)
+        if out["writes"]:
+            bump_config()
+        out["reservations"], out["conflicts"] = _sync_reservations(db)
+        mark_online()
+    except Exception as e:
+        if not is_connection_error(e):
+            raise
+        mark_offline(e)
+    finally:
+        _sync_lock.release()
+    if any(out.values()):
+        log.info("Çevrimdışı kuyruk işlendi: %s", out)
+    return out
+
+class SyncWorker(threading.Thread):
+    # Süreç başına bir tane: bekleyen yazma/rezervasyon varsa ve DB deneme penceresi açıksa sync()
+    def __init__(self, interval: float = SYNC_INTERVAL_SECONDS):
+        super().__init__(name="slack-offline-sync", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                counts = pending_counts()
+                if (counts["writes"] or counts["reservations"]) and db_available():
+                    sync()
+            except Exception:
+                log.exception("Çevrimdışı kuyruk senkronizasyonu başarısız")
@@ -0,0 +1,102 @@
+# slack_panel/operators.py
+# Operatör kaydı (operators tablosu, migration 13): rol, parola / Slack token secret referansı,
+# varsayılan kanallar ve izinli kategoriler. Parola ve token DB'de değil secrets'ta durur
+# (secret adları config.OPERATOR_SECRET_PREFIXES öneklerinden olmalı).
+#   - get_registry(): süreç içinde bir kere yüklenir; ayar yazımı (cache.bump_config) olunca tazelenir
+#   - client(): token başına tek WebClient (her rerun'da yeni client kurulmaz)
+#   - can_see(): satırlar operatörün kategorilerine göre önceden süzülür
+
+import hmac
+import threading
+
+from slack_sdk import WebClient
+
+from .cache import CONFIG_GEN_KEY, get_cache
+from .config import get_operator_secret
+from .db import db_get_operators
+from .helpers import parse_channels
+from .slack import make_client
+
+ROLE_ADMIN = "admin"
+ROLE_OPERATOR = "operator"
+ROLES = (ROLE_ADMIN, ROLE_OPERATOR)
+
+_clients: dict[str, WebClient] = {}  # token -> client (registry yenilense de havuz korunur)
+_clients_lock = threading.Lock()
+_registry = None
+_registry_gen = None
+_registry_lock = threading.Lock()
+
+
+def pooled_client(token: str) -> WebClient:
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = make_client(token)
+            _clients[token] = client
+        return client
+
+class OperatorRegistry:
+    def __init__(self, operators: list[dict]):
+        self.all = list(operators)
+        self.operators = {o["user_key"]: o for o in operators if o.get("active")}
+
+    def __len__(self):
+        return len(self.operators)
+
+    def get(self, user_key: str) -> dict | None:
+        return self.operators.get(user_key)
+
+    def authenticate(self, password: str) -> str | None:
+        # Kayıt sırasıyla ilk eşleşen operatör. Dönen: user_key veya None
+        if not password:
+            return None
+        for key, op in self.operators.items():
+            expected = get_operator_secret("password", op["password_secret"])
+            if expected and hmac.compare_digest(expected.encode("utf-8"), password.encode("utf-8")):
+                return key
+        return None
+
+    def is_admin(self, user_key: str) -> bool:
+        op = self.get(user_key)
+        return bool(op) and op["role"] == ROLE_ADMIN
+
+    def token(self, user_key: str) -> str:
+        op = self.get(user_key)
+        return get_operator_secret("token", op["token_secret"]) if op else ""
+
+    def default_channels(self, user_key: str) -> list[str]:
+        # Tablodaki kanallar, yoksa channel_secret'taki kanal(lar)
+        op = self.get(user_key)
+        if not op:
+            return []
+        return parse_channels(op["default_channels"]) or parse_channels(get_operator_secret("channel", op["channel_secret"]))
+
+    def client(self, user_key: str) -> WebClient | None:
+        token = self.token(user_key)
+        return pooled_client(token) if token else None
+
+    def clients(self) -> dict[str, WebClient]:
+        # Token'ı tanımlı tüm aktif operatörler (retry worker herkesin kuyruğunu işler)
+        out = {}
+        for key in self.operators:
+            client = self.client(key)
+            if client is not None:
+                out[key] = client
+        return out
+
+    def can_see(self, user_key: str, category_id) -> bool:
+        op = self.get(user_key)
+        if not op:
+            return False
+        return not op["category_ids"] or int(category_id) in op["category_ids"]
+
+def get_registry() -> OperatorRegistry:
+    # Konfigürasyon nesli değişmedikçe aynı registry döner (rerun başına bir cache okuması)
+    global _registry, _registry_gen
+    gen = get_cache().get(CONFIG_GEN_KEY)
+    with _registry_lock:
+        if _registry is None or gen != _registry_gen:
+            _registry = OperatorRegistry(db_get_operators())
+            _registry_gen = gen
+        return _registry
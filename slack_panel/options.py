@@ -0,0 +1,118 @@
+# slack_panel/options.py
+# Büyük değişken seçenek listeleri (ürün kodu, kampanya adı…): SelectboxColumn'a tüm liste verilmez,
+# type-ahead seçici sadece ilk TOP_K eşleşmeyi çeker.
+#   - OptionIndex: bellek içi prefix (sıralı liste + bisect) ve trigram index'i
+#   - search_options: index süreç içinde bir kere kurulur (options_version değişince yenilenir);
+#     MAX_INDEXED_OPTIONS'ı aşan listeler DB'de aranır (pg_trgm, yoksa ilike)
+
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from .db import db_get_variable_options, db_search_variable_options
+
+# Bu sayıdan fazla seçeneği olan değişken tabloda seçim kutusu yerine type-ahead ile doldurulur
+LARGE_OPTION_THRESHOLD = 200
+TOP_K = 20
+MAX_INDEXED_OPTIONS = 200_000
+
+_indexes: dict[str, tuple[str, "OptionIndex"]] = {}  # değişken -> (options_version, index)
+_indexes_lock = threading.Lock()
+
+
+def _trigrams(s: str) -> set[str]:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class OptionIndex:
+    def __init__(self, options: list[str]):
+        self.options = list(options)
+        folded = [o.casefold() for o in self.options]
+        self._order = sorted(range(len(folded)), key=lambda i: (folded[i], i))
+        self._keys = [folded[i] for i in self._order]
+        self._folded = folded
+        self._grams: dict[str, list[int]] = {}
+        for i, f in enumerate(folded):
+            for g in _trigrams(f):
+                self._grams.setdefault(g, []).append(i)
+
+    def __len__(self):
+        return len(self.options)
+
+    def search(self, query: str, k: int = TOP_K) -> list[str]:
+        # Sıra: prefix eşleşmeleri (alfabetik), sonra içerenler, sonra trigram benzerliği (yazım hatası toleransı)
+        q = (query or "").strip().casefold()
+        if not q:
+            return self.options[:k]
+
+        out: list[int] = []
+        seen: set[int] = set()
+
+        def take(ids):
+            for i in ids:
+                if i not in seen:
+                    seen.add(i)
+                    out.append(i)
+                    if len(out) >= k:
+                        return True
+            return False
+
+        pos = bisect_left(self._keys, q)
+        prefix = []
+        while pos < len(self._keys) and self._keys[pos].startswith(q) and len(prefix) < k:
+            prefix.append(self._order[pos])
+            pos += 1
+        if take(prefix):
+            return [self.options[i] for i in out]
+
+        if len(q) < 3:
+            candidates = range(len(self._folded))
+        else:
+            # q'yu içeren her seçenek q'nun tüm iç trigram'larını taşır
+            inner = [set(self._grams.get(q[i:i + 3], ())) for i in range(len(q) - 2)]
+            candidates = set.intersection(*inner)
+        contains = sorted((i for i in candidates if q in self._folded[i]), key=lambda i: (len(self._folded[i]), i))
+        if take(contains):
+            return [self.options[i] for i in out]
+
+        grams = _trigrams(q)
+        hits = Counter()
+        for g in grams:
+            hits.update(self._grams.get(g, ()))
+
+        # Benzerlik: ortak trigram / birleşim (pg_trgm similarity ile aynı ölçü), eşik 0.3
+        scored = []
+        for i, n in hits.items():
+            if i in seen:
+                continue
+            sim = n / (len(grams) + len(_trigrams(self._folded[i])) - n)
+            if sim >= 0.3:
+                scored.append((-sim, i))
+        take(i for _, i in sorted(scored))
+        return [self.options[i] for i in out]
+
+def get_option_index(name: str, version: str) -> OptionIndex | None:
+    # version: db_get_variables()[name]["options_version"]; değişince index yeniden kurulur
+    with _indexes_lock:
+        hit = _indexes.get(name)
+    if hit and hit[0] == version:
+        return hit[1]
+    try:
+        count = int(str(version).split(":")[0])
+    except ValueError:
+        count = 0
+    if count > MAX_INDEXED_OPTIONS:
+        return None
+    index = OptionIndex(db_get_variable_options(name))
+    with _indexes_lock:
+        _indexes[name] = (version, index)
+    return index
+
+def search_options(name: str, version: str, query: str, k: int = TOP_K) -> list[str]:
+    index = get_option_index(name, version)
+    if index is not None:
+        return index.search(query, k)
+    return db_search_variable_options(name, query, k)
+
+def is_large(vdef) -> bool:
+    return isinstance(vdef, dict) and int(vdef.get("option_count", 0) or 0) > LARGE_OPTION_THRESHOLD
@@ -0,0 +1,100 @@
+# slack_panel/preset_health.py
+# Preset sağlık kontrolü: aktif (süresi geçmemiş) tüm ek preset'lerinin Lightshot linkleri arka planda
+# paralel ve cache'siz doğrulanır; sonuç attachments satırına yazılır (durum, son kontrol, og:image
+# adresi, boyut). Gönder sayfası bozuk preset'leri baştan gösterir ve onlar için görsel indirmez.
+#   - ok:     sayfa + görsel alındı (görsel cache'i de tazelenir)
+#   - broken: kalıcı hata (404, og:image yok, görsel değil, prnt.sc linki değil)
+#   - geçici hata (timeout / 429 / 5xx): önceki durum korunur, sadece hata metni ve zaman yazılır
+# Süreç açılışında bir kere, sonra her PRESET_CHECK_MINUTES dakikada bir (app.py ve dispatcher).
+
+import logging
+import threading
+from datetime import datetime
+
+from . import offline
+from .aio import check_images
+from .db import db_get_attachments, db_set_attachment_health
+from .helpers import looks_like_lightshot
+
+log = logging.getLogger("slack_panel.preset_health")
+
+PRESET_OK = "ok"
+PRESET_BROKEN = "broken"
+DEFAULT_PRESET_CHECK_MINUTES = 30
+
+_last_summary: dict = {}
+
+
+def is_broken(preset) -> bool:
+    return isinstance(preset, dict) and preset.get("status") == PRESET_BROKEN
+
+def broken_label(preset: dict) -> str:
+    # "❌ Preset bozuk (hata, 14:05)" — Durum kolonu ve link kontrolü için
+    parts = [str(preset.get("check_error") or "").strip()]
+    checked = preset.get("checked_at")
+    if checked:
+        parts.append(checked.astimezone().strftime("%d.%m %H:%M"))
+    detail = ", ".join(p for p in parts if p)
+    return f"❌ Preset bozuk ({detail})" if detail else "❌ Preset bozuk"
+
+def check_presets(names: list[str] | None = None) -> dict:
+    # names: sadece bu preset'ler (Ayarlar'daki "şimdi kontrol et"); None = tüm aktif preset'ler
+    attachments = db_get_attachments(include_expired=False)
+    presets = {
+        n: str(a.get("url", "") or "").strip()
+        for n, a in attachments.items()
+        if isinstance(a, dict) and (names is None or n in names)
+    }
+    checked = check_images(u for u in presets.values() if looks_like_lightshot(u))
+
+    results = []
+    for name, url in presets.items():
+        if not looks_like_lightshot(url):
+            results.append({"name": name, "url": url, "status": PRESET_BROKEN, "error": "prnt.sc linki değil"})
+            continue
+        r = checked[url]
+        status = PRESET_OK if r["ok"] else (None if r["transient"] else PRESET_BROKEN)
+        results.append({
+            "name": name, "url": url, "status": status, "error": r["error"],
+            "image_url": r["image_url"], "bytes": r["bytes"],
+        })
+    changed = db_set_attachment_health(results)
+
+    broken = sorted(r["name"] for r in results if r["status"] == PRESET_BROKEN)
+    summary = {
+        "at": datetime.now(),
+        "presets": len(results),
+        "ok": sum(1 for r in results if r["status"] == PRESET_OK),
+        "broken": broken,
+        "transient": sorted(r["name"] for r in results if r["status"] is None),
+        "changed": changed,
+    }
+    _last_summary.clear()
+    _last_summary.update(summary)
+    if broken:
+        log.warning("Preset kontrolü: %s bozuk preset: %s", len(broken), ", ".join(broken))
+    log.info("Preset kontrolü: %s preset, %s sağlam, %s durum değişti", len(results), summary["ok"], changed)
+    return summary
+
+def last_check() -> dict:
+    return dict(_last_summary)
+
+class PresetHealthWorker(threading.Thread):
+    # Süreç başına bir tane: açılışta hemen, sonra her "minutes" dakikada check_presets (DB yokken atlanır)
+    def __init__(self, minutes: float = DEFAULT_PRESET_CHECK_MINUTES):
+        super().__init__(name="slack-preset-health", daemon=True)
+        self.interval = max(1.0, float(minutes)) * 60
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while True:
+            try:
+                if not offline.is_offline():
+                    check_presets()
+            except Exception:
+                log.exception("Preset kontrolü başarısız")
+            if self._stop_event.wait(self.interval):
+                return
@@ -0,0 +1,65 @@
+# slack_panel/render.py
+# Mesaj render hattı: şablon/mesaj → değişken yerleştirme → anchor temizleme → Slack mrkdwn kaçışı.
+# Saf ve deterministik: aynı (satır, mesaj, seçimler) her zaman aynı metni verir. Sonuç hash anahtarıyla
+# süreç içinde tutulur; Gönder sayfasındaki "Önizleme" kolonu ve build_send_item aynı kaydı okur, yani
+# önizlenen metin Slack'e giden metnin ta kendisidir ve gönderim anında tekrar render edilmez.
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from .helpers import VAR_PATTERN, strip_anchors
+
+RENDER_CACHE_SIZE = 4096
+
+# Slack'in kendi kontrol dizileri kaçırılmaz: <@U123>, <#C123>, <!here>, <https://x|metin>, <mailto:..>
+SLACK_TOKEN = re.compile(r"<(?:[@#!]|https?://|mailto:)[^<>]*>")
+# Zaten kaçırılmış varlıklar ikinci kez kaçırılmaz (mesaj Slack'ten kopyalanmış olabilir)
+BARE_AMP = re.compile(r"&(?!(?:amp|lt|gt);)")
+
+_cache: OrderedDict[str, str] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def substitute(message: str, selections: dict) -> str:
+    # Tek geçiş: seçilen değerin içindeki {{...}} tekrar yerleştirilmez; seçilmeyen değişken olduğu gibi kalır
+    return VAR_PATTERN.sub(lambda m: str(selections.get(m.group(1).strip(), m.group(0))), message)
+
+def _escape(text: str) -> str:
+    return BARE_AMP.sub("&amp;", text).replace("<", "&lt;").replace(">", "&gt;")
+
+def escape_mrkdwn(text: str) -> str:
+    # Slack: metindeki &, <, > kaçırılmalı; kontrol dizileri korunur
+    out, pos = [], 0
+    for m in SLACK_TOKEN.finditer(text):
+        out.append(_escape(text[pos:m.start()]))
+        out.append(m.group(0))
+        pos = m.end()
+    out.append(_escape(text[pos:]))
+    return "".join(out)
+
+def render_message(message: str, selections: dict) -> str:
+    text = substitute((message or "").strip(), selections)
+    text = strip_anchors(text).strip()
+    return escape_mrkdwn(text)
+
+def render_key(day_row_id: int, message: str, selections: dict) -> str:
+    raw = json.dumps([int(day_row_id), message or "", sorted((str(k), str(v)) for k, v in selections.items())], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def render_cached(day_row_id: int, message: str, selections: dict) -> tuple[str, str]:
+    # Dönen: (anahtar, metin). Önizleme ve gönderim aynı anahtarla aynı kaydı kullanır
+    key = render_key(day_row_id, message, selections)
+    with _cache_lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+            return key, text
+    text = render_message(message, selections)
+    with _cache_lock:
+        _cache[key] = text
+        while len(_cache) > RENDER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return key, text
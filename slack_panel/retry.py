@@ -0,0 +1,133 @@
+# slack_panel/retry.py
+# Kalıcı retry kuyruğu: sent_log'daki 'retrying' kayıtlar (kilit korunur, satır listede gizli kalır).
+# Arka plan thread'i zamanı gelen kayıtları alır, gerekirse Lightshot görselini yeniden çeker ve gönderir.
+# Geçici hata → tekrar 'retrying' (jitter'lı üstel bekleme), kalıcı hata / deneme sınırı → 'failed'.
+# Aynı thread, lease'i dolmuş rezervasyonları da kendi aralığında reconcile eder (sayfa rerun'larında değil).
+
+import asyncio
+import logging
+import threading
+import time
+
+from slack_sdk import WebClient
+
+from . import aio
+from .db import db_claim_due_retries, db_count_retrying, db_fail_retrying, db_mark_failed
+from .sender import FAILED, RETRYING, SENT, deliver_async, hold_leases, reconcile_stale_reservations, settle
+from .slack import error_code
+
+log = logging.getLogger("slack_panel.retry")
+
+RETRY_POLL_SECONDS = 5
+# Reconcile Slack geçmişini okur; lease (RESERVE_LEASE_SECONDS) dolmadan kayıt zaten gelmez
+RECONCILE_SECONDS = 60
+# Tek seferlik çalıştırmada (dispatch --once) retry kuyruğunun boşaltılması için en fazla beklenen süre
+DRAIN_TIMEOUT_SECONDS = 300
+
+
+async def _retry_one(client: WebClient, r: dict) -> str:
+    async with hold_leases([r["id"]]):
+        return await _retry_one_leased(client, r)
+
+async def _retry_one_leased(client: WebClient, r: dict) -> str:
+    image, err = None, None
+    metrics = {}
+    if r["image_url"]:
+        t0 = time.monotonic()
+        image, err, transient = await aio.cached_image_async(r["image_url"])
+        metrics["fetch_ms"] = int((time.monotonic() - t0) * 1000)
+        if image is None and not transient:
+            await asyncio.to_thread(db_mark_failed, r["id"], err, {**metrics, "error_code": error_code(err)})
+            log.warning("Retry görsel alınamadı (%s / %s): %s", r["day_row_id"], r["channel"], err)
+            return FAILED
+    if not err:
+        resp, err = await deliver_async(
+            client, r["channel"], r["message"], r["category"], image, metrics, r["id"], r["send_key"],
+        )
+    else:
+        resp = None
+    outcome = await asyncio.to_thread(settle, r["id"], resp, err, r["attempts"], metrics)
+    if outcome == FAILED:
+        log.warning("Retry kalıcı hata (%s / %s): %s", r["day_row_id"], r["channel"], err)
+    return outcome
+
+async def _retry_batch(clients: dict[str, WebClient], due: list[dict]) -> list[str]:
+    # Farklı kanallar eşzamanlı; aynı kanaldaki kayıtlar sırayla (mesaj sırası korunur)
+    per_channel: dict[str, list[dict]] = {}
+    for r in due:
+        per_channel.setdefault(r["channel"], []).append(r)
+
+    async def channel_worker(rs: list[dict]):
+        return [await _retry_one(clients.get(r["user_key"]), r) for r in rs]
+
+    outcomes = await asyncio.gather(*(channel_worker(rs) for rs in per_channel.values()))
+    return [o for chunk in outcomes for o in chunk]
+
+def process_due_retries(clients: dict[str, WebClient], limit: int = 20) -> dict:
+    # clients: user_key -> WebClient (kayıt, gönderen kullanıcının token'ı ile tekrar denenir)
+    counts = {SENT: 0, RETRYING: 0, FAILED: 0}
+    due = db_claim_due_retries(list(clients.keys()), limit=limit)
+    if not due:
+        return counts
+    for outcome in aio.run(_retry_batch(clients, due)):
+        counts[outcome] += 1
+    return counts
+
+def drain_retries(user_key: str, client: WebClient, timeout: float = DRAIN_TIMEOUT_SECONDS) -> dict:
+    # Kuyruk boşalana ya da süre dolana kadar zamanı gelen kayıtları dener; kalanlar 'failed' yapılır.
+    # Arka planda retry worker'ı olmayan süreçler için: kayıtlar sonsuza kadar 'retrying' kalıp kilidi tutmasın
+    totals = {SENT: 0, RETRYING: 0, FAILED: 0}
+    deadline = time.monotonic() + timeout
+    while db_count_retrying(user_key) and time.monotonic() < deadline:
+        counts = process_due_retries({user_key: client})
+        for k in (SENT, FAILED):
+            totals[k] += counts[k]
+        if not any(counts.values()):
+            time.sleep(min(RETRY_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+    if db_count_retrying(user_key):
+        n = db_fail_retrying(user_key, "retry süresi doldu (tek seferlik çalıştırma)")
+        totals[FAILED] += n
+        log.warning("%s kayıt tekrar denenemeden 'failed' yapıldı (kilit bırakıldı)", n)
+    return totals
+
+class RetryWorker(threading.Thread):
+    # Süreç başına bir tane (app.py'de st.cache_resource, dispatcher'da kendi döngüsü)
+    def __init__(self, poll_seconds: float = RETRY_POLL_SECONDS, reconcile_seconds: float = RECONCILE_SECONDS):
+        super().__init__(name="slack-retry-worker", daemon=True)
+        self.poll_seconds = poll_seconds
+        self.reconcile_seconds = reconcile_seconds
+        self._next_reconcile = 0.0
+        self._clients: dict[str, WebClient] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def register_client(self, user_key: str, client: WebClient):
+        with self._lock:
+            self._clients[user_key] = client
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_seconds):
+            with self._lock:
+                clients = dict(self._clients)
+            if not clients:
+                continue
+            try:
+                process_due_retries(clients)
+            except Exception:
+                log.exception("Retry turu başarısız")
+            if time.monotonic() >= self._next_reconcile:
+                self._next_reconcile = time.monotonic() + self.reconcile_seconds
+                self.reconcile(clients)
+
+    def reconcile(self, clients: dict[str, WebClient]):
+        for user_key, client in clients.items():
+            try:
+                rec = reconcile_stale_reservations(client, user_key)
+            except Exception:
+                log.exception("Reconcile başarısız (%s)", user_key)
+                continue
+            if rec[SENT] or rec[FAILED]:
+                log.info("Reconcile (%s): %s gönderilmiş, %s serbest bırakıldı", user_key, rec[SENT], rec[FAILED])
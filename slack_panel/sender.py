@@ -0,0 +1,398 @@
+# slack_panel/sender.py
+# Gönderim motoru: satır doğrulama + mesaj hazırlama + atomik kilit ile Slack'e gönderim.
+# app.py (buton) ve dispatch.py (zamanlanmış) aynı yolu kullanır. Slack/Lightshot I/O aio loop'unda çalışır.
+
+import asyncio
+import contextlib
+import random
+import time
+import uuid
+from datetime import date
+from io import BytesIO
+
+from slack_sdk import WebClient
+
+from . import aio
+from .db import (
+    RESERVE_LEASE_SECONDS, category_id, db_extend_leases, db_get_stale_reservations, db_mark_failed, db_mark_retrying, db_mark_sent,
+    db_set_slack_file_id, db_try_reserve_send,
+)
+from .helpers import (
+    DEFAULT_CATEGORY, DEFAULT_CATEGORY_ID, MANUAL_OPTION,
+    extract_vars, fetch_lightshot_image_ex, is_unselected, looks_like_lightshot,
+    parse_channels, safe_filename_from_category,
+)
+from .preset_health import is_broken
+from .render import render_cached
+from .slack import (
+    async_safe_chat_post, async_safe_upload_image_with_comment, error_code, find_posted_message, is_transient_error,
+    response_ids, send_metadata,
+)
+
+SENT = "sent"
+LOCKED = "locked"
+FAILED = "failed"
+RETRYING = "retrying"
+
+# Geçici hatalarda tekrar deneme: jitter'lı üstel bekleme, MAX_SEND_ATTEMPTS sonrası 'failed'
+MAX_SEND_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 15
+RETRY_MAX_SECONDS = 30 * 60
+
+# Eşzamanlı kanal kuyruğu sayısı (Slack rate limit'i kanal/metot bazlı)
+MAX_CHANNEL_WORKERS = 8
+
+# Block Kit limitleri: mesaj başına 50 blok, section metni 3000 karakter.
+# Mesaj = header + n section + (n-1) divider → n en fazla 24 (48 blok)
+BATCH_MAX_BLOCKS = 50
+BATCH_MAX_SECTIONS = 24
+SECTION_MAX_CHARS = 3000
+
+
+def build_send_item(
+    day_row_id: int,
+    template: str,
+    message: str,
+    row_cat: str,
+    req: bool,
+    selections: dict,
+    ek_sec: str,
+    link: str,
+    variables: dict,
+    attachments: dict,
+    link_cache: dict | None = None,
+    prefetched: dict | None = None,
+):
+    # Dönen: (item, None) veya (None, hata satırı)
+    # prefetched: aio.prefetch_images sonucu (url -> (bio, hata, geçici)); yoksa görsel burada indirilir
+    raw_message = message or ""
+    # Kategori eşleşmesi validation.py gibi id ile (ad değişse de eşleşme bozulmaz)
+    row_cat_id = category_id(row_cat)
+
+    # değişken validate (yerleştirme render hattında)
+    used = {}
+    for v in extract_vars(template):
+        vdef = variables.get(v) if isinstance(variables.get(v), dict) else {}
+        if vdef.get("category_id", DEFAULT_CATEGORY_ID) != row_cat_id:
+            vcat = str(vdef.get("category") or DEFAULT_CATEGORY).strip()
+            return None, f"- Değişken kategori uyumsuz ({v}/{vcat}) satır:{row_cat} → {template}"
+
+        sel = str(selections.get(v, "")).strip()
+        if is_unselected(sel):
+            return None, f"- {v} seçilmedi: {template}"
+
+        used[v] = sel
+
+    # Önizleme kolonunun ürettiği kayıt (aynı satır + mesaj + seçimler) tekrar render edilmeden kullanılır
+    render_key, message = render_cached(day_row_id, raw_message, used)
+
+    fetched_img = None
+    image_error = None
+    fetch_ms = None
+    if req:
+        ek_sec = str(ek_sec or "").strip()
+        link = str(link or "").strip()
+
+        if is_unselected(ek_sec):
+            return None, f"- Ek seçilmedi: {template}"
+
+        if ek_sec != MANUAL_OPTION:
+            preset = attachments.get(ek_sec)
+            if not isinstance(preset, dict):
+                return None, f"- Preset bulunamadı: {template}"
+            if preset.get("category_id", DEFAULT_CATEGORY_ID) != row_cat_id:
+                preset_cat = str(preset.get("category") or DEFAULT_CATEGORY).strip()
+                return None, f"- Preset kategori uyumsuz ({ek_sec}/{preset_cat}) satır:{row_cat} → {template}"
+            if is_broken(preset):
+                return None, f"- Preset bozuk ({ek_sec}): {template}"
+            link = str(preset.get("url", "") or "").strip()
+
+        if not link:
+            return None, f"- Ek zorunlu ama link yok: {template}"
+        if not looks_like_lightshot(link):
+            return None, f"- Link prnt.sc değil: {template}"
+
+        if prefetched is not None and link in prefetched:
+            fetched_img, image_error, transient = prefetched[link]
+            fetch_ms = aio.fetch_ms(link)
+        else:
+            t0 = time.monotonic()
+            fetched_img, image_error, transient = fetch_lightshot_image_ex(link)
+            fetch_ms = int((time.monotonic() - t0) * 1000)
+        if link_cache is not None and (fetched_img is not None or not transient):
+            link_cache[link] = (fetched_img is not None)
+        if fetched_img is None and not transient:
+            return None, f"- Görsel alınamadı: {template}"
+        # Geçici hata (timeout/5xx): satır gönderime alınır, görsel retry kuyruğunda tekrar çekilir
+
+    if not message:
+        return None, f"- Mesaj boş: {template}"
+
+    return {
+        "day_row_id": int(day_row_id),
+        "template": template,
+        "message": message,
+        "render_key": render_key,
+        "image": fetched_img,
+        "image_url": link if req else "",
+        "image_error": image_error if fetched_img is None else None,
+        "category": row_cat,
+        "fetch_ms": fetch_ms,
+        "selections": used,
+        "attachment_choice": ek_sec if req else "",
+    }, None
+
+def attachment_link(req: bool, ek_sec: str, link: str, attachments: dict) -> str:
+    # build_send_item'in indireceği link (doğrulamasız); gönderimden önce toplu prefetch için
+    if not req:
+        return ""
+    ek_sec = str(ek_sec or "").strip()
+    if ek_sec != MANUAL_OPTION:
+        preset = attachments.get(ek_sec)
+        # Bozuk bilinen preset indirilmez (build_send_item satırı hatayla düşürür)
+        link = preset.get("url", "") if isinstance(preset, dict) and not is_broken(preset) else ""
+    link = str(link or "").strip()
+    return link if looks_like_lightshot(link) else ""
+
+def resolve_channels(row: dict, row_cat: str, category_channels: dict, default_channel: str) -> list[str]:
+    # Öncelik: satırın kendi kanalları > kategori kanalları > kullanıcının varsayılan kanalı
+    return (
+        parse_channels(row.get("channels"))
+        or parse_channels(category_channels.get(row_cat))
+        or parse_channels(default_channel)
+    )
+
+def row_fully_sent(targets: list[str], sent_channels: set[str]) -> bool:
+    # '' = kanal kolonu öncesi eski kayıt → satır o gün gönderilmiş sayılır
+    return "" in sent_channels or set(targets) <= sent_channels
+
+def retry_delay(attempts: int) -> float:
+    # 15s, 30s, 60s, ... (üst sınır 30 dk), [%50, %100] aralığında jitter
+    base = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return base * random.uniform(0.5, 1.0)
+
+def settle(log_id: int, resp, err: str | None, attempts: int = 1, metrics: dict | None = None) -> str:
+    # Gönderim sonucunu sent_log'a yazar. Dönen: SENT | RETRYING | FAILED
+    # metrics: fetch_ms / send_ms / send_method / bytes_uploaded (deliver_async doldurur); hata kodu burada eklenir
+    metrics = {**(metrics or {}), "error_code": error_code(err or "")}
+    if not err:
+        # Bu update kaybolursa (süreç ölürse) kayıt 'reserved' kalır; reconcile Slack'te bulup 'sent' yapar
+        db_mark_sent(log_id, *response_ids(resp), metrics=metrics)
+        return SENT
+    if is_transient_error(err) and attempts < MAX_SEND_ATTEMPTS:
+        db_mark_retrying(log_id, err, retry_delay(attempts), metrics=metrics)
+        return RETRYING
+    db_mark_failed(log_id, err, metrics=metrics)
+    return FAILED
+
+# ---------------- async gönderim (aio loop'unda; DB çağrıları to_thread ile) ----------------
+LEASE_RENEW_SECONDS = RESERVE_LEASE_SECONDS / 3
+
+@contextlib.asynccontextmanager
+async def hold_leases(log_ids: list[int]):
+    # Blok sürdükçe (yavaş upload, 429 beklemeleri) rezervasyonların lease'i periyodik uzatılır
+    ids = [int(i) for i in log_ids if int(i) > 0]
+
+    async def renew():
+        while True:
+            await asyncio.sleep(LEASE_RENEW_SECONDS)
+            await asyncio.to_thread(db_extend_leases, ids)
+
+    task = asyncio.create_task(renew()) if ids else None
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
+
+async def deliver_async(
+    client: WebClient, channel_id: str, message: str, category: str, image: BytesIO | None, metrics: dict | None = None,
+    log_id: int = 0, send_key: str = "",
+):
+    # Tek mesajı (ekli/eksiz) Slack'e yollar. Dönen: (resp, hata metni)
+    # metrics verilirse send_method / send_ms (Slack çağrısı, bekleme hariç) / bytes_uploaded yazılır
+    # Reconcile için: mesaj send_key'i metadata'da taşır, upload'un file_id'si paylaşımdan önce log_id'ye yazılır
+    aclient = aio.get_async_client(client)
+    t0 = time.monotonic()
+    if image is not None:
+        filename = safe_filename_from_category(category)
+        bio = BytesIO(image.getvalue())  # her kanal kendi kopyasını okur
+
+        async def store_file_id(file_id: str):
+            await asyncio.to_thread(db_set_slack_file_id, log_id, file_id)
+
+        resp, err = await async_safe_upload_image_with_comment(
+            aclient, channel_id, bio, message=message, filename=filename, on_file_id=store_file_id if log_id else None,
+        )
+        pause = 0.35
+        method, nbytes = "files_upload_v2", len(bio.getbuffer())
+    else:
+        resp, err = await async_safe_chat_post(aclient, channel_id, message, metadata=send_metadata([send_key]))
+        pause = 0.20
+        method, nbytes = "chat.postMessage", 0
+    if metrics is not None:
+        metrics.update(send_method=method, send_ms=int((time.monotonic() - t0) * 1000), bytes_uploaded=nbytes)
+    if not err:
+        await asyncio.sleep(pause)  # kanal başına hız sınırı; loop bu sırada diğer kanalları işler
+    return resp, err
+
+async def _send_item_to_channel(client: WebClient, channel_id: str, d: date, item: dict, user_key: str):
+    # 🔒 Atomik kilit: (sent_date, day_row_id, channel) → reserved, sonra sent | retrying | failed
+    send_key = str(uuid.uuid4())
+    log_id = await asyncio.to_thread(
+        db_try_reserve_send,
+        d, item["day_row_id"], item["template"], user_key, channel_id, item["message"],
+        category=item["category"], image_url=item.get("image_url", ""),
+        selections=item.get("selections"), attachment_choice=item.get("attachment_choice", ""), send_key=send_key,
+    )
+    if not log_id:
+        return [(LOCKED, None)]
+
+    metrics = {"fetch_ms": item.get("fetch_ms")}
+    if item.get("image_error"):
+        # Görsel geçici olarak alınamadı → Slack'e gitmeden kuyruğa
+        resp, err = None, item["image_error"]
+    else:
+        async with hold_leases([log_id]):
+            resp, err = await deliver_async(
+                client, channel_id, item["message"], item["category"], item["image"], metrics, log_id, send_key,
+            )
+
+    outcome = await asyncio.to_thread(settle, log_id, resp, err, 1, metrics)
+    if outcome == FAILED:
+        return [(FAILED, f"- {item['template']} [{channel_id}]: {err}")]
+    return [(outcome, None)]
+
+async def _send_batch_to_channel(client: WebClient, channel_id: str, d: date, items: list[dict], user_key: str):
+    # Kilit yine satır bazlı: her satır ayrı rezerve edilir, kilitli olanlar mesajdan çıkarılır
+    results = {}
+    reserved = []
+    for it in items:
+        send_key = str(uuid.uuid4())
+        log_id = await asyncio.to_thread(
+            db_try_reserve_send, d, it["day_row_id"], it["template"], user_key, channel_id, it["message"],
+            category=it["category"], selections=it.get("selections"), attachment_choice=it.get("attachment_choice", ""),
+            send_key=send_key,
+        )
+        if log_id:
+            reserved.append((it, log_id, send_key))
+        else:
+            results[id(it)] = (LOCKED, None)
+
+    if reserved:
+        fallback = "\n".join(it["message"] for it, _, _ in reserved)
+        t0 = time.monotonic()
+        async with hold_leases([log_id for _, log_id, _ in reserved]):
+            resp, err = await async_safe_chat_post(
+                aio.get_async_client(client), channel_id, fallback,
+                blocks=build_batch_blocks(reserved[0][0]["category"], [it for it, _, _ in reserved]),
+                metadata=send_metadata([key for _, _, key in reserved]),
+            )
+        metrics = {"send_method": "chat.postMessage (toplu)", "send_ms": int((time.monotonic() - t0) * 1000), "bytes_uploaded": 0}
+        # Geçici hatada satırlar tek tek retry kuyruğuna düşer (tekrar denemede ayrı mesaj olarak gider)
+        for it, log_id, _ in reserved:
+            outcome = await asyncio.to_thread(settle, log_id, resp, err, 1, metrics)
+            results[id(it)] = (outcome, f"- {it['template']} [{channel_id}]: {err}" if outcome == FAILED else None)
+        if not err:
+            await asyncio.sleep(0.20)
+    return [results[id(it)] for it in items]
+
+async def send_units_async(
+    client: WebClient, d: date, units: list[list[dict]], user_key: str,
+    feed: aio.ProgressFeed | None = None, timings: list | None = None,
+):
+    # Kanal başına bir kuyruk: aynı kanalda sıra korunur, farklı kanallar eşzamanlı ilerler.
+    # feed verilirse tamamlanan birimler, (satır × kanal) sonuç sayaçları ve hatalar oraya yazılır (UI okur).
+    # timings verilirse her (birim, kanal) gönderiminin süresi (sn) eklenir (rezervasyon → settle).
+    results = [[] for _ in units]
+    remaining = []
+    per_channel: dict[str, list[int]] = {}
+    for ui, unit in enumerate(units):
+        chans = parse_channels(unit[0].get("channels"))
+        remaining.append(len(chans))
+        for ch in chans:
+            per_channel.setdefault(ch, []).append(ui)
+        if not chans and feed is not None:
+            feed.add(1)
+
+    sem = asyncio.Semaphore(MAX_CHANNEL_WORKERS)
+
+    async def channel_worker(ch: str, unit_ids: list[int]):
+        async with sem:
+            for ui in unit_ids:
+                unit = units[ui]
+                t0 = time.monotonic()
+                if len(unit) == 1:
+                    res = await _send_item_to_channel(client, ch, d, unit[0], user_key)
+                else:
+                    res = await _send_batch_to_channel(client, ch, d, unit, user_key)
+                if timings is not None:
+                    timings.append(time.monotonic() - t0)
+                results[ui].extend(res)
+                remaining[ui] -= 1
+                if feed is not None:
+                    for outcome, err in res:
+                        feed.add(0, outcome, err)
+                    if remaining[ui] == 0:
+                        feed.add(1)
+
+    await asyncio.gather(*(channel_worker(ch, ids) for ch, ids in per_channel.items()))
+    return results
+
+def send_units(client: WebClient, d: date, units: list[list[dict]], user_key: str):
+    # Senkron sarmalayıcı (dispatcher). Dönen: birim başına [(outcome, err), ...] (satır × kanal)
+    return aio.run(send_units_async(client, d, units, user_key))
+
+# ================== BATCH (kategori bazlı tek mesaj) ==================
+def plan_sends(items: list[dict], batch: bool) -> list[list[dict]]:
+    # Her eleman bir gönderim birimi. batch kapalıysa her item tek başına;
+    # açıksa eksiz item'lar (kategori, hedef kanallar) bazında gruplanır. Ekli item'lar kendi upload'unu yapar.
+    if not batch:
+        return [[it] for it in items]
+    units, groups = [], {}
+    for it in items:
+        if it["image"] is not None or it.get("image_url"):
+            units.append([it])
+            continue
+        key = (it["category"], tuple(it.get("channels") or []))
+        if key not in groups:
+            groups[key] = []
+            units.append(groups[key])
+        groups[key].append(it)
+    out = []
+    for u in units:
+        out.extend(u[i:i + BATCH_MAX_SECTIONS] for i in range(0, len(u), BATCH_MAX_SECTIONS))
+    return out
+
+def build_batch_blocks(category: str, items: list[dict]) -> list[dict]:
+    blocks = [{"type": "header", "text": {"type": "plain_text", "text": category[:150], "emoji": True}}]
+    for i, it in enumerate(items):
+        if i:
+            blocks.append({"type": "divider"})
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": it["message"][:SECTION_MAX_CHARS]}})
+    return blocks
+
+# ================== RECONCILE (süresi dolmuş rezervasyonlar) ==================
+def reconcile_stale_reservations(client: WebClient, user_key: str | None = None) -> dict:
+    # Lease'i dolmuş 'reserved' kayıtlar: süreç Slack çağrısı ile sent/failed işaretlemesi arasında ölmüş.
+    # Mesaj Slack'te birebir bulunursa (metadata'daki send_key / upload'un file_id'si) 'sent' (tekrar
+    # gönderilmez), bulunamazsa 'failed' (kilit bırakılır, satır tekrar listelenir). Slack okunamazsa kayıt
+    # olduğu gibi kalır, sonraki turda tekrar denenir.
+    # Süren gönderimler lease'i hold_leases ile uzattığından buraya sadece sahibi ölmüş kayıtlar düşer.
+    counts = {SENT: 0, FAILED: 0, "pending": 0}
+    for r in db_get_stale_reservations(user_key):
+        if not r["channel"]:
+            db_mark_failed(r["id"], "reconcile: kanal yok")
+            counts[FAILED] += 1
+            continue
+        oldest = r["reserved_at"].timestamp() - 5 if r["reserved_at"] else 0
+        ts, err = find_posted_message(client, r["channel"], oldest, r["send_key"], r["slack_file_id"])
+        if ts:
+            db_mark_sent(r["id"], ts, r["slack_file_id"])
+            counts[SENT] += 1
+        elif err:
+            counts["pending"] += 1
+        else:
+            db_mark_failed(r["id"], "reconcile: Slack mesajı bulunamadı")
+            counts[FAILED] += 1
+    return counts
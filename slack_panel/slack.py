@@ -0,0 +1,196 @@
+# slack_panel/slack.py
+# Slack çağrıları: hata fırlatmaz, (sonuç, hata metni) döner.
+
+import http.client
+import re
+import urllib.error
+from io import BytesIO
+
+import aiohttp
+import requests
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+
+from .config import get_secret
+
+# Geçici hatalar (tekrar denenir) — beyaz liste: bu Slack kodları, HTTP 429/5xx ve bağlantı/timeout
+# istisnaları. Geri kalan her şey (channel_not_found, not_in_channel, invalid_auth, msg_too_long,
+# beklenmeyen istisnalar...) kalıcıdır ve operatöre gösterilir.
+TRANSIENT_SLACK_ERRORS = {
+    "ratelimited", "rate_limited", "internal_error", "fatal_error", "service_unavailable",
+    "request_timeout", "timeout",
+}
+TRANSIENT_HTTP = re.compile(r"\bHTTP (?:429|5\d\d)\b")
+SLACK_ERROR_CODE = re.compile(r"^[a-z_]+$")
+
+def _subclass_names(*bases, exclude=()) -> frozenset[str]:
+    # Aynı adlı farklı sınıflar olabilir (requests.ConnectionError / builtin) → sınıf bazında gezilir
+    seen, todo = set(), list(bases)
+    while todo:
+        cls = todo.pop()
+        if cls not in seen and cls not in exclude:
+            seen.add(cls)
+            todo.extend(cls.__subclasses__())
+    return frozenset(cls.__name__ for cls in seen)
+
+# Hata metninde istisna sınıf adıyla geçer ("<metot>: <Sınıf>: <mesaj>", lightshot: "lightshot: <Sınıf>")
+TRANSIENT_EXCEPTIONS = _subclass_names(
+    TimeoutError, ConnectionError, urllib.error.URLError, http.client.IncompleteRead,
+    aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+    requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+    exclude=(urllib.error.HTTPError,),  # HTTP durum hatası; 429/5xx metindeki "HTTP <kod>" ile yakalanır
+)
+
+
+# chat.postMessage metadata'sı: event_payload.send_keys = mesajdaki satırların sent_log.send_key değerleri
+SEND_EVENT_TYPE = "slack_panel_send"
+
+
+def make_client(token: str) -> WebClient:
+    # SLACK_API_URL: yerel test sunucusu için (python -m slack_panel.fakeslack); boşsa gerçek Slack
+    base_url = get_secret("SLACK_API_URL", "") or WebClient.BASE_URL
+    return WebClient(token=token, base_url=base_url.rstrip("/") + "/")
+
+def api_error(method: str, e: Exception) -> str:
+    # Hata metni: "<metot>: <slack hata kodu>", "<metot>: HTTP <durum>: <gövde>" ya da "<metot>: <Sınıf>: <mesaj>"
+    if isinstance(e, SlackApiError):
+        code = str(e.response.get("error") or "")
+        if SLACK_ERROR_CODE.match(code):
+            return f"{method}: {code}"
+        return f"{method}: HTTP {e.response.status_code}: {code or e}"
+    return f"{method}: {e.__class__.__name__}: {e}"
+
+def is_transient_error(err: str) -> bool:
+    if not err:
+        return False
+    detail = err.split(": ", 1)[1].strip() if ": " in err else err.strip()
+    if detail in TRANSIENT_SLACK_ERRORS or TRANSIENT_HTTP.search(err):
+        return True
+    return detail.split(":", 1)[0].strip() in TRANSIENT_EXCEPTIONS
+
+def error_code(err: str) -> str:
+    # Metrik için kısa kod: Slack hata kodu (ratelimited, channel_not_found...) ya da "<kaynak>_error"
+    if not err:
+        return ""
+    detail = err.split(": ", 1)[1].strip() if ": " in err else err.strip()
+    if SLACK_ERROR_CODE.match(detail):
+        return detail
+    return f"{err.split(':', 1)[0].split()[0]}_error"
+
+def send_metadata(send_keys: list[str]) -> dict | None:
+    keys = [k for k in send_keys if k]
+    return {"event_type": SEND_EVENT_TYPE, "event_payload": {"send_keys": keys}} if keys else None
+
+def _post_args(channel_id: str, text: str, blocks: list | None, metadata: dict | None) -> dict:
+    args = {"channel": channel_id, "text": text}
+    if blocks:
+        args["blocks"] = blocks
+    if metadata:
+        args["metadata"] = metadata
+    return args
+
+def safe_chat_post(client: WebClient, channel_id: str, text: str, blocks: list | None = None, metadata: dict | None = None):
+    try:
+        resp = client.chat_postMessage(**_post_args(channel_id, text, blocks, metadata))
+        return resp, None
+    except Exception as e:
+        return None, api_error("chat_postMessage", e)
+
+def safe_upload_image_with_comment(client: WebClient, channel_id: str, bio: BytesIO, message: str, filename: str):
+    try:
+        bio.seek(0)
+        resp = client.files_upload_v2(
+            channel=channel_id,
+            file=bio,
+            filename=filename,
+            initial_comment=message
+        )
+        return resp, None
+    except Exception as e:
+        return None, api_error("files_upload_v2", e)
+
+# ---------------- async (aio loop'unda) ----------------
+async def async_safe_chat_post(
+    client: AsyncWebClient, channel_id: str, text: str, blocks: list | None = None, metadata: dict | None = None,
+):
+    try:
+        resp = await client.chat_postMessage(**_post_args(channel_id, text, blocks, metadata))
+        return resp, None
+    except Exception as e:
+        return None, api_error("chat_postMessage", e)
+
+async def async_safe_upload_image_with_comment(
+    client: AsyncWebClient, channel_id: str, bio: BytesIO, message: str, filename: str, on_file_id=None,
+):
+    # files_upload_v2'nin üç adımı açık yazılır: on_file_id (async) dosya kanalda paylaşılmadan önce
+    # file_id'yi kaydeder; reconcile yarıda kalan gönderimi bu id ile bulur
+    try:
+        data = bio.getvalue()
+        url = await client.files_getUploadURLExternal(filename=filename, length=len(data))
+        file_id = url["file_id"]
+        if on_file_id is not None:
+            await on_file_id(file_id)
+        up = await client._upload_file(
+            url=url["upload_url"], data=data, logger=client._logger, timeout=client.timeout, proxy=client.proxy, ssl=client.ssl,
+        )
+        if up.status != 200:
+            return None, f"files_upload_v2: HTTP {up.status}: {up.body}"
+        resp = await client.files_completeUploadExternal(
+            files=[{"id": file_id, "title": filename}], channel_id=channel_id, initial_comment=message,
+        )
+        return resp, None
+    except Exception as e:
+        return None, api_error("files_upload_v2", e)
+
+def response_ids(resp) -> tuple[str, str]:
+    # chat_postMessage → (ts, ""), files_upload_v2 → (ts?, file_id)
+    if resp is None:
+        return "", ""
+    try:
+        data = resp.data if hasattr(resp, "data") else dict(resp)
+    except Exception:
+        return "", ""
+    ts = str(data.get("ts") or (data.get("message") or {}).get("ts") or "")
+    files = data.get("files") or ([data["file"]] if data.get("file") else [])
+    file_id = str(files[0].get("id", "")) if files and isinstance(files[0], dict) else ""
+    return ts, file_id
+
+def find_posted_message(client: WebClient, channel_id: str, oldest: float, send_key: str = "", file_id: str = ""):
+    # Gönderim Slack'e ulaşmış mı? Birebir eşleşme: upload → file_id'nin bu kanaldaki paylaşımı,
+    # mesaj → metadata'sında send_key olan mesaj. Dönen: (ts | None, hata metni)
+    if file_id:
+        return _find_file_share(client, channel_id, file_id)
+    if not send_key:
+        return None, None
+    try:
+        cursor = None
+        while True:
+            resp = client.conversations_history(
+                channel=channel_id, oldest=f"{oldest:.6f}", limit=200, cursor=cursor, include_all_metadata=True,
+            )
+            for m in resp.get("messages", []) or []:
+                meta = m.get("metadata") or {}
+                if meta.get("event_type") == SEND_EVENT_TYPE and send_key in (meta.get("event_payload") or {}).get("send_keys", []):
+                    return m.get("ts"), None
+            cursor = (resp.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return None, None
+    except Exception as e:
+        return None, api_error("conversations_history", e)
+
+def _find_file_share(client: WebClient, channel_id: str, file_id: str):
+    try:
+        resp = client.files_info(file=file_id)
+    except SlackApiError as e:
+        if e.response.get("error") == "file_not_found":  # upload tamamlanmamış
+            return None, None
+        return None, api_error("files_info", e)
+    except Exception as e:
+        return None, api_error("files_info", e)
+    shares = (resp.get("file") or {}).get("shares") or {}
+    for scope in ("public", "private"):
+        posts = (shares.get(scope) or {}).get(channel_id) or []
+        if posts:
+            return posts[0].get("ts"), None
+    return None, None
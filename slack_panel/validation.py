@@ -0,0 +1,85 @@
+# slack_panel/validation.py
+# Satır bazlı (ağsız) doğrulama: gönderim tablosundaki "Durum" kolonu.
+# app.py bunu sadece data_editor'ün edited_rows farkındaki satırlar için yeniden hesaplar.
+# Kategori eşleşmesi id ile: satır adı bir kere id'ye çevrilir, değişken/preset'ler category_id taşır (db.py).
+
+import hashlib
+
+from .helpers import DEFAULT_CATEGORY, DEFAULT_CATEGORY_ID, MANUAL_OPTION, extract_vars, is_unselected, looks_like_lightshot
+from .preset_health import broken_label, is_broken
+
+STATUS_OK = "✅ Hazır"
+STATUS_OK_UNCHECKED = "✅ Hazır (link kontrol edilmedi)"
+STATUS_IMAGE_FAILED = "❌ Görsel alınamadı"
+_LINK_STATUSES = (STATUS_OK, STATUS_OK_UNCHECKED, STATUS_IMAGE_FAILED)
+
+
+def is_ok_status(status: str) -> bool:
+    return str(status or "").startswith("✅")
+
+def validate_row(row, template: str, category_ids: dict[str, int], variables: dict, attachments: dict, link_cache: dict) -> str:
+    # row: tablo satırı (dict / pandas Series). Görsel indirmez; link durumu link_cache'ten okunur.
+    # category_ids: db_get_category_ids() (ad -> id); bilinmeyen kategori Genel sayılır
+    row_cat_id = category_ids.get(str(row.get("Kategori") or "").strip(), DEFAULT_CATEGORY_ID)
+
+    for v in extract_vars(template):
+        vdef = variables.get(v) if isinstance(variables.get(v), dict) else {}
+        if vdef.get("category_id", DEFAULT_CATEGORY_ID) != row_cat_id:
+            return f"❗ Değişken kategori uyumsuz ({v}/{vdef.get('category') or DEFAULT_CATEGORY})"
+        if is_unselected(row.get(f"Var: {v}", "")):
+            return f"❗ {v} seçilmedi"
+
+    if not str(row.get("Mesaj", "") or "").strip():
+        return "❗ Mesaj boş"
+
+    if not bool(row.get("Ek Zorunlu", False)):
+        return STATUS_OK
+
+    ek_sec = str(row.get("Ek Seç", "") or "").strip()
+    link = str(row.get("Lightshot Link", "") or "").strip()
+    if is_unselected(ek_sec):
+        return "❗ Ek seçilmedi"
+    if ek_sec != MANUAL_OPTION:
+        preset = attachments.get(ek_sec)
+        if not isinstance(preset, dict):
+            return "❗ Preset yok"
+        if preset.get("category_id", DEFAULT_CATEGORY_ID) != row_cat_id:
+            return "❗ Preset kategori uyumsuz"
+        if is_broken(preset):
+            return broken_label(preset)  # arka plan kontrolü bozuk buldu; link tekrar denenmez
+        link = str(preset.get("url", "") or "").strip()
+    if not link:
+        return "❗ Link yok"
+    if not looks_like_lightshot(link):
+        return "❗ Link prnt.sc değil"
+
+    return link_status(link_cache.get(link))
+
+def link_status(ok: bool | None) -> str:
+    # link_cache değeri → durum (None: kontrol edilmedi)
+    if ok is None:
+        return STATUS_OK_UNCHECKED
+    return STATUS_OK if ok else STATUS_IMAGE_FAILED
+
+def refresh_link_status(status: str, link: str, link_cache: dict) -> str:
+    # Kaydedilmiş durumu link_cache'in şimdiki haliyle tazeler (gönderimde satırlar baştan doğrulanmaz).
+    # Sadece linke bağlı durumlar değişebilir; diğer sonuçlar satır/konfigürasyon değişmeden değişmez.
+    if not link or status not in _LINK_STATUSES:
+        return status
+    return link_status(link_cache.get(link))
+
+def changed_row_indices(edited_rows: dict, previous: dict) -> set[int]:
+    # data_editor'ün edited_rows'u birikimli; son çalıştırmadan beri değişen satırları döner
+    keys = set(edited_rows) | set(previous)
+    return {int(k) for k in keys if edited_rows.get(k) != previous.get(k)}
+
+def config_fingerprint(category_ids: dict[str, int], variables: dict, attachments: dict) -> str:
+    # Doğrulamayı etkileyen konfigürasyon değişirse tüm durumlar yeniden hesaplanır
+    h = hashlib.sha1()
+    h.update("|".join(f"{n}:{i}" for n, i in sorted(category_ids.items())).encode())
+    for name in sorted(variables):
+        h.update(f"v:{name}:{(variables[name] or {}).get('category_id')}".encode())
+    for name in sorted(attachments):
+        a = attachments[name] or {}
+        h.update(f"a:{name}:{a.get('category_id')}:{a.get('url')}:{a.get('status')}".encode())
+    return h.hexdigest()
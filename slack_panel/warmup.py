@@ -0,0 +1,92 @@
+# slack_panel/warmup.py
+# Sabah ön ısıtma: günün day_rows'u, aktif attachments ve değişken kataloğu yüklenir, bugün ek
+# gerektiren kategorilerdeki preset Lightshot görselleri aio cache'ine indirilir. Böylece ilk
+# operatörün ilk "Slack'e Gönder"i soğuk cache ile başlamaz. Okumalar aynı zamanda DB kesintisi için
+# yerel konfigürasyon kopyasını (offline snapshot) tazeler.
+# Süreç açılışında bir kere, sonra her gün WARMUP_AT saatinde çalışır (app.py ve dispatcher).
+
+import logging
+import threading
+from datetime import date, datetime
+
+from .aio import prefetch_images
+from .db import db_get_attachments, db_get_categories, db_get_category_channels, db_get_day_rows, db_get_variables
+from .helpers import DAY_KEYS, DEFAULT_CATEGORY, extract_vars, looks_like_lightshot, next_run_at
+from .preset_health import is_broken
+
+log = logging.getLogger("slack_panel.warmup")
+
+DEFAULT_WARMUP_AT = "08:30"
+
+_last_summary: dict = {}
+
+
+def warm_up(d: date) -> dict:
+    day_key = DAY_KEYS[d.weekday()]
+    rows = db_get_day_rows(day_key)
+    attachments = db_get_attachments(include_expired=False)
+    variables = db_get_variables()
+    categories = db_get_categories()
+    db_get_category_channels()
+    # Çevrimdışı kopya: DB kesintisinde Ayarlar sayfası da son hâliyle açılabilsin (offline.read_through)
+    for k in DAY_KEYS:
+        if k != day_key:
+            db_get_day_rows(k)
+    db_get_attachments(include_expired=True)
+
+    template_vars = {v for r in rows for v in extract_vars(str(r.get("text", "") or ""))}
+
+    # Operatör preset'i gönderim anında seçer: bugün ek zorunlu satırı olan kategorilerin tüm preset'leri
+    # (sağlık kontrolünün bozuk bulduğu preset'ler hariç)
+    attach_cats = {
+        str(r.get("category") or DEFAULT_CATEGORY).strip() or DEFAULT_CATEGORY
+        for r in rows if r.get("requires_attachment")
+    }
+    urls = [
+        str(a.get("url", "") or "").strip()
+        for a in attachments.values()
+        if isinstance(a, dict) and str(a.get("category", DEFAULT_CATEGORY)).strip() in attach_cats and not is_broken(a)
+    ]
+    results = prefetch_images(u for u in urls if looks_like_lightshot(u))
+    failed = sorted(u for u, (bio, _, _) in results.items() if bio is None)
+
+    summary = {
+        "at": datetime.now(),
+        "day_key": day_key,
+        "rows": len(rows),
+        "categories": len(categories),
+        "variables": len(variables),
+        "template_vars": len(template_vars),
+        "images": len(results) - len(failed),
+        "failed": failed,
+    }
+    _last_summary.clear()
+    _last_summary.update(summary)
+    if failed:
+        log.warning("Warm-up: %s preset görseli alınamadı: %s", len(failed), ", ".join(failed))
+    log.info("Warm-up (%s): %s satır, %s görsel cache'te", day_key, len(rows), summary["images"])
+    return summary
+
+def last_warm_up() -> dict:
+    return dict(_last_summary)
+
+class WarmupWorker(threading.Thread):
+    # Süreç başına bir tane: açılışta hemen, sonra her gün "at" saatinde warm_up
+    def __init__(self, at: str = DEFAULT_WARMUP_AT, days: list[str] | None = None):
+        super().__init__(name="slack-warmup-worker", daemon=True)
+        self.at = at
+        self.days = days or list(DAY_KEYS)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                warm_up(date.today())
+            except Exception:
+                log.exception("Warm-up başarısız")
+            wait = (next_run_at(datetime.now(), self.at, self.days) - datetime.now()).total_seconds()
+            if self._stop_event.wait(max(0.0, wait)):
+                return
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+# DB testleri gerçek Postgres ister: TEST_DATABASE_URL boş/silinebilir bir veritabanını göstermeli
+# (migration'lar uygulanır, her testten önce sent_log ve day_rows boşaltılır). Tanımlı değilse atlanır.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+
+@pytest.fixture
+def pg(monkeypatch, tmp_path):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL tanımlı değil")
+    from slack_panel import db, migrations, offline
+
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    monkeypatch.setattr(db, "_conn", None)
+    # Yerel çevrimdışı depo testin geçici dizininde (geliştiricinin offline/ dosyasına yazılmaz)
+    monkeypatch.setenv("OFFLINE_DB", str(tmp_path / "offline.sqlite3"))
+    monkeypatch.setattr(offline, "_path", None)
+    monkeypatch.setattr(offline, "_offline_until", 0.0)
+    conn = db.get_conn()
+    migrations.run_migrations(conn)
+    with conn.cursor() as cur:
+        cur.execute("truncate sent_log, day_rows restart identity cascade")
+    yield conn
+    conn.close()
@@ -0,0 +1,58 @@
+from datetime import date
+
+from slack_panel import archive
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+class FakeConn:
+    # list_partitions'ın pg_inherits sorgusuna sabit partition adları döner
+    def __init__(self, names):
+        self.names = names
+
+    def cursor(self):
+        return FakeCursor([(n,) for n in self.names])
+
+
+def test_month_start_offsets_cross_years():
+    d = date(2026, 1, 17)
+    assert archive._month_start(d) == date(2026, 1, 1)
+    assert archive._month_start(d, -1) == date(2025, 12, 1)
+    assert archive._month_start(d, -13) == date(2024, 12, 1)
+    assert archive._month_start(date(2026, 11, 30), 2) == date(2027, 1, 1)
+
+def test_partition_name():
+    assert archive.partition_name(date(2026, 3, 1)) == "sent_log_y2026m03"
+
+def test_list_partitions_parses_names_and_skips_others():
+    conn = FakeConn(["sent_log_y2026m03", "sent_log_default", "sent_log_y2025m12", "sent_log_eski", "sent_log_y2026m01"])
+    assert archive.list_partitions(conn) == [
+        ("sent_log_y2025m12", date(2025, 12, 1)),
+        ("sent_log_y2026m01", date(2026, 1, 1)),
+        ("sent_log_y2026m03", date(2026, 3, 1)),
+    ]
+
+def test_compact_old_partitions_keeps_retention_window(monkeypatch, tmp_path):
+    months = [archive._month_start(date(2026, 10, 1), -i) for i in range(9)]
+    conn = FakeConn([archive.partition_name(m) for m in months])
+    monkeypatch.setattr(archive, "is_partitioned", lambda conn=None: True)
+    compacted = []
+    monkeypatch.setattr(archive, "compact_partition", lambda name, month, d, conn=None: compacted.append(month) or 1)
+    done = archive.compact_old_partitions(date(2026, 10, 19), retention_months=6, archive_dir=str(tmp_path), conn=conn)
+    # Ekim + önceki 6 ay (Nisan..Eylül) canlı kalır; Mart ve Şubat arşivlenir
+    assert compacted == [date(2026, 2, 1), date(2026, 3, 1)]
+    assert done == {"sent_log_y2026m02": 1, "sent_log_y2026m03": 1}
@@ -0,0 +1,38 @@
+from slack_panel.sender import BATCH_MAX_BLOCKS, BATCH_MAX_SECTIONS, SECTION_MAX_CHARS, build_batch_blocks, plan_sends
+
+
+def _item(n, category="Genel", channels=("C1",), image=None):
+    return {"day_row_id": n, "message": f"mesaj {n}", "category": category, "channels": list(channels), "image": image}
+
+
+def test_no_batch_keeps_one_item_per_unit():
+    items = [_item(1), _item(2)]
+    assert plan_sends(items, False) == [[items[0]], [items[1]]]
+
+def test_groups_by_category_and_channels_in_order():
+    a1, b1, a2, c1 = _item(1, "A"), _item(2, "B"), _item(3, "A"), _item(4, "A", channels=("C2",))
+    assert plan_sends([a1, b1, a2, c1], True) == [[a1, a2], [b1], [c1]]
+
+def test_items_with_image_are_sent_alone():
+    img = _item(1, image=object())
+    txt = [_item(2), _item(3)]
+    assert plan_sends([img, *txt], True) == [[img], txt]
+
+def test_large_group_is_split_at_section_limit():
+    items = [_item(i) for i in range(BATCH_MAX_SECTIONS * 2 + 1)]
+    units = plan_sends(items, True)
+    assert [len(u) for u in units] == [BATCH_MAX_SECTIONS, BATCH_MAX_SECTIONS, 1]
+    assert [it for u in units for it in u] == items
+
+def test_full_unit_fits_block_kit_limit():
+    blocks = build_batch_blocks("Genel", [_item(i) for i in range(BATCH_MAX_SECTIONS)])
+    assert len(blocks) <= BATCH_MAX_BLOCKS
+    assert sum(1 for b in blocks if b["type"] == "section") == BATCH_MAX_SECTIONS
+
+def test_blocks_layout_and_truncation():
+    long = {"message": "x" * (SECTION_MAX_CHARS + 10)}
+    blocks = build_batch_blocks("K" * 200, [{"message": "bir"}, long])
+    assert [b["type"] for b in blocks] == ["header", "section", "divider", "section"]
+    assert len(blocks[0]["text"]["text"]) == 150
+    assert blocks[1]["text"] == {"type": "mrkdwn", "text": "bir"}
+    assert len(blocks[3]["text"]["text"]) == SECTION_MAX_CHARS
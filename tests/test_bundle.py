@@ -0,0 +1,104 @@
+import io
+import json
+import zipfile
+from datetime import date
+
+import pytest
+
+from slack_panel.bundle import BundleError, detect_format, export_file, parse_bundle, validate_bundle, write_export
+
+DOC = {
+    "version": 1,
+    "categories": [{"name": "Kampanya", "channels": "C1, C2"}],
+    "variables": [{"name": "urun", "category": "Kampanya", "default_value": "A", "options": ["A", "B"]}],
+    "attachments": [{"name": "afiş", "category": "Kampanya", "url": "https://prnt.sc/a", "valid_date": "2026-12-31"}],
+    "day_rows": [
+        {"day_key": "Monday", "position": "1", "text": "{{urun}} kampanyası", "category": "Kampanya",
+         "requires_attachment": "evet", "default_attachment": "afiş", "channels": ["C3"]},
+    ],
+}
+
+
+def _parse(doc=DOC):
+    return parse_bundle(json.dumps(doc).encode("utf-8"), "json")
+
+def _validate(b):
+    return validate_bundle(b, categories=["Genel"], variables={}, attachments={})
+
+
+def test_detect_format():
+    assert detect_format("config.yml") == "yaml"
+    assert detect_format("config.ZIP") == "csv"
+    assert detect_format("config.json") == "json"
+    assert detect_format("") == "json"
+
+def test_parse_json_normalizes_and_flattens_options():
+    b = _parse()
+    assert b["categories"] == [{"name": "Kampanya", "channels": ["C1", "C2"]}]
+    assert b["variable_options"] == [
+        {"variable_name": "urun", "position": 1, "value": "A"},
+        {"variable_name": "urun", "position": 2, "value": "B"},
+    ]
+    row = b["day_rows"][0]
+    assert row["day_key"] == "monday" and row["position"] == 1
+    assert row["requires_attachment"] is True and row["auto_send"] is False
+    assert b["attachments"][0]["valid_date"] == date(2026, 12, 31)
+
+def test_parse_csv_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("paket/categories.csv", "name,channels\nKampanya,\"C1,C2\"\n")
+        zf.writestr("attachments.csv", "name,category,url,valid_date\n05 Ocak 2027 afiş,Kampanya,https://prnt.sc/a,\n")
+    b = parse_bundle(buf.getvalue(), "csv")
+    assert b["categories"] == [{"name": "Kampanya", "channels": ["C1", "C2"]}]
+    # valid_date boşsa preset adındaki Türkçe tarihten
+    assert b["attachments"][0]["valid_date"] == date(2027, 1, 5)
+    assert b["day_rows"] == []
+
+@pytest.mark.parametrize("data, fmt", [
+    (b"{bozuk", "json"),
+    (b"[1, 2]", "json"),
+    (b'{"version": 2}', "json"),
+    (b'{"day_rows": ["metin"]}', "json"),
+    (b"zip degil", "csv"),
+])
+def test_parse_errors(data, fmt):
+    with pytest.raises(BundleError):
+        parse_bundle(data, fmt)
+
+def test_valid_bundle():
+    assert _validate(_parse()) == []
+
+def test_validation_errors():
+    doc = json.loads(json.dumps(DOC))
+    doc["variables"][0]["default_value"] = "Z"
+    doc["attachments"].append({"name": "afiş", "category": "Yok", "url": "", "valid_date": "31.12.2026"})
+    doc["day_rows"].append({"day_key": "pazartesi", "text": "{{tanımsız}}", "category": "Genel", "default_attachment": "afiş"})
+    assert _validate(_parse(doc)) == [
+        "variables #1 (urun): varsayılan değer seçeneklerde yok",
+        "attachments #2: ad ve url zorunlu",
+        "attachments #2 (afiş): kategori yok (Yok)",
+        "attachments #2 (afiş): valid_date YYYY-AA-GG olmalı",
+        "attachments #2: tekrar eden kayıt (afiş)",
+        # aynı adlı son preset'in kategorisi geçerli olur
+        "day_rows #1: varsayılan ek kategori uyumsuz (afiş)",
+        "day_rows #2: geçersiz day_key (pazartesi)",
+        "day_rows #2: değişken tanımlı değil (tanımsız)",
+        "day_rows #2: varsayılan ek kategori uyumsuz (afiş)",
+    ]
+
+def test_validation_uses_existing_config():
+    b = _parse({"day_rows": [{"day_key": "friday", "text": "{{urun}}", "category": "Genel", "default_attachment": "eski"}]})
+    errors = validate_bundle(
+        b, categories=["Genel"], variables={"urun": {"category": "Kampanya"}}, attachments={"eski": {"category": "Genel"}},
+    )
+    assert errors == ["day_rows #1: değişken kategori uyumsuz (urun/Kampanya)"]
+
+def test_export_file_matches_streamed_export(pg):
+    expected = io.BytesIO()
+    write_export(expected, "json", pg)
+    with export_file("json", pg) as f:
+        assert isinstance(f, io.BufferedReader)  # st.download_button'ın okuyabildiği tip
+        data = f.read()
+    assert data == expected.getvalue()
+    assert parse_bundle(data, "json")["categories"]
@@ -0,0 +1,210 @@
+import fnmatch
+import pickle
+import re
+from datetime import date, datetime, timezone
+
+import psycopg
+import pytest
+
+from slack_panel import cache, db, offline
+
+
+class FakeRedis:
+    # RedisCache'in kullandığı redis-py alt kümesi (get/set/delete/scan_iter), bellek içi
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, match="*", count=None):
+        # Redis kaçışı (\x) fnmatch'te tek karakterlik küme ([x]) olur
+        pattern = re.sub(r"\\(.)", lambda m: "[" + m.group(1) + "]", match)
+        return [k.encode() for k in self.data if fnmatch.fnmatchcase(k, pattern)]
+
+class BrokenBackend(cache.CacheBackend):
+    name = "broken"
+
+    def _get(self, key):
+        raise ConnectionError("kapalı")
+
+    _set = _delete = _keys = _purge = _get
+
+
+@pytest.fixture(params=["memory", "disk", "redis", "postgres"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield cache.MemoryCache()
+    elif request.param == "disk":
+        yield cache.DiskCache(str(tmp_path / "cache"))
+    elif request.param == "redis":
+        yield cache.RedisCache(client=FakeRedis())
+    else:
+        conn = request.getfixturevalue("pg")
+        with conn.cursor() as cur:
+            cur.execute("truncate cache_entries")
+        pg_cache = cache.PostgresCache()
+        yield pg_cache
+        pg_cache.close()
+
+@pytest.fixture
+def memory_cache():
+    previous = cache.get_cache()
+    backend = cache.MemoryCache()
+    cache.set_cache(backend)
+    yield backend
+    cache.set_cache(previous)
+
+
+def test_set_get_delete(backend):
+    assert backend.get("img:a") is None
+    backend.set("img:a", b"\x89PNG\x00", 60)
+    assert backend.get("img:a") == b"\x89PNG\x00"
+    backend.set("img:a", b"yeni")
+    assert backend.get("img:a") == b"yeni"
+    backend.delete("img:a")
+    assert backend.get("img:a") is None
+    backend.delete("img:a")  # olmayan anahtar hata vermez
+
+def test_keys_by_prefix(backend):
+    for k in ("img:https://prnt.sc/a_1", "img:https://prnt.sc/b%2", "ls:https://prnt.sc/a_1", "imgx"):
+        backend.set(k, b"1", 60)
+    assert sorted(backend.keys("img:")) == ["img:https://prnt.sc/a_1", "img:https://prnt.sc/b%2"]
+    # LIKE / glob özel karakterleri önekte düz karakterdir
+    assert backend.keys("img:https://prnt.sc/a_") == ["img:https://prnt.sc/a_1"]
+    assert backend.keys("img:https://prnt.sc/a%") == []
+
+def test_objects_round_trip(backend):
+    value = {"urun": {"category": "Genel", "options": ["A", "B"]}, "sayı": 3}
+    backend.set_obj("cfg:1:variables", value, 60)
+    assert backend.get_obj("cfg:1:variables") == (True, value)
+    assert backend.get_obj("cfg:1:yok") == (False, None)
+
+def test_dumps_loads_round_trip():
+    value = {
+        "gün": date(2026, 3, 5),
+        "zaman": datetime(2026, 3, 5, 14, 5, tzinfo=timezone.utc),
+        "ham": b"\x00\xff",
+        "çift": (1, "a"),
+        "küme": {"x", "y"},
+        "idler": {1: "Genel", 2: None},
+        "iç": [{"__t": "etiket gibi"}, 1.5, True],
+    }
+    raw = cache.dumps(value)
+    assert isinstance(raw, bytes)
+    assert cache.loads(raw) == value
+    assert cache.loads(cache.dumps([])) == []
+
+def test_uncacheable_objects_are_not_stored(backend):
+    backend.set_obj("cfg:1:x", {"a": 1})
+    backend.set_obj("cfg:1:x", {"a": object()})  # eski değer bayat kalmaz
+    assert backend.get_obj("cfg:1:x") == (False, None)
+    backend.set("cfg:1:pickle", pickle.dumps({"a": 1}))
+    assert backend.get_obj("cfg:1:pickle") == (False, None)
+
+@pytest.mark.parametrize("backend", ["memory", "disk", "postgres"], indirect=True)
+def test_expired_entries_are_hidden_and_purged(backend):
+    backend.set("img:eski", b"1", -1)  # süresi geçmiş kayıt
+    backend.set("img:yeni", b"2", 60)
+    backend.set("img:kalıcı", b"3")
+    assert sorted(backend.keys("img:")) == ["img:kalıcı", "img:yeni"]
+    assert backend.purge() == 1
+    assert backend.purge() == 0
+    assert backend.get("img:eski") is None
+    assert backend.get("img:yeni") == b"2"
+
+def test_redis_ttl_is_passed_as_seconds():
+    client = FakeRedis()
+    r = cache.RedisCache(client=client)
+    r.set("a", b"1", 0.2)
+    r.set("b", b"1", 90.7)
+    r.set("c", b"1")
+    assert client.ttls == {"a": 1, "b": 90, "c": None}
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    cache.DiskCache(str(tmp_path)).set("img:a", b"1", 60)
+    assert cache.DiskCache(str(tmp_path)).get("img:a") == b"1"
+
+def test_disk_cache_long_keys_and_legacy_files(tmp_path):
+    disk = cache.DiskCache(str(tmp_path))
+    long_key = "img:https://prnt.sc/" + "x" * 300
+    disk.set(long_key, b"uzun", 60)
+    disk.set("img:kısa", b"2", 60)
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert [n[:2] for n in names] == ["h-", "k-"]
+    assert sorted(disk.keys("img:")) == [long_key, "img:kısa"]
+    assert disk.keys("img:https") == [long_key]
+    assert disk.get(long_key) == b"uzun"
+    (tmp_path / "0123abcd").write_bytes(pickle.dumps((None, b"eski")))  # pickle'lı eski biçim
+    assert disk.purge() == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == names
+
+def test_backend_errors_do_not_raise():
+    b = BrokenBackend()
+    assert b.get("a") is None
+    b.set("a", b"1")
+    b.delete("a")
+    assert b.keys("") == []
+    assert b.purge() == 0
+    assert b.get_obj("a") == (False, None)
+
+def test_make_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path / "c"))
+    assert isinstance(cache.make_cache(""), cache.MemoryCache)
+    assert isinstance(cache.make_cache("Disk"), cache.DiskCache)
+    assert (tmp_path / "c").is_dir()
+    with pytest.raises(RuntimeError):
+        cache.make_cache("memcached")
+
+def test_bump_config_changes_generation(memory_cache):
+    first = cache.config_key("variables")
+    assert first == cache.config_key("variables")
+    cache.bump_config()
+    assert cache.config_key("variables") != first
+
+def test_invalidates_config_bumps_even_on_error(memory_cache):
+    @cache.invalidates_config
+    def write():
+        raise ValueError("yazılamadı")
+
+    before = cache.config_key("x")
+    with pytest.raises(ValueError):
+        write()
+    assert cache.config_key("x") != before
+
+def test_postgres_cache_falls_back_to_memory_when_offline(monkeypatch):
+    monkeypatch.setattr(offline, "_offline_until", 0.0)
+    backend = cache.PostgresCache()
+    calls = []
+
+    def broken_cursor():
+        calls.append(1)
+        raise psycopg.OperationalError("bağlantı yok")
+
+    monkeypatch.setattr(backend, "_cur", broken_cursor)
+    backend.set("img:a", b"1")  # bağlantı hatası → çevrimdışı işaretlenir, yerel cache'e yazılır
+    assert offline.is_offline()
+    assert backend.get("img:a") == b"1"
+    assert backend.keys("img:") == ["img:a"]
+    assert calls == [1]  # çevrimdışıyken DB tekrar denenmez
+
+def test_postgres_cache_uses_its_own_connection(pg):
+    backend = cache.PostgresCache()
+    try:
+        backend.set("img:a", b"1", 60)
+        assert backend._conn is not None and backend._conn is not db.get_conn()
+        with pg.cursor() as cur:
+            cur.execute("select value from cache_entries where key='img:a'")
+            assert bytes(cur.fetchone()[0]) == b"1"  # autocommit: paylaşımlı bağlantı hemen görür
+        backend._conn.close()  # kopan bağlantı bir sonraki çağrıda yenilenir
+        assert backend.get("img:a") == b"1"
+    finally:
+        backend.close()
@@ -0,0 +1,31 @@
+from slack_panel.helpers import parse_channels
+from slack_panel.sender import resolve_channels, row_fully_sent
+
+CATEGORY_CHANNELS = {"Kampanya": ["C2", "C3"]}
+
+
+def test_parse_channels_splits_and_dedupes():
+    assert parse_channels("C1, C2\nC3  C1,,") == ["C1", "C2", "C3"]
+
+def test_parse_channels_accepts_lists_and_empty():
+    assert parse_channels([" C1", "C2", "C1"]) == ["C1", "C2"]
+    assert parse_channels(None) == []
+    assert parse_channels("") == []
+
+def test_row_channels_win():
+    assert resolve_channels({"channels": ["C9"]}, "Kampanya", CATEGORY_CHANNELS, "C1") == ["C9"]
+
+def test_category_channels_before_default():
+    assert resolve_channels({"channels": []}, "Kampanya", CATEGORY_CHANNELS, "C1") == ["C2", "C3"]
+
+def test_default_channel_last():
+    assert resolve_channels({}, "Genel", CATEGORY_CHANNELS, "C1") == ["C1"]
+    assert resolve_channels({}, "Genel", {}, "") == []
+
+def test_row_fully_sent():
+    assert row_fully_sent(["C1", "C2"], {"C1", "C2", "C3"})
+    assert not row_fully_sent(["C1", "C2"], {"C1"})
+    assert not row_fully_sent(["C1"], set())
+
+def test_legacy_row_without_channel_counts_as_sent():
+    assert row_fully_sent(["C1", "C2"], {""})
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+import pytest
+
+from slack_panel.db import db_sync_row_claims
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def claims(pg):
+    with pg.cursor() as cur:
+        cur.execute("truncate row_claims")
+    return pg
+
+
+def test_claims_are_exclusive_until_released(claims):
+    assert db_sync_row_claims(TODAY, "ali", [1, 2]) == {1: "ali", 2: "ali"}
+    assert db_sync_row_claims(TODAY, "ayse", [2, 3]) == {1: "ali", 2: "ali", 3: "ayse"}
+    assert db_sync_row_claims(TODAY, "ali", [1], release_ids=[2]) == {1: "ali", 3: "ayse"}
+    assert db_sync_row_claims(TODAY, "ayse", [2, 3]) == {1: "ali", 2: "ayse", 3: "ayse"}
+
+def test_release_of_claimed_row_is_ignored(claims):
+    assert db_sync_row_claims(TODAY, "ali", [1], release_ids=[1]) == {1: "ali"}
+
+def test_expired_claim_can_be_taken_over(claims):
+    db_sync_row_claims(TODAY, "ali", [1])
+    with claims.cursor() as cur:
+        cur.execute("update row_claims set expires_at = now() - interval '1 second'")
+    assert db_sync_row_claims(TODAY, "ayse", []) == {}
+    assert db_sync_row_claims(TODAY, "ayse", [1]) == {1: "ayse"}
+
+def test_renewal_keeps_claimed_at(claims):
+    db_sync_row_claims(TODAY, "ali", [1])
+    with claims.cursor() as cur:
+        cur.execute("update row_claims set claimed_at = claimed_at - interval '1 hour' returning claimed_at")
+        claimed_at = cur.fetchone()[0]
+        db_sync_row_claims(TODAY, "ali", [1])
+        cur.execute("select claimed_at, expires_at > now() + interval '1 minute' from row_claims")
+        assert cur.fetchone() == (claimed_at, True)
+
+def test_claims_are_per_day(claims):
+    db_sync_row_claims(TODAY - timedelta(days=1), "ali", [1])
+    assert db_sync_row_claims(TODAY, "ayse", [1]) == {1: "ayse"}
@@ -0,0 +1,70 @@
+import psycopg
+import pytest
+
+from slack_panel import db
+from slack_panel.day_rows import COL_CATEGORY, COL_DELETE, COL_ORDER, COL_TEXT, arrange, day_rows_frame, diff_day_rows
+
+CATEGORIES = ["Genel", "Kampanya"]
+ATTACHMENTS = {"afiş": {"category": "Kampanya", "url": "https://prnt.sc/x"}}
+
+
+def _rows():
+    return [
+        {"id": 10, "text": "bir", "category": "Genel", "position": 1},
+        {"id": 11, "text": "iki", "category": "Genel", "position": 2},
+        {"id": 12, "text": "üç", "category": "Kampanya", "position": 3, "requires_attachment": True, "default_attachment": "afiş"},
+        {"id": 13, "text": "dört", "category": "Genel", "position": 5},
+    ]
+
+
+def test_unchanged_grid_has_no_diff():
+    df = day_rows_frame(_rows())
+    assert diff_day_rows(df, df.copy(), CATEGORIES, ATTACHMENTS) == ({}, [])
+
+def test_arrange_reuses_original_positions():
+    original = day_rows_frame(_rows())
+    edited = original.copy()
+    edited.at[13, COL_ORDER] = 1.5  # dört → bir ile iki arasına
+    out = arrange(edited, original)
+    assert list(out.index) == [10, 13, 11, 12]
+    assert list(out[COL_ORDER]) == [1.0, 2.0, 3.0, 5.0]
+
+def test_move_updates_only_shifted_rows():
+    original = day_rows_frame(_rows())
+    edited = original.copy()
+    edited.at[13, COL_ORDER] = 1.5
+    updates, deletes = diff_day_rows(original, edited, CATEGORIES, ATTACHMENTS)
+    assert deletes == []
+    assert updates == {13: {"position": 2}, 11: {"position": 3}, 12: {"position": 5}}
+
+def test_delete_and_emptied_text_remove_rows_without_renumbering():
+    original = day_rows_frame(_rows())
+    edited = original.copy()
+    edited.at[11, COL_DELETE] = True
+    edited.at[13, COL_TEXT] = "  "
+    updates, deletes = diff_day_rows(original, edited, CATEGORIES, ATTACHMENTS)
+    assert deletes == [11, 13]
+    assert updates == {}  # kalanlar kendi position değerlerini korur, silinenin yeri boş kalır
+
+def test_field_changes_are_normalized():
+    original = day_rows_frame(_rows())
+    edited = original.copy()
+    edited.at[10, COL_TEXT] = " bir! "
+    edited.at[12, COL_CATEGORY] = "Genel"  # preset kategorisi artık uymuyor → varsayılan ek boşalır
+    edited.at[11, COL_CATEGORY] = "Yok"  # bilinmeyen kategori Genel sayılır
+    updates, deletes = diff_day_rows(original, edited, CATEGORIES, ATTACHMENTS)
+    assert deletes == []
+    assert updates == {10: {"text": "bir!"}, 12: {"category": "Genel", "default_attachment": None}}
+
+def test_update_day_rows_writes_in_one_transaction(pg):
+    db.db_add_category("Kampanya")
+    for text in ("bir", "iki", "üç"):
+        db.db_add_day_row("monday", text, "Genel", False)
+    first, second, third = (r["id"] for r in db.db_get_day_rows("monday"))
+    db.db_update_day_rows("monday", {first: {"text": "bir!", "category": "Kampanya"}, third: {"position": 1}}, [second])
+    rows = db.db_get_day_rows("monday")
+    assert [(r["id"], r["text"], r["category"]) for r in rows] == [(first, "bir!", "Kampanya"), (third, "üç", "Genel")]
+    assert rows[1]["position"] == 1
+    with pytest.raises(psycopg.errors.NotNullViolation):
+        db.db_update_day_rows("monday", {first: {"text": "geri alınır"}, third: {"text": None}}, [])
+    assert db.db_get_day_rows("monday")[0]["text"] == "bir!"
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import pytest
+
+from slack_panel import sender
+from slack_panel.db import _metric_values, db_get_send_metrics, db_mark_failed, db_mark_sent, db_try_reserve_send
+from slack_panel.slack import error_code
+
+
+@pytest.mark.parametrize("err, code", [
+    ("", ""),
+    ("chat_postMessage: ratelimited", "ratelimited"),
+    ("files_upload_v2: channel_not_found", "channel_not_found"),
+    ("chat_postMessage: Connection reset by peer", "chat_postMessage_error"),
+    ("lightshot sayfa HTTP 503", "lightshot_error"),
+])
+def test_error_code(err, code):
+    assert error_code(err) == code
+
+def test_metric_values_keep_field_order_and_drop_empty():
+    assert _metric_values({"send_ms": 12, "send_method": "", "fetch_ms": 0}) == [0, 12, None, None, None]
+    assert _metric_values(None) == [None] * 5
+
+def test_settle_adds_error_code(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sender, "db_mark_failed", lambda *a, **k: calls.append(k["metrics"]))
+    sender.settle(7, None, "chat_postMessage: not_in_channel", metrics={"send_ms": 40})
+    assert calls == [{"send_ms": 40, "error_code": "not_in_channel"}]
+
+def _send(d, row_id, category, err="", **metrics):
+    log_id = db_try_reserve_send(d, row_id, "t", "test", "C1", "m", category=category)
+    if err:
+        db_mark_failed(log_id, err, metrics={**metrics, "error_code": error_code(err)})
+    else:
+        db_mark_sent(log_id, "1.2", metrics=metrics)
+
+def test_send_metrics_dashboard(pg):
+    today = date.today()
+    _send(today, 1, "Genel", send_method="chat", send_ms=100, bytes_uploaded=0)
+    _send(today, 2, "Genel", send_method="chat", send_ms=300)
+    _send(today, 3, "Kampanya", send_method="upload", send_ms=900, fetch_ms=200, bytes_uploaded=2_000_000)
+    _send(today, 4, "Kampanya", err="chat_postMessage: channel_not_found", send_method="chat", send_ms=50)
+    _send(today + timedelta(days=10), 5, "Genel", send_method="chat", send_ms=5000)
+
+    m = db_get_send_metrics(today - timedelta(days=6), today)
+    assert m["daily"] == [{"Tarih": today, "Gönderilen": 3, "Hatalı": 1, "Tekrar denenen": 0, "Yüklenen MB": 2.0}]
+    latency = {r["Metot"]: (r["Adet"], r["p50 ms"]) for r in m["latency"]}
+    assert latency == {"chat": (3, 100), "lightshot": (1, 200), "upload": (1, 900)}
+    assert m["by_category"][0]["Kategori"] == "Kampanya" and m["by_category"][0]["Hata %"] == 50.0
+    assert m["errors"] == [{"Hata kodu": "channel_not_found", "Adet": 1, "Kalıcı": 1}]
@@ -0,0 +1,46 @@
+import os
+
+import psycopg
+import pytest
+
+from slack_panel.migrations import MIGRATIONS
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+SCHEMA = "migration_test"
+
+
+@pytest.fixture
+def scratch():
+    # Boş şemada migration'ları adım adım uygulamak için (search_path yalnızca bu şema)
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL tanımlı değil")
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f"drop schema if exists {SCHEMA} cascade")
+        conn.execute(f"create schema {SCHEMA}")
+        conn.execute(f"set search_path to {SCHEMA}")
+        yield conn
+        conn.execute(f"drop schema {SCHEMA} cascade")
+
+def _apply(conn, upto):
+    for version, _, sql in MIGRATIONS:
+        if version > upto:
+            return
+        with conn.transaction():
+            conn.execute(sql)
+
+
+@pytest.mark.parametrize("legacy_pk", ["sent_log_pkey", "sent_log_id_pk"])
+def test_partition_migration_finds_primary_key_name(scratch, legacy_pk):
+    _apply(scratch, 6)
+    if legacy_pk != "sent_log_pkey":
+        scratch.execute(f"alter table sent_log rename constraint sent_log_pkey to {legacy_pk}")
+    scratch.execute(
+        "insert into sent_log(sent_date, day_row_id, channel, status) values (current_date, 1, 'C1', 'sent')"
+    )
+    _apply(scratch, 7)
+    pk = scratch.execute(
+        "select conname from pg_constraint where conrelid = 'sent_log'::regclass and contype = 'p'"
+    ).fetchone()
+    assert pk == ("sent_log_pkey",)
+    assert scratch.execute("select count(*) from sent_log").fetchone() == (1,)
+    assert scratch.execute("select to_regclass('sent_log_legacy')").fetchone() == (None,)
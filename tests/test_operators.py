@@ -0,0 +1,55 @@
+import pytest
+
+from slack_panel import db
+from slack_panel.config import is_operator_secret
+from slack_panel.operators import OperatorRegistry
+
+
+def _op(**kw):
+    return {
+        "user_key": "ali", "role": "operator", "password_secret": "APP_PASSWORD_ALI", "token_secret": "SLACK_USER_TOKEN_ALI",
+        "default_channels": [], "channel_secret": "", "active": True, "category_ids": [], "categories": [], **kw,
+    }
+
+
+@pytest.mark.parametrize("kind, name, ok", [
+    ("password", "APP_PASSWORD", True),
+    ("password", "APP_PASSWORD_2", True),
+    ("token", "SLACK_USER_TOKEN_ALI_2", True),
+    ("channel", "SLACK_CHANNEL_ID_2", True),
+    ("password", "DATABASE_URL", False),
+    ("password", "APP_PASSWORDX", False),
+    ("password", "app_password", False),
+    ("token", "APP_PASSWORD", False),
+    ("channel", "", False),
+])
+def test_operator_secret_names(kind, name, ok):
+    assert is_operator_secret(kind, name) is ok
+
+def test_registry_reads_only_allowed_secrets(monkeypatch):
+    monkeypatch.setenv("APP_PASSWORD_ALI", "gizli")
+    monkeypatch.setenv("SLACK_USER_TOKEN_ALI", "xoxp-1")
+    monkeypatch.setenv("SLACK_CHANNEL_ID_ALI", "C1,C2")
+    monkeypatch.setenv("DATABASE_URL", "postgres://kimse")
+    registry = OperatorRegistry([
+        _op(channel_secret="SLACK_CHANNEL_ID_ALI"),
+        _op(user_key="kötü", password_secret="DATABASE_URL", token_secret="DATABASE_URL", channel_secret="DATABASE_URL"),
+    ])
+    assert registry.authenticate("gizli") == "ali"
+    assert registry.authenticate("postgres://kimse") is None
+    assert registry.token("ali") == "xoxp-1" and registry.token("kötü") == ""
+    assert registry.default_channels("ali") == ["C1", "C2"]
+    assert registry.default_channels("kötü") == []
+
+def test_upsert_operator_rejects_other_secrets(pg):
+    with pytest.raises(ValueError):
+        db.db_upsert_operator("kötü", "operator", "DATABASE_URL", "SLACK_USER_TOKEN_X", [])
+    with pytest.raises(ValueError):
+        db.db_upsert_operator("kötü", "operator", "APP_PASSWORD_X", "SLACK_USER_TOKEN_X", [], "DATABASE_URL")
+    assert "kötü" not in {o["user_key"] for o in db.db_get_operators()}
+
+def test_upsert_operator_round_trip(pg):
+    db.db_upsert_operator("ali", "operator", " APP_PASSWORD_ALI ", "SLACK_USER_TOKEN_ALI", ["C1"], "", ["Genel"])
+    op = {o["user_key"]: o for o in db.db_get_operators()}["ali"]
+    assert (op["password_secret"], op["channel_secret"], op["categories"]) == ("APP_PASSWORD_ALI", "", ["Genel"])
+    db.db_delete_operator("ali")
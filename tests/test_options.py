@@ -0,0 +1,30 @@
+from slack_panel.options import OptionIndex
+
+OPTIONS = ["Kampanya Yaz", "kampanya kış", "Ürün A", "Büyük Kampanya", "Kampanyalar", "Yaz İndirimi", "Kmpanya Bahar"]
+
+
+def test_empty_query_returns_first_options():
+    assert OptionIndex(OPTIONS).search("", k=3) == OPTIONS[:3]
+
+def test_prefix_matches_first_case_insensitive_alphabetical():
+    assert OptionIndex(OPTIONS).search("KAMP", k=3) == ["kampanya kış", "Kampanya Yaz", "Kampanyalar"]
+
+def test_contains_after_prefix_shorter_first():
+    out = OptionIndex(OPTIONS).search("kampanya")
+    assert out[:3] == ["kampanya kış", "Kampanya Yaz", "Kampanyalar"]
+    assert out[3] == "Büyük Kampanya"
+
+def test_trigram_similarity_tolerates_typos():
+    out = OptionIndex(OPTIONS).search("kmpanya")
+    assert out[0] == "Kmpanya Bahar"  # içeren
+    assert "Kampanyalar" in out  # benzer (trigram)
+    assert "Ürün A" not in out
+
+def test_short_query_scans_contains():
+    assert OptionIndex(OPTIONS).search("rü") == ["Ürün A"]
+
+def test_k_limits_results():
+    assert len(OptionIndex(OPTIONS).search("a", k=2)) == 2
+
+def test_no_match():
+    assert OptionIndex(OPTIONS).search("zzzz") == []
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from slack_panel import db
+from slack_panel.db import db_get_last_selections, db_mark_failed, db_mark_sent, db_try_reserve_send
+from slack_panel.sender import build_send_item
+
+VARIABLES = {"urun": {"category": "Genel", "category_id": 0, "options": ["A", "B"]}}
+
+
+def _send(d, row_id, selections, attachment="", status="sent"):
+    log_id = db_try_reserve_send(
+        d, row_id, "{{urun}}", "test", "C1", "m", selections=selections, attachment_choice=attachment,
+    )
+    (db_mark_sent if status == "sent" else db_mark_failed)(log_id)
+    return log_id
+
+
+def test_send_item_records_used_selections(monkeypatch):
+    monkeypatch.setattr(db, "_category_ids", {"Genel": 0})
+    item, err = build_send_item(1, "{{urun}} hazır", "{{urun}} hazır", "Genel", False, {"urun": "B", "diğer": "x"}, "", "", VARIABLES, {})
+    assert err is None
+    assert item["message"] == "B hazır"
+    assert item["selections"] == {"urun": "B"}
+    assert item["attachment_choice"] == ""
+
+def test_send_item_matches_categories_by_id(monkeypatch):
+    monkeypatch.setattr(db, "_category_ids", {"Genel": 0, "Kampanya": 1})
+    renamed = {"urun": {"category": "Eski ad", "category_id": 0, "options": ["A"]}}
+    item, err = build_send_item(1, "{{urun}}", "{{urun}}", "Genel", False, {"urun": "A"}, "", "", renamed, {})
+    assert err is None and item["message"] == "A"
+    item, err = build_send_item(1, "{{urun}}", "{{urun}}", "Kampanya", False, {"urun": "A"}, "", "", renamed, {})
+    assert item is None and "kategori uyumsuz (urun/Eski ad)" in err
+
+def test_last_selections_latest_sent_only(pg):
+    # sent_log partition'ları bu aydan ileriye kurulu: ayın ilk günlerinde geçmiş tarih yazılamaz
+    today = date.today() + timedelta(days=14)
+    _send(today - timedelta(days=14), 1, {"urun": "A"}, "afiş")
+    _send(today - timedelta(days=7), 1, {"urun": "B"}, "Manuel")
+    _send(today, 1, {"urun": "C"}, status="failed")
+    _send(today - timedelta(days=7), 2, {"urun": "A"})
+    _send(today, 3, {"urun": "A"}, status="failed")
+    assert db_get_last_selections([1, 2, 3, 4]) == {
+        1: {"selections": {"urun": "B"}, "attachment": "Manuel"},
+        2: {"selections": {"urun": "A"}, "attachment": ""},
+    }
+    assert db_get_last_selections([]) == {}
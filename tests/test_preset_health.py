@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from slack_panel import preset_health
+from slack_panel.preset_health import PRESET_BROKEN, PRESET_OK, broken_label, check_presets, is_broken
+
+ATTACHMENTS = {
+    "sağlam": {"category": "Genel", "url": "https://prnt.sc/ok1"},
+    "silinmiş": {"category": "Genel", "url": "https://prnt.sc/gone"},
+    "yavaş": {"category": "Genel", "url": "https://prnt.sc/slow"},
+    "yanlış": {"category": "Genel", "url": "https://example.com/x.png"},
+}
+CHECKED = {
+    "https://prnt.sc/ok1": {"ok": True, "transient": False, "error": "", "image_url": "https://i/ok1.png", "bytes": 10},
+    "https://prnt.sc/gone": {"ok": False, "transient": False, "error": "HTTP 404", "image_url": "", "bytes": 0},
+    "https://prnt.sc/slow": {"ok": False, "transient": True, "error": "timeout", "image_url": "", "bytes": 0},
+}
+
+
+def test_is_broken():
+    assert is_broken({"status": PRESET_BROKEN})
+    assert not is_broken({"status": PRESET_OK})
+    assert not is_broken({})
+    assert not is_broken("https://prnt.sc/x")
+
+def test_broken_label():
+    assert broken_label({}) == "❌ Preset bozuk"
+    assert broken_label({"check_error": " HTTP 404 "}) == "❌ Preset bozuk (HTTP 404)"
+    checked = datetime(2026, 3, 5, 14, 5, tzinfo=timezone.utc)
+    label = broken_label({"check_error": "HTTP 404", "checked_at": checked})
+    assert label == f"❌ Preset bozuk (HTTP 404, {checked.astimezone().strftime('%d.%m %H:%M')})"
+
+@pytest.fixture
+def health(monkeypatch):
+    written = []
+    checked_urls = []
+    monkeypatch.setattr(preset_health, "db_get_attachments", lambda include_expired=False: ATTACHMENTS)
+
+    def check_images(urls):
+        urls = list(urls)
+        checked_urls.extend(urls)
+        return {u: CHECKED[u] for u in urls}
+
+    def set_health(results):
+        written.extend(results)
+        return 2
+
+    monkeypatch.setattr(preset_health, "check_images", check_images)
+    monkeypatch.setattr(preset_health, "db_set_attachment_health", set_health)
+    return written, checked_urls
+
+def test_check_presets_classifies_results(health):
+    written, checked_urls = health
+    summary = check_presets()
+    assert "https://example.com/x.png" not in checked_urls
+    status = {r["name"]: r["status"] for r in written}
+    assert status == {"sağlam": PRESET_OK, "silinmiş": PRESET_BROKEN, "yavaş": None, "yanlış": PRESET_BROKEN}
+    assert summary["presets"] == 4 and summary["ok"] == 1 and summary["changed"] == 2
+    assert summary["broken"] == ["silinmiş", "yanlış"]
+    assert summary["transient"] == ["yavaş"]
+    assert preset_health.last_check()["broken"] == ["silinmiş", "yanlış"]
+
+def test_check_presets_only_named(health):
+    written, checked_urls = health
+    check_presets(["sağlam"])
+    assert checked_urls == ["https://prnt.sc/ok1"]
+    assert [r["name"] for r in written] == ["sağlam"]
@@ -0,0 +1,67 @@
+import socket
+from datetime import date, timedelta
+from io import BytesIO
+
+import pytest
+
+from slack_panel import aio, sender
+from slack_panel.db import db_try_reserve_send, get_conn
+from slack_panel.fakeslack import PNG_1PX, FakeSlack
+from slack_panel.slack import make_client, send_metadata
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    fake = FakeSlack(latency=0, jitter=0)
+    url = fake.start(port=port)
+    monkeypatch.setenv("SLACK_API_URL", url + "/api/")
+    yield fake
+    fake.stop()
+
+def _reserve(day_row_id, send_key):
+    return db_try_reserve_send(date.today() + timedelta(days=1), day_row_id, "t", "test", "C1", "aynı metin", send_key=send_key)
+
+def _expire(log_id):
+    # Süreç Slack çağrısından sonra ölmüş gibi: kayıt 'reserved', lease dolmuş
+    with get_conn().cursor() as cur:
+        cur.execute(
+            "update sent_log set status='reserved', lease_expires_at=now() - interval '1 second' where id=%s",
+            (log_id,),
+        )
+
+def _status(log_id):
+    with get_conn().cursor() as cur:
+        cur.execute("select status, slack_ts, slack_file_id, error from sent_log where id=%s", (log_id,))
+        return cur.fetchone()
+
+
+def test_reconcile_matches_send_key_not_text(pg, fake):
+    client = make_client("xoxp-test")
+    posted, lost = _reserve(1, "key-1"), _reserve(2, "key-2")
+    resp = client.chat_postMessage(channel="C1", text="aynı metin", metadata=send_metadata(["key-0", "key-1"]))
+    _expire(posted)
+    _expire(lost)
+    assert sender.reconcile_stale_reservations(client) == {"sent": 1, "failed": 1, "pending": 0}
+    assert _status(posted)[:2] == ("sent", resp["ts"])
+    # Aynı metinli mesaj kanalda var ama bu gönderimin anahtarını taşımıyor
+    assert _status(lost) == ("failed", None, None, "reconcile: Slack mesajı bulunamadı")
+
+def test_reconcile_matches_upload_file_id(pg, fake):
+    client = make_client("xoxp-test")
+    shared, unshared = _reserve(1, "key-1"), _reserve(2, "key-2")
+    resp, err = aio.run(sender.deliver_async(client, "C1", "aynı metin", "Genel", BytesIO(PNG_1PX), log_id=shared))
+    assert err is None
+    file_id = resp["files"][0]["id"]
+    # Upload başlamış ama paylaşılmamış (süreç completeUploadExternal öncesi ölmüş)
+    url = client.files_getUploadURLExternal(filename="x.png", length=len(PNG_1PX))
+    with get_conn().cursor() as cur:
+        cur.execute("update sent_log set slack_file_id=%s where id=%s", (url["file_id"], unshared))
+    assert _status(shared)[2] == file_id  # deliver_async rezervasyona yazdı
+    _expire(shared)
+    _expire(unshared)
+    assert sender.reconcile_stale_reservations(client) == {"sent": 1, "failed": 1, "pending": 0}
+    assert _status(shared)[:3] == ("sent", fake.messages[-1]["ts"], file_id)
+    assert _status(unshared)[0] == "failed"
@@ -0,0 +1,29 @@
+from slack_panel.render import escape_mrkdwn, render_cached, render_key, render_message
+
+
+def test_escapes_bare_control_characters():
+    assert escape_mrkdwn("a & b < c > d") == "a &amp; b &lt; c &gt; d"
+
+def test_keeps_slack_tokens():
+    text = "<@U123ABC> <#C42|genel> <!here> <https://example.com|link> <mailto:a@b.co>"
+    assert escape_mrkdwn(text) == text
+
+def test_escapes_around_slack_tokens():
+    assert escape_mrkdwn("x<y <@U1> 1>0 & <!channel>") == "x&lt;y <@U1> 1&gt;0 &amp; <!channel>"
+
+def test_does_not_double_escape_entities():
+    assert escape_mrkdwn("a &amp; b &lt;c&gt; &copy;") == "a &amp; b &lt;c&gt; &amp;copy;"
+
+def test_unclosed_token_is_escaped():
+    assert escape_mrkdwn("<@U1 ve <b>") == "&lt;@U1 ve &lt;b&gt;"
+
+def test_render_substitutes_once_and_escapes_values():
+    out = render_message("  {{urun}} için <@U9> {{eksik}} ", {"urun": "A&B <{{x}}>"})
+    assert out == "A&amp;B &lt;{{x}}&gt; için <@U9> {{eksik}}"
+
+def test_render_cached_is_deterministic():
+    key, text = render_cached(7, "{{a}} & {{b}}", {"b": "2", "a": "1"})
+    assert key == render_key(7, "{{a}} & {{b}}", {"a": "1", "b": "2"})
+    assert text == "1 &amp; 2"
+    assert render_cached(7, "{{a}} & {{b}}", {"a": "1", "b": "2"}) == (key, text)
+    assert render_key(8, "{{a}} & {{b}}", {"a": "1", "b": "2"}) != key
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from slack_panel import retry, sender
+from slack_panel.slack import api_error, is_transient_error
+
+
+@pytest.mark.parametrize("err", [
+    "chat_postMessage: ratelimited",
+    "chat_postMessage: internal_error",
+    "files_upload_v2: service_unavailable",
+    "chat_postMessage: ConnectionResetError: [Errno 104] Connection reset by peer",
+    "files_upload_v2: ClientConnectorError: Cannot connect to host slack.com:443",
+    "chat_postMessage: HTTP 502: Bad Gateway",
+    "lightshot sayfa HTTP 503",
+])
+def test_transient_errors(err):
+    assert is_transient_error(err)
+
+def test_api_error_format():
+    class Response(dict):
+        status_code = 200
+
+    assert api_error("chat_postMessage", SlackApiError("x", Response(error="ratelimited"))) == "chat_postMessage: ratelimited"
+    assert api_error("chat_postMessage", TimeoutError("zaman aşımı")) == "chat_postMessage: TimeoutError: zaman aşımı"
+    assert is_transient_error(api_error("chat_postMessage", TimeoutError("zaman aşımı")))
+
+@pytest.mark.parametrize("err", [
+    "",
+    None,
+    "chat_postMessage: channel_not_found",
+    "chat_postMessage: not_in_channel",
+    "files_upload_v2: invalid_auth",
+    "chat_postMessage: HTTP 400: invalid_blocks_format",
+    "chat_postMessage: ValueError: beklenmeyen yanıt",
+])
+def test_permanent_errors(err):
+    assert not is_transient_error(err)
+
+def test_retry_delay_doubles_with_jitter_and_cap():
+    for attempts, base in [(1, 15), (2, 30), (3, 60), (4, 120)]:
+        for _ in range(20):
+            assert base * 0.5 <= sender.retry_delay(attempts) <= base
+    assert sender.retry_delay(50) <= sender.RETRY_MAX_SECONDS
+
+@pytest.fixture
+def marks(monkeypatch):
+    calls = []
+    for name in ("db_mark_sent", "db_mark_retrying", "db_mark_failed"):
+        monkeypatch.setattr(sender, name, lambda *a, _n=name, **k: calls.append((_n, a)))
+    return calls
+
+def test_settle_sent(marks):
+    assert sender.settle(7, {"ts": "1.2"}, None) == sender.SENT
+    assert marks[0][0] == "db_mark_sent"
+
+def test_settle_transient_is_queued(marks):
+    assert sender.settle(7, None, "chat_postMessage: ratelimited", attempts=1) == sender.RETRYING
+    name, args = marks[0]
+    assert name == "db_mark_retrying" and args[:2] == (7, "chat_postMessage: ratelimited")
+
+def test_settle_gives_up_after_max_attempts(marks):
+    err = "chat_postMessage: ratelimited"
+    assert sender.settle(7, None, err, attempts=sender.MAX_SEND_ATTEMPTS) == sender.FAILED
+    assert marks == [("db_mark_failed", (7, err))]
+
+def test_settle_permanent_fails_immediately(marks):
+    assert sender.settle(7, None, "chat_postMessage: channel_not_found") == sender.FAILED
+    assert marks[0][0] == "db_mark_failed"
+
+def test_worker_reconciles_each_operator_on_its_own_interval(monkeypatch):
+    calls = []
+
+    def reconcile(client, user_key):
+        calls.append(user_key)
+        if user_key == "a":
+            raise RuntimeError("Slack okunamadı")  # bir operatörün hatası diğerlerini durdurmaz
+        return {sender.SENT: 1, sender.FAILED: 0, "pending": 0}
+
+    monkeypatch.setattr(retry, "reconcile_stale_reservations", reconcile)
+    monkeypatch.setattr(retry, "process_due_retries", lambda clients: {})
+    worker = retry.RetryWorker(poll_seconds=0.01, reconcile_seconds=3600)
+    worker.register_client("a", object())
+    worker.register_client("b", object())
+    worker.start()
+    try:
+        for _ in range(100):
+            if len(calls) >= 2:
+                break
+            time.sleep(0.01)
+        time.sleep(0.05)  # birkaç retry turu daha; reconcile aralığı dolmadı
+    finally:
+        worker.stop()
+        worker.join(timeout=1)
+    assert calls == ["a", "b"]
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+import pytest
+
+from slack_panel.dispatch import next_run_at
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+
+
+def test_later_today():
+    # 2026-10-19 Pazartesi
+    assert next_run_at(datetime(2026, 10, 19, 8, 30), "09:00", WEEKDAYS) == datetime(2026, 10, 19, 9, 0)
+
+def test_time_passed_moves_to_next_day():
+    assert next_run_at(datetime(2026, 10, 19, 9, 0), "09:00", WEEKDAYS) == datetime(2026, 10, 20, 9, 0)
+
+def test_skips_days_not_in_list():
+    # Cuma akşamı → Pazartesi sabahı
+    assert next_run_at(datetime(2026, 10, 23, 18, 0), "09:00", WEEKDAYS) == datetime(2026, 10, 26, 9, 0)
+
+def test_same_weekday_next_week():
+    assert next_run_at(datetime(2026, 10, 19, 10, 0), "09:15", ["monday"]) == datetime(2026, 10, 26, 9, 15)
+
+def test_invalid_days():
+    with pytest.raises(ValueError):
+        next_run_at(datetime(2026, 10, 19, 10, 0), "09:00", ["pazartesi"])
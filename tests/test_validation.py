@@ -0,0 +1,73 @@
+from slack_panel.validation import (
+    STATUS_IMAGE_FAILED, STATUS_OK, STATUS_OK_UNCHECKED, changed_row_indices, config_fingerprint, is_ok_status,
+    refresh_link_status, validate_row,
+)
+
+CATEGORY_IDS = {"Genel": 0, "Kampanya": 1}
+VARIABLES = {"urun": {"category": "Kampanya", "category_id": 1, "options": ["A", "B"]}}
+ATTACHMENTS = {"afiş": {"category": "Kampanya", "category_id": 1, "url": "https://prnt.sc/abc"}}
+LINK = "https://prnt.sc/abc"
+
+
+def _row(**kw):
+    row = {"Kategori": "Kampanya", "Mesaj": "m", "Var: urun": "A", "Ek Zorunlu": True, "Ek Seç": "afiş", "Lightshot Link": ""}
+    row.update(kw)
+    return row
+
+def _validate(row, template="{{urun}}", link_cache=None):
+    return validate_row(row, template, CATEGORY_IDS, VARIABLES, ATTACHMENTS, {LINK: True} if link_cache is None else link_cache)
+
+
+def test_ready_row():
+    assert _validate(_row()) == STATUS_OK
+    assert is_ok_status(_validate(_row(**{"Ek Zorunlu": False})))
+
+def test_unchecked_link():
+    assert _validate(_row(), link_cache={}) == STATUS_OK_UNCHECKED
+    assert is_ok_status(STATUS_OK_UNCHECKED)
+
+def test_failed_link():
+    assert _validate(_row(), link_cache={LINK: False}) == "❌ Görsel alınamadı"
+    assert not is_ok_status("❌ Görsel alınamadı")
+
+def test_refresh_link_status_follows_link_cache():
+    # Durum kolonundaki sonuç, link kontrolü sonrası tam doğrulama yapılmadan güncellenir
+    stored = _validate(_row(), link_cache={})
+    assert refresh_link_status(stored, LINK, {LINK: True}) == _validate(_row(), link_cache={LINK: True}) == STATUS_OK
+    assert refresh_link_status(STATUS_OK, LINK, {LINK: False}) == STATUS_IMAGE_FAILED
+    assert refresh_link_status(STATUS_IMAGE_FAILED, LINK, {}) == STATUS_OK_UNCHECKED
+    # Linke bağlı olmayan durumlar ve eksiz satırlar olduğu gibi kalır
+    assert refresh_link_status("❗ urun seçilmedi", LINK, {LINK: True}) == "❗ urun seçilmedi"
+    assert refresh_link_status(STATUS_OK, "", {}) == STATUS_OK
+
+def test_variable_errors():
+    assert _validate(_row(Kategori="Genel")).startswith("❗ Değişken kategori uyumsuz")
+    assert _validate(_row(**{"Var: urun": "Seçiniz…"})) == "❗ urun seçilmedi"
+
+def test_categories_match_by_id_not_name():
+    # Ad değişse de (kayıtta eski ad kalsa da) id eşleşmesi geçerli
+    variables = {"urun": {"category": "Eski ad", "category_id": 1}}
+    assert validate_row(_row(**{"Ek Zorunlu": False}), "{{urun}}", CATEGORY_IDS, variables, ATTACHMENTS, {}) == STATUS_OK
+    # Bilinmeyen satır kategorisi Genel (0) sayılır
+    assert _validate(_row(Kategori="Silinmiş")).startswith("❗ Değişken kategori uyumsuz")
+
+def test_attachment_errors():
+    assert _validate(_row(**{"Ek Seç": ""})) == "❗ Ek seçilmedi"
+    assert _validate(_row(**{"Ek Seç": "yok"})) == "❗ Preset yok"
+    assert _validate(_row(**{"Ek Seç": "Manuel"})) == "❗ Link yok"
+    assert _validate(_row(**{"Ek Seç": "Manuel", "Lightshot Link": "https://x.com/a"})) == "❗ Link prnt.sc değil"
+    assert _validate(_row(**{"Ek Seç": "Manuel", "Lightshot Link": LINK})) == STATUS_OK
+
+def test_changed_row_indices_is_delta_of_cumulative_edits():
+    previous = {0: {"Mesaj": "a"}, 2: {"Gönder": True}}
+    edited = {0: {"Mesaj": "a"}, 2: {"Gönder": False}, 5: {"Ek Seç": "afiş"}}
+    assert changed_row_indices(edited, previous) == {2, 5}
+    assert changed_row_indices({}, previous) == {0, 2}  # geri alınan düzenleme de değişiklik
+    assert changed_row_indices(edited, edited) == set()
+
+def test_config_fingerprint_tracks_validation_inputs():
+    base = config_fingerprint(CATEGORY_IDS, VARIABLES, ATTACHMENTS)
+    assert base == config_fingerprint(dict(CATEGORY_IDS), dict(VARIABLES), dict(ATTACHMENTS))
+    assert base != config_fingerprint({**CATEGORY_IDS, "Yeni": 2}, VARIABLES, ATTACHMENTS)
+    assert base != config_fingerprint(CATEGORY_IDS, {"urun": {"category_id": 0}}, ATTACHMENTS)
+    assert base != config_fingerprint(CATEGORY_IDS, VARIABLES, {"afiş": {"category_id": 1, "url": "https://prnt.sc/x"}})